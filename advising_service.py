@@ -0,0 +1,400 @@
+import argparse
+import asyncio
+import collections
+import email.parser
+import email.policy
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import metrics
+from catalog_cache import CatalogCache, CatalogCacheMiss, DEFAULT_CACHE_PATH
+from degree_plan_evaluator import DegreePlanEvaluator
+from degree_scraper import CourseRequisiteRegistry, build_degree_plan_url, scrape_degree_plan, set_catalog_cache
+from plan_store import DEFAULT_PLAN_STORE, PlanStore, parse_years
+from pdf_text import extraction_key
+from transcript_cache import DEFAULT_TRANSCRIPT_CACHE_PATH, TranscriptCache, pdf_digest
+from transcript_parser import extract_transcript_data, is_page_parallel, school_mapping
+from what_if import WhatIfIndex
+
+# long running local HTTP service evaluating uploaded transcripts, the compiled plans, the catalog cache and the
+# course requisite registry stay warm between requests instead of being rebuilt by every main.py run
+#
+#   POST /evaluate   body is the transcript PDF (application/pdf or a multipart form upload)
+#                    -> {"major", "school", "year", "category_completion", "recommended_courses"}
+#   POST /what-if    body is the transcript PDF -> {"major", "school", "year", "majors"}, the completion of the
+#                    transcript against every stored plan of its catalog year, most complete first
+#   GET  /health     -> service counters and latency percentiles of /evaluate
+#   GET  /metrics    -> metrics of the service and its parse workers in the Prometheus text format
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+MAX_HEADER_LINES = 100
+
+# number of recent /evaluate latencies kept for the percentiles reported by /health
+LATENCY_WINDOW = 1000
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 411: "Length Required",
+           413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error", 502: "Bad Gateway"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# runs in the parse worker processes, pdfplumber reads the upload from memory
+# returns the transcript with the metrics recorded while parsing it, the service merges them into its own
+def parse_transcript_bytes(data):
+    metrics.METRICS.reset()
+    try:
+        return extract_transcript_data(io.BytesIO(data)), metrics.METRICS.snapshot()
+    except Exception as e:
+        raise ValueError(f"{type(e).__name__}: {e}") from None
+
+
+# function to pull the PDF out of the request body, either the raw body or the first file of a multipart form
+def extract_upload(content_type, body):
+    if not content_type.startswith("multipart/form-data"):
+        return body
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body)
+    for part in message.iter_parts():
+        if part.get_filename() or part.get_content_type() == "application/pdf":
+            return part.get_payload(decode=True)
+    raise HttpError(400, "multipart upload without a file")
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class AdvisingService:
+    """Evaluates transcript uploads against compiled degree plans.
+
+    PDF parsing runs in a process pool so the event loop keeps accepting requests while pdfplumber works, a long
+    transcript has its page ranges spread over the pool instead of going to a single worker.
+    Plans come from the PlanStore, which keeps loaded plans in memory. A plan missing from the store is
+    scraped once in a thread, and concurrent requests for the same (school, major, year) wait on that
+    in-flight scrape instead of starting their own. With a TranscriptCache, a PDF uploaded again is not parsed again.
+    """
+
+    def __init__(self, plan_store, parse_workers=None, scrape_workers=2, transcript_cache=None):
+        self.plan_store = plan_store
+        self.transcript_cache = transcript_cache
+        # uploads are parsed with the default backend, cached transcripts are looked up under its extraction key
+        self.transcript_extractor = extraction_key()
+        self.parse_workers = parse_workers or os.cpu_count()
+        self.parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        self.scrape_pool = ThreadPoolExecutor(max_workers=scrape_workers)
+        # shared by every scrape so courses common to several plans are fetched once per service lifetime
+        self.registry = CourseRequisiteRegistry()
+        self._scrapes = {}
+        # catalog year -> WhatIfIndex over the stored plans of that year, rebuilt once an artifact of the year changes
+        # on disk (scraped by the service, the crawler or plan_store prebuild)
+        self._what_if = {}
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self.counters = collections.Counter()
+        self.server = None
+
+    def warm(self, years=()):
+        """Start the parse workers and load the stored plans of every known major for the given years."""
+        for future in [self.parse_pool.submit(os.getpid) for _ in range(self.parse_workers)]:
+            future.result()
+        loaded = 0
+        for year in years:
+            for major, school in school_mapping.items():
+                if self.plan_store.load(school, major, year) is not None:
+                    loaded += 1
+        return loaded
+
+    async def get_plan(self, school, major, year):
+        """Return the compiled plan, scraping and storing it if the store does not have it yet."""
+        # the store reads and unpickles the artifact on the first load, off the event loop
+        plan = await asyncio.get_running_loop().run_in_executor(None, self.plan_store.load, school, major, year)
+        if plan is not None:
+            self.counters["plan_hits"] += 1
+            return plan
+
+        key = (school, major, str(year))
+        scrape = self._scrapes.get(key)
+        if scrape is None:
+            self.counters["plan_scrapes"] += 1
+            scrape = self._scrapes[key] = asyncio.ensure_future(self._scrape_plan(school, major, year))
+            scrape.add_done_callback(lambda _: self._scrapes.pop(key, None))
+        else:
+            self.counters["plan_scrapes_joined"] += 1
+        # shielded so one client disconnecting does not cancel the scrape the others are waiting on
+        return await asyncio.shield(scrape)
+
+    async def _scrape_plan(self, school, major, year):
+        def scrape():
+            url = build_degree_plan_url(school, major, year)
+            try:
+                degree_plan = scrape_degree_plan(url, year, registry=self.registry, allow_partial=False)
+            except CatalogCacheMiss as e:
+                raise HttpError(502, f"running offline and {e}")
+            if not degree_plan or not (degree_plan["core_requirements"] or degree_plan["major_requirements"]):
+                raise HttpError(502, f"failed to fetch the {year} degree plan for {major}")
+            return self.plan_store.save(school, major, year, degree_plan)
+
+        return await asyncio.get_running_loop().run_in_executor(self.scrape_pool, scrape)
+
+    async def parse(self, pdf_bytes):
+        """Return the parsed transcript of the PDF, from the transcript cache when it was parsed before."""
+        # hashing, the SQLite transcript cache and the page count probe block, they run in the loop's default executor
+        loop = asyncio.get_running_loop()
+        digest = await loop.run_in_executor(None, pdf_digest, pdf_bytes)
+        if self.transcript_cache is not None:
+            transcript = await loop.run_in_executor(None, self.transcript_cache.get, digest,
+                                                    self.transcript_extractor)
+            if transcript is not None:
+                self.counters["transcript_cache_hits"] += 1
+                return transcript
+
+        try:
+            page_parallel = self.parse_workers > 1 and await loop.run_in_executor(
+                None, is_page_parallel, io.BytesIO(pdf_bytes))
+            if page_parallel:
+                # a long transcript is spread over the parse workers page range by page range, the ranges are
+                # merged and classified by a thread of this process, which records their metrics directly
+                self.counters["page_parallel_parses"] += 1
+                transcript = await loop.run_in_executor(None, lambda: extract_transcript_data(
+                    io.BytesIO(pdf_bytes), page_executor=self.parse_pool))
+            else:
+                transcript, parse_metrics = await loop.run_in_executor(self.parse_pool, parse_transcript_bytes, pdf_bytes)
+                metrics.METRICS.merge(parse_metrics)
+        except Exception as e:
+            raise HttpError(422, f"could not parse the transcript: {e}")
+        if self.transcript_cache is not None:
+            await loop.run_in_executor(None, self.transcript_cache.put, digest, self.transcript_extractor,
+                                       transcript)
+        return transcript
+
+    async def parse_upload(self, pdf_bytes):
+        """Parse the transcript PDF, returns (transcript, major, school, catalog year)."""
+        if not pdf_bytes.startswith(b"%PDF"):
+            raise HttpError(400, "upload is not a PDF")
+        transcript = await self.parse(pdf_bytes)
+
+        major, school = transcript.get('major'), transcript.get('school')
+        program_start_date = transcript.get('program_start_date')
+        if not major or not school or not program_start_date:
+            raise HttpError(422, "transcript has no major, school or program start date")
+        return transcript, major, school, program_start_date.split("-")[0]
+
+    async def evaluate(self, pdf_bytes):
+        """Parse the transcript PDF and evaluate it against its degree plan."""
+        transcript, major, school, year = await self.parse_upload(pdf_bytes)
+        plan = await self.get_plan(school, major, year)
+        evaluator = DegreePlanEvaluator(plan, transcript)
+        return {
+            "major": major,
+            "school": school,
+            "year": year,
+            "category_completion": evaluator.calculate_category_completion(),
+            "recommended_courses": evaluator.recommend_courses(),
+        }
+
+    async def what_if(self, pdf_bytes):
+        """Parse the transcript PDF and return its completion against every stored plan of its catalog year."""
+        transcript, major, school, year = await self.parse_upload(pdf_bytes)
+
+        # the artifact mtimes are checked and the stored plans loaded in a thread so the event loop keeps serving
+        def current_index():
+            index = self._what_if.get(year)
+            if index is not None and index.is_current(self.plan_store):
+                return index, False
+            index = self._what_if[year] = WhatIfIndex.from_store(self.plan_store, year)
+            return index, True
+
+        index, built = await asyncio.get_running_loop().run_in_executor(None, current_index)
+        if built:
+            self.counters["what_if_index_builds"] += 1
+        return {
+            "major": major,
+            "school": school,
+            "year": year,
+            "majors": index.evaluate_transcript(transcript),
+        }
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+        return {
+            "counters": dict(self.counters),
+            "scrapes_in_flight": len(self._scrapes),
+            "requisite_registry": self.registry.stats(),
+            "evaluate_latency_ms": {
+                "samples": len(latencies),
+                "p50": percentile(latencies, 0.50),
+                "p90": percentile(latencies, 0.90),
+                "p99": percentile(latencies, 0.99),
+            },
+        }
+
+    async def handle_connection(self, reader, writer):
+        # connections are kept alive until the client closes them or asks for Connection: close
+        try:
+            while True:
+                request = await self.read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload = await self.dispatch(method, path, headers, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self.write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except HttpError as e:
+            await self.write_response(writer, e.status, {"error": e.message}, False)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode("latin-1").split()
+        except ValueError:
+            raise HttpError(400, "malformed request line")
+
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise HttpError(400, "too many headers")
+
+        # the body is read whatever the method, one left on the connection would be read as the next request.
+        # Chunked bodies are not supported, the error closes the connection
+        if "transfer-encoding" in headers:
+            raise HttpError(411, "chunked bodies are not supported, send a Content-Length")
+        body = b""
+        if "content-length" in headers:
+            try:
+                length = int(headers["content-length"])
+            except ValueError:
+                length = -1
+            if length < 0:
+                raise HttpError(400, f"invalid Content-Length {headers['content-length']!r}")
+            if length > MAX_UPLOAD_BYTES:
+                raise HttpError(413, f"uploads are limited to {MAX_UPLOAD_BYTES} bytes")
+            body = await reader.readexactly(length)
+        elif method == "POST":
+            raise HttpError(411, "Content-Length is required")
+        return method, target.split("?")[0], headers, body
+
+    async def dispatch(self, method, path, headers, body):
+        if path in ("/health", "/metrics"):
+            if method != "GET":
+                return 405, {"error": "use GET"}
+            return 200, self.stats() if path == "/health" else metrics.METRICS.prometheus()
+        if path not in ("/evaluate", "/what-if"):
+            return 404, {"error": f"no such endpoint {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST with the transcript PDF as the body"}
+        handler = self.evaluate if path == "/evaluate" else self.what_if
+
+        start = time.perf_counter()
+        self.counters["requests"] += 1
+        try:
+            # a multipart body is parsed in the loop's default executor like the rest of the blocking work
+            upload = await asyncio.get_running_loop().run_in_executor(
+                None, extract_upload, headers.get("content-type", ""), body)
+            result = 200, await handler(upload)
+        except HttpError as e:
+            result = e.status, {"error": e.message}
+        except Exception as e:
+            result = 500, {"error": f"{type(e).__name__}: {e}"}
+        if result[0] != 200:
+            self.counters["errors"] += 1
+        seconds = time.perf_counter() - start
+        self.latencies.append(round(seconds * 1000, 3))
+        metrics.observe("service_evaluate_seconds", seconds, status=result[0])
+        return result
+
+    async def write_response(self, writer, status, payload, keep_alive):
+        # text payloads (the Prometheus metrics) are sent as they are, everything else as JSON
+        if isinstance(payload, str):
+            body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            body, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        self.parse_pool.shutdown(cancel_futures=True)
+        self.scrape_pool.shutdown(wait=False, cancel_futures=True)
+        if self.transcript_cache is not None:
+            self.transcript_cache.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve transcript evaluations over HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="path of the on-disk catalog cache")
+    parser.add_argument("--no-cache", action="store_true", help="always fetch catalog pages from the network")
+    parser.add_argument("--offline", action="store_true", help="only use cached catalog pages, fail if one is missing")
+    parser.add_argument("--plans", default=DEFAULT_PLAN_STORE, help="directory of the compiled degree plan store")
+    parser.add_argument("--workers", type=int, default=None, help="PDF parsing processes (default: CPU count)")
+    parser.add_argument("--transcript-cache", default=DEFAULT_TRANSCRIPT_CACHE_PATH, help="path of the parsed transcript cache")
+    parser.add_argument("--no-transcript-cache", action="store_true", help="parse every uploaded PDF")
+    parser.add_argument("--warm", type=parse_years, default=[], help='load the stored plans of these years at startup, i.e. "2021-2024"')
+    return parser.parse_args()
+
+
+async def serve(args):
+    if args.offline and args.no_cache:
+        print("Error: --offline needs the catalog cache, it cannot be combined with --no-cache.", file=sys.stderr)
+        return 1
+    if not args.no_cache:
+        set_catalog_cache(CatalogCache(args.cache, offline=args.offline))
+
+    transcript_cache = None if args.no_transcript_cache else TranscriptCache(args.transcript_cache)
+    service = AdvisingService(PlanStore(args.plans), parse_workers=args.workers, transcript_cache=transcript_cache)
+    loaded = service.warm(args.warm)
+    server = await service.start(args.host, args.port)
+    print(f"Advising service listening on http://{args.host}:{args.port} ({loaded} plans loaded)", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+    return 0
+
+
+def main():
+    try:
+        return asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
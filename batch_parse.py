@@ -0,0 +1,109 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import metrics
+import pdf_text
+from transcript_parser import extract_transcript_data
+
+# batch entry point for advising week: parses every transcript PDF of a directory or glob in a process pool
+# and streams one JSON record per transcript to a JSONL file
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Parse many UTD transcript PDFs into a JSONL file.")
+    parser.add_argument("inputs", nargs="+", help="directories or glob patterns of transcript PDFs")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output path, '-' for stdout (default)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes (default: number of cores)")
+    parser.add_argument("--metrics", help="write the merged metrics of the workers to this file (.prom/.txt or JSON)")
+    parser.add_argument("--backend", choices=[pdf_text.AUTO, *pdf_text.PAGE_EXTRACTORS],
+                        help="PDF text extraction backend (default: $UTD_PDF_BACKEND or auto)")
+    return parser.parse_args()
+
+
+# function to expand the directories and glob patterns given on the command line into a sorted list of PDF paths
+def collect_pdf_paths(inputs):
+    paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.update(glob.glob(os.path.join(item, "**", "*.pdf"), recursive=True))
+            paths.update(glob.glob(os.path.join(item, "**", "*.PDF"), recursive=True))
+        else:
+            paths.update(glob.glob(item, recursive=True))
+    return sorted(path for path in paths if os.path.isfile(path))
+
+
+# runs in a worker process, failures are returned as records so one bad PDF does not stop the batch
+# the metrics recorded while parsing the file are sent back under "metrics" for the parent to merge
+# every record names the extraction backend that produced it, the fast backend that fell back to pdfplumber (if any)
+# and the time spent extracting the text, apart from the total seconds
+def parse_transcript(pdf_path, backend=None):
+    metrics.METRICS.reset()
+    start_time = time.perf_counter()
+    report = {}
+    try:
+        transcript_data = extract_transcript_data(pdf_path, backend=backend, report=report)
+        record = {"path": pdf_path, "ok": True, "seconds": round(time.perf_counter() - start_time, 4),
+                  "transcript": transcript_data}
+    except Exception as e:
+        record = {"path": pdf_path, "ok": False, "seconds": round(time.perf_counter() - start_time, 4),
+                  "error": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc()}
+    record["backend"] = report.get("backend")
+    record["fallback_from"] = report.get("fallback_from")
+    record["extract_seconds"] = round(report.get("extract_seconds", 0.0), 4)
+    record["metrics"] = metrics.METRICS.snapshot()
+    return record
+
+
+# function to parse every PDF in a process pool, yielding the records as soon as each transcript is done
+def parse_transcripts(pdf_paths, workers, backend=None):
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(parse_transcript, path, backend): path for path in pdf_paths}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                # the worker process itself died (e.g. killed or out of memory)
+                yield {"path": futures[future], "ok": False, "seconds": None, "error": f"{type(e).__name__}: {e}"}
+
+
+def main():
+    args = parse_args()
+    pdf_paths = collect_pdf_paths(args.inputs)
+    if not pdf_paths:
+        print("Error: no transcript PDFs found.", file=sys.stderr)
+        return 1
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    failures = []
+    start_time = time.perf_counter()
+    try:
+        for record in parse_transcripts(pdf_paths, args.workers, args.backend):
+            if "metrics" in record:
+                metrics.METRICS.merge(record.pop("metrics"))
+            output.write(json.dumps(record, separators=(",", ":")) + "\n")
+            output.flush()
+            if not record["ok"]:
+                failures.append(record)
+                print(f"Failed to parse {record['path']}: {record['error']}", file=sys.stderr)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - start_time
+
+    parsed = len(pdf_paths) - len(failures)
+    print(f"Parsed {parsed}/{len(pdf_paths)} transcripts in {round(elapsed, 2)} seconds "
+          f"({round(len(pdf_paths) / elapsed, 2) if elapsed else 0} PDFs/sec) with {args.workers} workers, "
+          f"{len(failures)} failed", file=sys.stderr)
+    if args.metrics:
+        metrics.METRICS.write(args.metrics)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
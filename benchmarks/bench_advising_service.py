@@ -0,0 +1,92 @@
+# request latency percentiles of the advising service under concurrent load, the catalog is served from synthetic
+# fixture pages so the first request scrapes without the network and the rest hit the warm plan
+# run from the repository root: python -m benchmarks.bench_advising_service --pdf SSR_TSRPT.pdf [--clients 16] [--requests 20]
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import tempfile
+import time
+
+import degree_scraper
+from advising_service import AdvisingService, percentile
+from catalog_transport import FixtureTransport
+from plan_store import PlanStore
+from transcript_parser import extract_transcript_header
+from benchmarks.catalog_fixtures import build_catalog
+
+
+async def post_pdf(reader, writer, pdf):
+    writer.write(b"POST /evaluate HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/pdf\r\n"
+                 b"Content-Length: %d\r\n\r\n" % len(pdf) + pdf)
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = next(int(line.split(b":")[1]) for line in head.split(b"\r\n") if line.lower().startswith(b"content-length"))
+    body = await reader.readexactly(length)
+    return int(head.split(b" ")[1]), body
+
+
+async def client(port, pdfs, requests, latencies, statuses):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for index in range(requests):
+        start = time.perf_counter()
+        status, _ = await post_pdf(reader, writer, pdfs[index % len(pdfs)])
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[status] = statuses.get(status, 0) + 1
+    writer.close()
+
+
+async def run(args, pdfs):
+    service = AdvisingService(PlanStore(tempfile.mkdtemp()), parse_workers=args.workers)
+    service.warm()
+    await service.start("127.0.0.1", 0)
+    port = service.server.sockets[0].getsockname()[1]
+    try:
+        # the first request of each plan scrapes it, it is reported on its own
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            status, body = await post_pdf(reader, writer, pdfs[0])
+        writer.close()
+        if status != 200:
+            raise SystemExit(f"first request failed with {status}: {body.decode()}")
+        print(f"cold request (scrape + parse): {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+        latencies, statuses = [], {}
+        start = time.perf_counter()
+        await asyncio.gather(*[client(port, pdfs, args.requests, latencies, statuses) for _ in range(args.clients)])
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        print(f"{len(latencies)} requests from {args.clients} clients in {elapsed:.2f} s "
+              f"({len(latencies) / elapsed:.1f} req/s), statuses {statuses}")
+        print(f"latency ms  p50 {percentile(latencies, 0.50):8.1f}  p90 {percentile(latencies, 0.90):8.1f}  "
+              f"p99 {percentile(latencies, 0.99):8.1f}  max {latencies[-1]:8.1f}")
+        print("service stats:", json.dumps(service.stats()["counters"]))
+    finally:
+        service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pdf", action="append", required=True, help="transcript PDF to upload (repeatable)")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=20, help="requests per client")
+    parser.add_argument("--workers", type=int, default=None, help="PDF parsing processes of the service")
+    args = parser.parse_args()
+
+    pdfs = [open(path, "rb").read() for path in args.pdf]
+    # a synthetic catalog for every catalog year named by the transcripts, served in place of the network
+    pages = {}
+    for path in args.pdf:
+        header = extract_transcript_header(path)
+        school = header["school"]
+        major = header["major"].lower().replace(" ", "-")
+        year = header["program_start_date"].split("-")[0]
+        pages.update(build_catalog(year, plan_path=f"/undergraduate/programs/{school}/{major}"))
+    degree_scraper.set_transport(FixtureTransport(pages))
+    asyncio.run(run(args, pdfs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# cold start of the evaluate-only path: main.py --transcript-json against a stored plan, in a fresh interpreter
+# every round, checked against a wall time budget and against loading any of the heavy dependencies
+# run from the repository root: python -m benchmarks.bench_cold_start [--budget-ms 250] [--rounds 10]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from plan_store import PlanStore
+from transcript_parser import parse_transcript_lines
+from benchmarks.catalog_fixtures import scrape_fixture_plan
+from benchmarks.transcript_fixtures import build_transcript_pages
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules the evaluate-only path must not import
+HEAVY_MODULES = ("pdfplumber", "pdfminer", "pypdfium2", "requests", "bs4", "lxml", "sqlite3")
+
+# wall time of one evaluate-only run, interpreter startup included
+DEFAULT_BUDGET_MS = 250
+
+# runs main.py in the current interpreter and prints the heavy modules it loaded as the last line
+LOADED_MODULES_SCRIPT = """
+import json, runpy, sys
+sys.argv = ["main.py"] + sys.argv[1:]
+runpy.run_path(%r, run_name="__main__")
+print(json.dumps(sorted(name for name in sys.modules if name.split(".")[0] in %r)))
+"""
+
+
+def run_seconds(command, cwd):
+    start = time.perf_counter()
+    subprocess.run(command, cwd=cwd, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # a stored plan and a parsed transcript of the same major and year, as left behind by an earlier main.py run
+        transcript = parse_transcript_lines(line for page in build_transcript_pages(pages=4) for line in page)
+        year = transcript["program_start_date"].split("-")[0]
+        plans = os.path.join(directory, "plans")
+        PlanStore(plans).save(transcript["school"], transcript["major"], year, scrape_fixture_plan(year))
+        transcript_path = os.path.join(directory, "transcript_data.json")
+        with open(transcript_path, "w") as transcript_file:
+            json.dump(transcript, transcript_file)
+
+        main_args = ["--transcript-json", transcript_path, "--plans", plans]
+        main_path = os.path.join(REPOSITORY, "main.py")
+        interpreter = [run_seconds([sys.executable, "-c", "pass"], directory) for _ in range(args.rounds)]
+        evaluate = [run_seconds([sys.executable, main_path, *main_args], directory) for _ in range(args.rounds)]
+
+        output = subprocess.run([sys.executable, "-c", LOADED_MODULES_SCRIPT % (main_path, HEAVY_MODULES), *main_args],
+                                cwd=directory, check=True, capture_output=True, text=True,
+                                env={**os.environ, "PYTHONPATH": REPOSITORY}).stdout
+        loaded = json.loads(output.strip().splitlines()[-1])
+
+    print(f"interpreter startup   median {statistics.median(interpreter) * 1000:7.1f} ms  best {min(interpreter) * 1000:7.1f} ms")
+    print(f"evaluate-only run     median {statistics.median(evaluate) * 1000:7.1f} ms  best {min(evaluate) * 1000:7.1f} ms  "
+          f"(budget {args.budget_ms:.0f} ms)")
+    print(f"heavy modules loaded: {', '.join(loaded) if loaded else 'none'}")
+
+    over_budget = statistics.median(evaluate) * 1000 > args.budget_ms
+    if over_budget:
+        print("FAIL: the evaluate-only run is over its cold start budget")
+    if loaded:
+        print("FAIL: the evaluate-only run imported heavy dependencies")
+    return 1 if over_budget or loaded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
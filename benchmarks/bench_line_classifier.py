@@ -0,0 +1,59 @@
+# per-line cost of the transcript line loop over a synthetic 20-page transcript
+# run from the repository root: python -m benchmarks.bench_line_classifier
+import argparse
+import re
+import timeit
+
+from transcript_parser import classify_line
+from benchmarks.transcript_fixtures import build_transcript_pages
+
+
+# the header/footer filter and course loop as they were before the line classifier, kept as the reference
+def reference_loop(pages):
+    count = 0
+    for i, page in enumerate(pages):
+        for line in page:
+            if re.match(r"^\d+\s+\d+.*$", line) or line.startswith("Unofficial Transcript - UT-Dallas"):
+                continue
+            if i > 0 and line.startswith("Name:"):
+                continue
+            line = line.strip()
+            if line in ("Transfer Credits", "Test Credits", "Beginning of Undergraduate Record"):
+                count += 1
+            elif re.match(r"^\d{4} (Fall|Spring|Summer)$", line):
+                count += 1
+                continue
+            course_line_pattern = r"^([A-Z]+\s+[\w\-]+)\s+(.+?)\s+([\d\.]+)\s+([\d\.]+)(?:\s+([A-Z\+\-]+))?"
+            if re.match(course_line_pattern, line):
+                count += 1
+    return count
+
+
+def classifier_loop(pages):
+    count = 0
+    for i, page in enumerate(pages):
+        for line in page:
+            kind, _ = classify_line(line, i)
+            if kind in ("section", "semester", "course"):
+                count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    pages = build_transcript_pages(pages=args.pages)
+    line_count = sum(len(page) for page in pages)
+    assert reference_loop(pages) == classifier_loop(pages), "classifier disagrees with the reference loop"
+
+    for label, loop in (("reference", reference_loop), ("classifier", classifier_loop)):
+        best = min(timeit.repeat(lambda: loop(pages), number=1, repeat=args.repeat))
+        print(f"{label:<11} {best * 1000:7.3f} ms per transcript  {best / line_count * 1e9:7.0f} ns per line "
+              f"({line_count} lines, {args.pages} pages)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# parse time and peak memory of the degree plan and course page extraction, full parse vs the strained one-pass parse
+# run from the repository root: python -m benchmarks.bench_page_parsing [--plan-html saved.html] [--course-html saved.html ...]
+import argparse
+import re
+import timeit
+import tracemalloc
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+import degree_scraper
+from benchmarks.catalog_fixtures import build_catalog
+
+
+# the three sibling walks over a fully parsed page as they were before parse_degree_page, kept as the reference
+def reference_degree_page(html):
+    soup = BeautifulSoup(html, "html.parser")
+    core, major = {}, {}
+    anchor = soup.find("p", id="degree-requirements")
+    if anchor:
+        category = ""
+        for sibling in anchor.find_next_siblings():
+            if sibling.name == "p" and "cat-reqg" in sibling.get("class", []):
+                category = sibling.get_text(strip=True)
+                core[category] = []
+            elif sibling.name == "p" and "cat-reqi" in sibling.get("class", []):
+                core[category].append(sibling.get_text(strip=True))
+            elif sibling.name == "p" and "cat-reqa" in sibling.get("class", []):
+                break
+    anchor = soup.find("p", string=re.compile(r"II\. Major Requirements"))
+    if anchor:
+        for sibling in anchor.find_next_siblings():
+            if sibling.name == "p" and "cat-reqg" in sibling.get("class", []):
+                category = sibling.get_text(strip=True)
+                major[category] = []
+            elif sibling.name == "p" and "cat-reqi" in sibling.get("class", []):
+                major[category].append(sibling.get_text(strip=True))
+            elif sibling.name == "p" and "cat-reqa" in sibling.get("class", []):
+                break
+    soup.find("p", string=re.compile(r"Elective Requirements"))
+    return core, major
+
+
+def reference_course_page(html):
+    return BeautifulSoup(html, "html.parser").find("div", id="bukku-page").find("p").get_text(" ", strip=True)
+
+
+def strained_course_page(html, parser):
+    soup = BeautifulSoup(html, parser, parse_only=SoupStrainer("div", id="bukku-page"))
+    return soup.find("div", id="bukku-page").find("p").get_text(" ", strip=True)
+
+
+def strained_degree_page(html, parser):
+    degree_scraper.HTML_PARSER = parser
+    return degree_scraper.parse_degree_page(html)
+
+
+def measure(label, function, documents, repeat):
+    best = min(timeit.repeat(lambda: [function(document) for document in documents], number=1, repeat=repeat))
+    tracemalloc.start()
+    for document in documents:
+        function(document)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<42} {best / len(documents) * 1000:8.3f} ms per page  peak {peak / 1024:8.1f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--plan-html", help="saved degree plan page to use instead of the synthetic one")
+    parser.add_argument("--course-html", nargs="*", default=[], help="saved course pages to use instead of the synthetic ones")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = build_catalog("2024", courses_per_core_section=20)
+    plan_pages = [open(args.plan_html, encoding="utf-8").read()] if args.plan_html else [
+        pages["/2024/undergraduate/programs/ecs/computer-science"]]
+    course_pages = [open(path, encoding="utf-8").read() for path in args.course_html] or [
+        html for path, html in pages.items() if "/courses/" in path]
+
+    parsers = ["html.parser"] + (["lxml"] if degree_scraper.HTML_PARSER == "lxml" else [])
+    print(f"degree plan page ({len(plan_pages[0]) // 1024} KiB)")
+    measure("full parse + sibling walks (html.parser)", reference_degree_page, plan_pages, args.repeat)
+    for name in parsers:
+        measure(f"parse_degree_page ({name})", lambda html: strained_degree_page(html, name), plan_pages, args.repeat)
+
+    print(f"course pages ({len(course_pages)} pages)")
+    measure("full parse (html.parser)", reference_course_page, course_pages, args.repeat)
+    for name in parsers:
+        measure(f"strained parse ({name})", lambda html: strained_course_page(html, name), course_pages, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
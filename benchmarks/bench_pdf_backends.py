@@ -0,0 +1,66 @@
+# compares the PDF text extraction backends on a corpus of synthetic transcripts laid out like the real one (course
+# rows in columns), checks every backend parses each transcript exactly like pdfplumber and reports the time per page
+# run from the repository root: python -m benchmarks.bench_pdf_backends [--count 20] [--pdfs DIR]
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+import pdf_text
+from transcript_parser import extract_transcript_data
+from benchmarks.transcript_pdf import write_transcript_pdf
+
+# page counts cycled through by the corpus, most transcripts are a few pages and a few run long
+CORPUS_PAGES = (2, 3, 4, 4, 6, 10, 20)
+
+
+def write_corpus(directory, count):
+    return [write_transcript_pdf(os.path.join(directory, f"transcript-{seed:04d}.pdf"), seed=seed, columns=True,
+                                 pages=CORPUS_PAGES[seed % len(CORPUS_PAGES)], transfer_courses=seed % 8,
+                                 test_courses=seed % 5)
+            for seed in range(count)]
+
+
+def page_count(path):
+    return sum(1 for _ in pdf_text.iter_page_texts(path, pdf_text.PDFMINER))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=20, help="synthetic transcripts in the corpus")
+    parser.add_argument("--pdfs", help="directory of real transcript PDFs to use instead of the synthetic corpus")
+    args = parser.parse_args()
+
+    # pdfplumber first, the speedups are relative to it
+    backends = [backend for backend in (pdf_text.PDFPLUMBER, pdf_text.PDFMINER, pdf_text.PYPDFIUM2)
+                if pdf_text.installed(backend)] + [pdf_text.AUTO]
+    with tempfile.TemporaryDirectory() as directory:
+        paths = sorted(glob.glob(os.path.join(args.pdfs, "*.pdf"))) if args.pdfs else write_corpus(directory, args.count)
+        pages = sum(page_count(path) for path in paths)
+        expected = {path: extract_transcript_data(path, backend=pdf_text.PDFPLUMBER) for path in paths}
+
+        mismatches = 0
+        baseline = None
+        print(f"{len(paths)} transcripts, {pages} pages")
+        for backend in backends:
+            used = {}
+            seconds = 0.0
+            for path in paths:
+                report = {}
+                start = time.perf_counter()
+                transcript = extract_transcript_data(path, backend=backend, report=report)
+                seconds += time.perf_counter() - start
+                used[report["backend"]] = used.get(report["backend"], 0) + 1
+                if transcript != expected[path]:
+                    mismatches += 1
+                    print(f"  {backend}: {os.path.basename(path)} differs from pdfplumber")
+            baseline = baseline or seconds
+            print(f"{backend:<11} {seconds * 1000:9.1f} ms  {seconds / pages * 1000:7.2f} ms per page  "
+                  f"{baseline / seconds:6.1f}x  used {', '.join(f'{name} x{n}' for name, n in sorted(used.items()))}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
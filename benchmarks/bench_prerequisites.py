@@ -0,0 +1,77 @@
+# compares the string-set prerequisite check with the bitset engine of CompiledDegreePlan
+# run from the repository root: python -m benchmarks.bench_prerequisites
+import argparse
+import random
+import timeit
+
+from degree_plan_evaluator import DegreePlanEvaluator, compile_degree_plan
+from benchmarks.catalog_fixtures import scrape_fixture_plan
+
+
+# prerequisites_satisfied and recommend_courses as they were before the bitset engine, kept as the reference
+def reference_prerequisites_satisfied(course_graph, completed_courses, course_code):
+    if course_code not in course_graph:
+        return True
+    for group in course_graph[course_code].get('prerequisites', []):
+        if not any(prereq in completed_courses for prereq in group):
+            return False
+    return True
+
+
+def reference_recommend_courses(evaluator):
+    recommended_courses = []
+    category_completion = evaluator.calculate_category_completion()
+    for _, category, codes in evaluator.categories:
+        if category_completion.get(category, {}).get('remaining', 0) > 0:
+            for course_code in codes:
+                if course_code not in evaluator.completed_courses and reference_prerequisites_satisfied(
+                        evaluator.course_graph, evaluator.completed_courses, course_code):
+                    recommended_courses.append(course_code)
+    return recommended_courses
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=500)
+    args = parser.parse_args()
+
+    plan = compile_degree_plan(scrape_fixture_plan())
+    codes = list(plan.course_graph)
+    rng = random.Random(0)
+    evaluators = [
+        DegreePlanEvaluator(plan, {"courses": {"transfer_credits": [{"course_code": code} for code in
+                                                                    rng.sample(codes, rng.randint(0, len(codes)))]}})
+        for _ in range(args.students)
+    ]
+
+    # both engines must give the same answers before they are timed
+    for evaluator in evaluators:
+        for code in codes:
+            assert evaluator.prerequisites_satisfied(code) == reference_prerequisites_satisfied(
+                evaluator.course_graph, evaluator.completed_courses, code)
+        assert evaluator.recommend_courses() == reference_recommend_courses(evaluator)
+        satisfied = plan.satisfied_mask(evaluator.completed_mask)
+        assert [code for code in codes if satisfied & plan.course_masks[code]] == [
+            code for code in codes
+            if reference_prerequisites_satisfied(evaluator.course_graph, evaluator.completed_courses, code)]
+
+    def every_check(check):
+        for evaluator in evaluators:
+            for code in codes:
+                check(evaluator, code)
+
+    runs = {
+        "prerequisites_satisfied (string sets)": lambda: every_check(
+            lambda e, code: reference_prerequisites_satisfied(e.course_graph, e.completed_courses, code)),
+        "prerequisites_satisfied (bitsets)": lambda: every_check(lambda e, code: e.prerequisites_satisfied(code)),
+        "recommend_courses (string sets)": lambda: [reference_recommend_courses(e) for e in evaluators],
+        "recommend_courses (bitsets)": lambda: [e.recommend_courses() for e in evaluators],
+        "satisfied_mask, whole plan (bitsets)": lambda: [plan.satisfied_mask(e.completed_mask) for e in evaluators],
+    }
+    for label, run in runs.items():
+        best = min(timeit.repeat(run, number=1, repeat=5))
+        print(f"{label:<40} {best * 1000:8.2f} ms for {args.students} students x {len(codes)} courses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# memory held by many parsed transcripts and degree plans as dicts vs as the slotted records of records.py
+# run from the repository root: python -m benchmarks.bench_records [--transcripts 2000] [--plans 20]
+import argparse
+import gc
+import json
+import timeit
+import tracemalloc
+
+from degree_plan_evaluator import evaluate_many
+from records import categories_from_plan, transcript_from_dict
+from transcript_parser import parse_transcript_lines
+from benchmarks.catalog_fixtures import scrape_fixture_plan
+from benchmarks.transcript_fixtures import build_transcript_pages
+
+
+# builds the objects returned by build() and returns the bytes they still hold once built
+def held_memory(build):
+    gc.collect()
+    tracemalloc.start()
+    objects = build()
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return objects, held
+
+
+def report(label, count, unit, dict_bytes, record_bytes):
+    print(f"{label:<12} dicts {dict_bytes / 1024 / 1024:7.2f} MiB  records {record_bytes / 1024 / 1024:7.2f} MiB  "
+          f"({dict_bytes / count:7.0f} -> {record_bytes / count:7.0f} bytes per {unit}, "
+          f"{100 * (1 - record_bytes / dict_bytes):4.1f}% less)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transcripts", type=int, default=2000)
+    parser.add_argument("--pages", type=int, default=3, help="pages per synthetic transcript")
+    parser.add_argument("--plans", type=int, default=20)
+    args = parser.parse_args()
+
+    # the JSON text is what a service holding many transcripts would load them from
+    texts = [json.dumps(parse_transcript_lines(line for page in build_transcript_pages(pages=args.pages, seed=seed)
+                                               for line in page))
+             for seed in range(args.transcripts)]
+    dict_transcripts, dict_bytes = held_memory(lambda: [json.loads(text) for text in texts])
+    record_transcripts, record_bytes = held_memory(lambda: [transcript_from_dict(json.loads(text)) for text in texts])
+    report("transcripts", len(texts), "transcript", dict_bytes, record_bytes)
+
+    plan_text = json.dumps(scrape_fixture_plan(courses_per_core_section=20))
+    dict_plans, dict_bytes = held_memory(lambda: [json.loads(plan_text) for _ in range(args.plans)])
+    record_plans, record_bytes = held_memory(lambda: [categories_from_plan(json.loads(plan_text)) for _ in range(args.plans)])
+    report("plans", args.plans, "plan", dict_bytes, record_bytes)
+
+    # the evaluator reads both shapes, the records must not make evaluation slower
+    plan = dict_plans[0]
+    for label, transcripts in (("dicts", dict_transcripts), ("records", record_transcripts)):
+        best = min(timeit.repeat(lambda: evaluate_many(plan, transcripts), number=1, repeat=3))
+        print(f"evaluate_many over {len(transcripts)} transcripts ({label}): {best * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
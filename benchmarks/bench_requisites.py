@@ -0,0 +1,149 @@
+# compiles the requisite text of every course description of a catalog corpus with the expression engine of
+# requisites.py and compares it with the scraper's old re.split tokenizer: parse time, cached compile time, the
+# texts whose CNF groups leave part of the requirement unchecked and the texts where the two disagree
+# run from the repository root: python -m benchmarks.bench_requisites [--cache ~/.cache/.../catalog.sqlite3]
+#   without --cache the corpus is synthetic, with it every course page of the catalog cache is used
+import argparse
+import random
+import re
+import sqlite3
+import time
+
+import degree_scraper
+import requisites
+from benchmarks.catalog_fixtures import build_catalog
+
+# requisite phrasings of the catalog, filled with random course codes for the synthetic corpus ({5} is a bare
+# course number continuing the subject before it)
+TEMPLATES = (
+    "{0}",
+    "{0} or {1}",
+    "{0} and {1}",
+    "({0} or {1}) and {2}",
+    "({0} or {1}) and {2} with a grade of C or better",
+    "{0} or ({1} and {2})",
+    "{0}, {1}, and {2}",
+    "{0}, {1}, or {2}",
+    "{0} with a grade of B- or better and ({1} or {2} or {3})",
+    "{0} or {1} or equivalent",
+    "{0} and junior standing",
+    "{0} or instructor consent",
+    "(({0} or {1}) and ({2} or {3})) or {4}",
+    "{0} and {1}; {2}",
+    "{0} or {5}",
+    "{0}, {5}, and {1}",
+    "{0} and {1}, or {2}",
+    "{0} or any 3000-level {6} course",
+    "{0} and 6 semester credit hours of {6} coursework",
+    "Department consent required",
+)
+
+
+# the scraper's tokenizer before the expression engine, kept as the reference
+def legacy_parse_courses_from_text(text):
+    course_groups = []
+    current_group = []
+    course_pattern = re.compile(r"([A-Z]+\s+\d+)")
+    for token in re.split(r'(\s+or\s+|\s+and\s+)', text):
+        token = token.strip()
+        course_match = course_pattern.findall(token)
+        if course_match:
+            current_group.extend(course_match)
+        if 'and' in token.lower():
+            if current_group:
+                course_groups.append(current_group)
+                current_group = []
+        elif 'or' in token.lower():
+            continue
+    if current_group:
+        course_groups.append(current_group)
+    return [[course.replace(".", "") for course in group] for group in course_groups]
+
+
+def synthetic_corpus(count, seed=0):
+    rng = random.Random(seed)
+    prefixes = ("CS", "MATH", "PHYS", "SE", "CE", "EE", "ECS", "STAT")
+    codes = [f"{prefix} {number}" for prefix in prefixes for number in range(1100, 4400, 37)]
+    texts = []
+    # the fixture catalog's own descriptions first, then template texts
+    for year in ("2022", "2023", "2024"):
+        for path, html in build_catalog(year, seed=int(year)).items():
+            if "/courses/" in path:
+                texts.extend(course_page_texts(html))
+    while len(texts) < count:
+        texts.append(rng.choice(TEMPLATES).format(*rng.sample(codes, 5), rng.randint(1100, 4399), rng.choice(prefixes)))
+    return texts[:count]
+
+
+# function to return the prerequisite and corequisite texts of a course page
+def course_page_texts(html):
+    match = re.search(r'<div id="bukku-page".*?<p>(.*?)</p>', html, re.S)
+    if not match:
+        return []
+    description = re.sub(r"<[^>]+>", " ", match.group(1))
+    texts = (extract(description) for extract in (degree_scraper.extract_prerequisite_text,
+                                                   degree_scraper.extract_corequisite_text))
+    return [text for text in texts if text]
+
+
+# function to read the requisite texts of every course page in a catalog cache database
+def cached_catalog_corpus(path):
+    connection = sqlite3.connect(path)
+    try:
+        rows = connection.execute("SELECT body FROM pages WHERE url LIKE '%/courses/%'").fetchall()
+    finally:
+        connection.close()
+    return [text for (body,) in rows for text in course_page_texts(bytes(body).decode("utf-8", "replace"))]
+
+
+def seconds_of(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=20000, help="texts in the synthetic corpus")
+    parser.add_argument("--cache", help="catalog cache database to read the course pages from")
+    args = parser.parse_args()
+
+    texts = cached_catalog_corpus(args.cache) if args.cache else synthetic_corpus(args.count)
+    print(f"{len(texts)} requisite texts, {len(set(texts))} distinct")
+
+    legacy = seconds_of(lambda: [legacy_parse_courses_from_text(text) for text in texts])
+    parse = seconds_of(lambda: [requisites.parse_requisite(text) for text in texts])
+    requisites.clear_compile_cache()
+    compile_cold = seconds_of(lambda: [requisites.compile_requisite(text) for text in texts])
+    compile_warm = seconds_of(lambda: [requisites.compile_requisite(text) for text in texts])
+    print(f"legacy tokenizer        {legacy * 1000:9.1f} ms  {legacy / len(texts) * 1e6:7.2f} us per text")
+    print(f"expression parse        {parse * 1000:9.1f} ms  {parse / len(texts) * 1e6:7.2f} us per text")
+    print(f"compile, cold cache     {compile_cold * 1000:9.1f} ms  {compile_cold / len(texts) * 1e6:7.2f} us per text")
+    print(f"compile, warm cache     {compile_warm * 1000:9.1f} ms  {compile_warm / len(texts) * 1e6:7.2f} us per text  "
+          f"({requisites.compile_cache_info().currsize} cached)")
+
+    expressions = [requisites.compile_requisite(text) for text in texts]
+    groups = [legacy_parse_courses_from_text(text) for text in texts]
+    cnf = seconds_of(lambda: [expression.to_cnf() for expression in expressions])
+    print(f"CNF groups              {cnf * 1000:9.1f} ms  {cnf / len(texts) * 1e6:7.2f} us per text")
+
+    # the parts of the requirements the CNF groups of the plans cannot hold (conditions, minimum grades)
+    unchecked = {expression.text: expression.unchecked() for expression in expressions if expression.unchecked()}
+    print(f"{len(unchecked)} distinct texts have parts left out of their CNF groups, i.e.:")
+    for text, parts in list(unchecked.items())[:3]:
+        print(f"  {text!r}\n    unchecked {parts}")
+
+    # the legacy tokenizer lost the nesting, read level numbers as courses and required the course of an "or" with
+    # a condition
+    differing = {}
+    for text, expression, legacy_groups in zip(texts, expressions, groups):
+        cnf_groups = expression.to_cnf()
+        if cnf_groups != legacy_groups:
+            differing.setdefault(text, (legacy_groups, cnf_groups))
+    print(f"{len(differing)} distinct texts get other groups than the legacy tokenizer, i.e.:")
+    for text, (legacy_groups, cnf_groups) in list(differing.items())[:5]:
+        print(f"  {text!r}\n    legacy {legacy_groups}\n    now    {cnf_groups}")
+
+
+if __name__ == "__main__":
+    main()
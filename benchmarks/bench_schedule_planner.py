@@ -0,0 +1,63 @@
+# term-by-term plans of the fixture degree plan for many students: planner construction, a first plan per
+# completed course set and a cached re-plan, every plan checked for prerequisite order and the credit hour cap
+# run from the repository root: python -m benchmarks.bench_schedule_planner [--students 200]
+import argparse
+import random
+import time
+
+from degree_plan_evaluator import compile_degree_plan
+from schedule_planner import DEFAULT_MAX_CREDITS_PER_TERM, SchedulePlanner
+from benchmarks.catalog_fixtures import scrape_fixture_plan
+
+
+# function to check a plan: every course comes after its prerequisites (or they were completed before) and no
+# term goes over the cap unless it holds a single course
+def check_plan(plan, schedule, completed, max_credits):
+    done = set(completed)
+    for term in schedule['terms']:
+        assert term['credit_hours'] <= max_credits or len(term['courses']) == 1, term
+        for code in term['courses']:
+            for group in plan.course_graph[code].prerequisites:
+                assert any(member in done for member in group), (code, group)
+        done.update(term['courses'])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--max-credits", type=int, default=DEFAULT_MAX_CREDITS_PER_TERM)
+    args = parser.parse_args()
+
+    plan = compile_degree_plan(scrape_fixture_plan())
+    required = sum(plan.category_required_hours[name] for name in plan.category_index)
+
+    start = time.perf_counter()
+    planner = SchedulePlanner(plan)
+    build = time.perf_counter() - start
+
+    codes = list(plan.course_graph)
+    rng = random.Random(0)
+    # from a new student to one close to graduating
+    students = [rng.sample(codes, rng.randint(0, len(codes) * 2 // 3)) for _ in range(args.students)]
+
+    start = time.perf_counter()
+    schedules = [planner.plan_terms(completed, args.max_credits) for completed in students]
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    for completed in students:
+        planner.plan_terms(completed, args.max_credits)
+    cached = time.perf_counter() - start
+
+    for completed, schedule in zip(students, schedules):
+        check_plan(plan, schedule, completed, args.max_credits)
+
+    new_student = planner.plan_terms([], args.max_credits)
+    print(f"{len(codes)} plan courses, {required} required hours, planner built in {build * 1000:.2f} ms")
+    print(f"first plan        {first / len(students) * 1000:8.3f} ms per student")
+    print(f"cached re-plan    {cached / len(students) * 1e6:8.2f} us per student")
+    print(f"new student: {len(new_student['terms'])} terms, {len(new_student['unscheduled'])} unscheduled courses, "
+          f"uncovered hours {new_student['uncovered_hours'] or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# compares serial and concurrent course page fetching in scrape_degree_plan against a local stub catalog
+# run from the repository root: python -m benchmarks.bench_scrape_concurrency
+import argparse
+import contextlib
+import io
+import time
+
+import degree_scraper
+from catalog_transport import HttpTransport
+from benchmarks.catalog_fixtures import CatalogStubServer, build_catalog
+
+
+def time_scrape(base_url, year, max_workers):
+    degree_scraper.CATALOG_BASE_URL = base_url
+    url = f"{base_url}/{year}/undergraduate/programs/ecs/computer-science"
+
+    # the scraper prints one line per course, keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        start_time = time.perf_counter()
+        plan = degree_scraper.scrape_degree_plan(url, year, max_workers=max_workers)
+        elapsed = time.perf_counter() - start_time
+    return plan, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.03, help="simulated per-request latency in seconds")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    year = "2024"
+    pages = build_catalog(year)
+    # the stub server is local, so the transport's rate limit is lifted to measure the fetch stage alone
+    degree_scraper.set_transport(HttpTransport(requests_per_second=None, pool_size=max(args.workers)))
+    with CatalogStubServer(pages, latency=args.latency) as server:
+        baseline_plan, baseline_time = None, None
+        for workers in args.workers:
+            server.request_count = 0
+            plan, elapsed = time_scrape(server.base_url, year, workers)
+            if baseline_plan is None:
+                baseline_plan, baseline_time = plan, elapsed
+            assert plan == baseline_plan, "concurrent scrape returned a different degree plan"
+            print(f"max_workers={workers:<3} {elapsed:6.2f}s  requests={server.request_count:<4} "
+                  f"speedup={baseline_time / elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# what-if completion of many transcripts against every major of a catalog year: a DegreePlanEvaluator per
+# (transcript, major) against one pass of the WhatIfIndex, the plans are synthetic variations of the fixture plan
+# written to a temporary plan store
+# run from the repository root: python -m benchmarks.bench_what_if [--students 200]
+import argparse
+import random
+import tempfile
+import time
+
+from degree_plan_evaluator import DegreePlanEvaluator
+from plan_store import PlanStore
+from transcript_parser import school_mapping
+from what_if import WhatIfIndex
+from benchmarks.catalog_fixtures import scrape_fixture_plan
+
+PREFIXES = ("CS", "SE", "CE", "EE", "MECH", "BMEN", "FIN", "ACCT", "MIS", "MKT", "HIST", "PHIL", "ED", "AMS",
+            "BIOL", "CHEM", "BCHM", "PHYS")
+
+
+# function to derive a plan per major from the fixture plan: the core is shared, the major categories use the
+# major's own prefix and borrow a few courses of the neighbouring majors
+def synthetic_plans(year):
+    base = scrape_fixture_plan(year)
+    plans = {}
+    for number, (major, school) in enumerate(school_mapping.items()):
+        rng = random.Random(number)
+        prefix = PREFIXES[number % len(PREFIXES)]
+        neighbour = PREFIXES[(number + 1) % len(PREFIXES)]
+        major_requirements = {}
+        for category, entries in base['major_requirements'].items():
+            renamed = []
+            for entry in entries:
+                code_prefix = neighbour if rng.random() < 0.2 else prefix
+                renamed.append(dict(entry, course_info=code_prefix + " " + entry['course_info'].split()[1]))
+            major_requirements[category] = renamed
+        plans[(school, major)] = {'core_requirements': base['core_requirements'],
+                                  'major_requirements': major_requirements,
+                                  'elective_requirements': base['elective_requirements']}
+    return plans
+
+
+def evaluator_what_if(plans, completed):
+    # the completion of every major the way main.py would get it, one evaluator per plan
+    transcript = {"courses": {"transfer_credits": [{"course_code": code} for code in completed]}}
+    results = {}
+    for (school, major, year), plan in plans:
+        category_completion = DegreePlanEvaluator(plan, transcript).calculate_category_completion()
+        results[major] = sum(min(entry['completed'], entry['total_required']) for entry in category_completion.values())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--year", default="2024")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        store = PlanStore(root)
+        for (school, major), degree_plan in synthetic_plans(args.year).items():
+            store.save(school, major, args.year, degree_plan)
+
+        start = time.perf_counter()
+        index = WhatIfIndex.from_store(PlanStore(root), args.year)
+        build = time.perf_counter() - start
+        plans = [(key, store.load(key[0], key[1], key[2])) for key in index.plans]
+
+    codes = sorted(index.postings)
+    rng = random.Random(0)
+    students = [rng.sample(codes, rng.randint(0, len(codes) // 3)) for _ in range(args.students)]
+
+    # both must give the same completed hours for every major before they are timed
+    for completed in students[:20]:
+        expected = evaluator_what_if(plans, completed)
+        assert {result['major']: result['completed_hours'] for result in index.evaluate(completed)} == expected
+
+    start = time.perf_counter()
+    for completed in students:
+        evaluator_what_if(plans, completed)
+    evaluators = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for completed in students:
+        index.evaluate(completed)
+    indexed = time.perf_counter() - start
+
+    print(f"{len(index.plans)} plans, {len(index.category_plans)} categories, {len(index.postings)} indexed courses, "
+          f"index loaded and built in {build * 1000:.1f} ms")
+    print(f"evaluator per major   {evaluators / len(students) * 1000:8.3f} ms per transcript")
+    print(f"what-if index         {indexed / len(students) * 1000:8.3f} ms per transcript  "
+          f"({evaluators / indexed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# synthetic catalog pages shaped like the UTD catalog, used by the benchmarks instead of the live site
+
+CORE_SECTIONS = [
+    ("core-010", "Communication: 6 semester credit hours", "RHET"),
+    ("core-020", "Mathematics: 3 semester credit hours", "MATH"),
+    ("core-030", "Life and Physical Sciences: 6 semester credit hours", "PHYS"),
+    ("core-040", "Language, Philosophy and Culture: 3 semester credit hours", "PHIL"),
+    ("core-050", "Creative Arts: 3 semester credit hours", "ARTS"),
+    ("core-060", "American History: 6 semester credit hours", "HIST"),
+    ("core-070", "Government/Political Science: 6 semester credit hours", "GOVT"),
+    ("core-080", "Social and Behavioral Sciences: 3 semester credit hours", "PSY"),
+]
+COMPONENT_AREA = ("core-090", "Component Area Option: 6 semester credit hours", "ECS")
+
+MAJOR_CATEGORIES = [
+    ("Major Preparatory Courses: 24 semester credit hours beyond Core Curriculum", "CS", 1100, 12),
+    ("Major Core Courses: 30 semester credit hours", "CS", 3300, 14),
+    ("Major Guided Electives: 18 semester credit hours", "CS", 4300, 16),
+]
+
+
+# navigation, search and footer markup that wraps every real catalog page, most of the bytes of a page
+def page_chrome(year, links=300):
+    navigation = "".join(f'<li class="nav-item"><a href="/{year}/undergraduate/programs/x/program-{n}">Program {n}</a></li>'
+                         for n in range(links))
+    header = (f'<head><title>UT Dallas {year} Undergraduate Catalog</title><script>var catalog = "{year}";</script>'
+              '<link rel="stylesheet" href="/css/catalog.css"></head>'
+              f'<body><div id="header"><form id="search"><input type="text" name="q"></form><ul id="nav">{navigation}</ul></div>')
+    footer = ('<div id="footer"><p class="footer">The University of Texas at Dallas, 800 W. Campbell Road, Richardson, TX</p>'
+              '<p class="footer">Catalog content is subject to change.</p></div></body>')
+    return header, footer
+
+
+# builds the pages of one synthetic catalog year, returns a dict of path -> html
+def build_catalog(year, plan_path="/undergraduate/programs/ecs/computer-science", courses_per_core_section=6, seed=0):
+    rng = random.Random(seed)
+    pages = {}
+    known_codes = []
+    header, footer = page_chrome(year)
+
+    core_page = [f'<html>{header}<div id="bukku-page">']
+    plan_page = [f'<html>{header}<div id="bukku-page">', '<p class="cat-reqa">I. Core Curriculum Requirements: 42 semester credit hours</p>',
+                 '<p id="degree-requirements">Degree Requirements</p>']
+
+    for section_id, title, prefix in CORE_SECTIONS + [COMPONENT_AREA]:
+        plan_page.append(f'<p class="cat-reqg">{title}</p>')
+        plan_page.append(f'<p class="cat-reqi"><a href="/{year}/undergraduate/curriculum/core-curriculum#{section_id}">'
+                         f'Select courses from the core curriculum</a></p>')
+
+        core_page.append(f'<h3 id="{section_id}">{title}</h3>')
+        for n in range(courses_per_core_section):
+            code = f"{prefix} {1300 + n * 3}"
+            known_codes.append(code)
+            # roughly a third of the core courses also count towards the 090 Component Area Option
+            asterisk = ' <a href="#090-component-area">*</a>' if section_id != "core-090" and n % 3 == 0 else ""
+            core_page.append(f'<p class="cat-reqi"><a href="/{year}/undergraduate/courses/{code.replace(" ", "").lower()}">'
+                             f'{code}</a> Course {n}{asterisk}</p>')
+
+    plan_page.append('<p class="cat-reqa">II. Major Requirements: 72 semester credit hours</p>')
+    for title, prefix, start, count in MAJOR_CATEGORIES:
+        plan_page.append(f'<p class="cat-reqg">{title}</p>')
+        for n in range(count):
+            code = f"{prefix} {start + n * 3 + 7}"
+            known_codes.append(code)
+            plan_page.append(f'<p class="cat-reqi"><a href="/{year}/undergraduate/courses/{code.replace(" ", "").lower()}">'
+                             f'{code}</a> Major Course {n}</p>')
+    plan_page.append('<p class="cat-reqa">III. Elective Requirements: 12 semester credit hours</p>')
+    plan_page.append(f'</div>{footer}</html>')
+    core_page.append(f'<h3 id="end">End</h3></div>{footer}</html>')
+
+    pages[f"/{year}{plan_path}"] = "\n".join(plan_page)
+    pages[f"/{year}/undergraduate/curriculum/core-curriculum"] = "\n".join(core_page)
+
+    for index, code in enumerate(known_codes):
+        earlier = known_codes[:index]
+        description = f"{code} Synthetic Course (3 semester credit hours) A synthetic course used for benchmarking."
+        if earlier and rng.random() < 0.6:
+            first, second, third = rng.sample(earlier, 3) if len(earlier) >= 3 else (earlier[0],) * 3
+            description += f" Prerequisites: ({first} or {second}) and {third} with a grade of C or better."
+        if earlier and rng.random() < 0.2:
+            description += f" Corequisite: {rng.choice(earlier)}."
+        description += " (3-0) S"
+        url_code = code.replace(" ", "").lower()
+        pages[f"/{year}/undergraduate/courses/{url_code}"] = (
+            f'<html>{header}<div id="bukku-page"><h1>{code}</h1><p>{description}</p></div>{footer}</html>'
+        )
+
+    return pages
+
+
+# serves a dict of path -> html on localhost, sleeping for latency seconds on every request to mimic the catalog server
+class CatalogStubServer:
+    def __init__(self, pages, latency=0.0):
+        self.pages = pages
+        self.latency = latency
+        self.request_count = 0
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    stub.request_count += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                body = stub.pages.get(self.path.split("#")[0])
+                if body is None:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# writes the pages to a directory laid out the way FixtureTransport reads it
+def write_catalog(pages, directory):
+    import os
+
+    for path, html in pages.items():
+        file_path = os.path.join(directory, *path.strip("/").split("/")) + ".html"
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w", encoding="utf-8") as file:
+            file.write(html)
+
+
+# scrapes a synthetic degree plan through the real scraper served by a FixtureTransport, returns the degree plan dict
+def scrape_fixture_plan(year="2024", **catalog_options):
+    import contextlib
+    import io
+    import degree_scraper
+    from catalog_transport import FixtureTransport
+
+    transport = degree_scraper.get_transport()
+    degree_scraper.set_transport(FixtureTransport(build_catalog(year, **catalog_options)))
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return degree_scraper.scrape_degree_plan(
+                f"{degree_scraper.CATALOG_BASE_URL}/{year}/undergraduate/programs/ecs/computer-science", year)
+    finally:
+        degree_scraper.set_transport(transport)
@@ -0,0 +1,190 @@
+# reproducible benchmark suite: times transcript parsing on synthetic PDFs, degree plan scraping against a local
+# fixture server and evaluation of many transcripts, records the results per commit and flags regressions
+# run from the repository root:
+#   python -m benchmarks.suite                       run, record and compare against the last recorded commit
+#   python -m benchmarks.suite --baseline 1a2b3c4    compare against a given commit of the history
+#   python -m benchmarks.suite --quick --check       fewer repeats, exit 1 on a regression (i.e. in CI)
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import degree_scraper
+from catalog_transport import HttpTransport
+from degree_plan_evaluator import compile_degree_plan, evaluate_many
+from transcript_parser import extract_transcript_data, parse_transcript_lines
+from benchmarks.catalog_fixtures import CatalogStubServer, build_catalog, scrape_fixture_plan
+from benchmarks.transcript_fixtures import build_transcript_pages
+from benchmarks.transcript_pdf import write_transcript_pdf
+
+DEFAULT_HISTORY = os.path.join(".benchmarks", "history.jsonl")
+
+# a case regresses when its time per unit grows by more than this fraction over the baseline
+DEFAULT_THRESHOLD = 0.25
+
+
+def best_of(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_transcript_parse(directory, repeat, pages, transfer_courses=6, test_courses=4, backend=None):
+    path = write_transcript_pdf(os.path.join(directory, f"transcript-{pages}p.pdf"), pages=pages,
+                                transfer_courses=transfer_courses, test_courses=test_courses)
+    return best_of(lambda: extract_transcript_data(path, backend=backend), repeat), pages, "page"
+
+
+def bench_scrape(repeat, latency):
+    pages = build_catalog("2024")
+    base_url, transport = degree_scraper.CATALOG_BASE_URL, degree_scraper.get_transport()
+    with CatalogStubServer(pages, latency=latency) as server:
+        degree_scraper.CATALOG_BASE_URL = server.base_url
+        degree_scraper.set_transport(HttpTransport(requests_per_second=None))
+        url = f"{server.base_url}/2024/undergraduate/programs/ecs/computer-science"
+        try:
+            # a fresh registry every round so every course page is fetched and parsed again
+            with contextlib.redirect_stdout(io.StringIO()):
+                seconds = best_of(lambda: degree_scraper.scrape_degree_plan(
+                    url, "2024", registry=degree_scraper.CourseRequisiteRegistry()), repeat)
+        finally:
+            degree_scraper.get_transport().close()
+            degree_scraper.CATALOG_BASE_URL = base_url
+            degree_scraper.set_transport(transport)
+    course_pages = sum(1 for path in pages if "/courses/" in path)
+    return seconds, course_pages, "course page"
+
+
+def bench_plan_compile(repeat, plan):
+    return best_of(lambda: [compile_degree_plan(plan) for _ in range(20)], repeat) / 20, 1, "plan"
+
+
+def bench_evaluate(repeat, plan, transcripts):
+    compiled = compile_degree_plan(plan)
+    return best_of(lambda: evaluate_many(compiled, transcripts), repeat), len(transcripts), "transcript"
+
+
+def run_cases(args):
+    repeat = 1 if args.quick else args.repeat
+    results = {}
+
+    def record(name, outcome):
+        seconds, units, unit = outcome
+        results[name] = {"seconds": seconds, "units": units, "unit": unit, "unit_seconds": seconds / units}
+        print(f"{name:<34} {seconds * 1000:10.2f} ms  {seconds / units * 1e6:12.1f} us per {unit}", file=sys.stderr)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for pages in (2, 10, 30):
+            record(f"transcript_parse[{pages} pages]", bench_transcript_parse(directory, repeat, pages))
+        record("transcript_parse[no transfer/test]", bench_transcript_parse(directory, repeat, 10, 0, 0))
+        # the fallback extractor, timed on its own since the cases above use the fast backend
+        record("transcript_parse[pdfplumber]", bench_transcript_parse(directory, repeat, 10, backend="pdfplumber"))
+
+    record("scrape_degree_plan[local stub]", bench_scrape(repeat, latency=0.0))
+
+    plan = scrape_fixture_plan(courses_per_core_section=20)
+    record("plan_compile", bench_plan_compile(repeat, plan))
+    count = 200 if args.quick else args.transcripts
+    transcripts = [parse_transcript_lines(line for page in build_transcript_pages(pages=4, seed=seed) for line in page)
+                   for seed in range(count)]
+    record("evaluate_many", bench_evaluate(repeat, plan, transcripts))
+    return results
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+# function to pick the history entry to compare with: the latest one of the given commit prefix, or with "last"
+# the latest entry of another commit (the latest entry at all when every entry is of the current commit)
+def find_baseline(history, baseline, commit):
+    if baseline == "last":
+        others = [entry for entry in history if entry.get("commit") != commit]
+        return (others or history or [None])[-1]
+    matches = [entry for entry in history if (entry.get("commit") or "").startswith(baseline)]
+    return matches[-1] if matches else None
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    print(f"\ncompared with {(baseline.get('commit') or '?')[:10]} ({baseline.get('timestamp')}), "
+          f"threshold +{threshold:.0%}", file=sys.stderr)
+    for name, result in results.items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            print(f"{name:<34} new", file=sys.stderr)
+            continue
+        change = result["unit_seconds"] / previous["unit_seconds"] - 1
+        flag = "REGRESSION" if change > threshold else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<34} {change:+8.1%}  {flag}", file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and compare with earlier commits.")
+    parser.add_argument("--repeat", type=int, default=3, help="rounds per case, the best round counts")
+    parser.add_argument("--transcripts", type=int, default=2000, help="transcripts evaluated by evaluate_many")
+    parser.add_argument("--quick", action="store_true", help="one round and fewer transcripts")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="JSONL file the results are recorded in")
+    parser.add_argument("--no-record", action="store_true", help="do not add this run to the history")
+    parser.add_argument("--baseline", default="last", help='commit (prefix) to compare with, or "last"')
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--check", action="store_true", help="exit with status 1 when a case regressed")
+    args = parser.parse_args()
+
+    commit, dirty = git_commit()
+    history = load_history(args.history)
+    results = run_cases(args)
+    entry = {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "quick": args.quick,
+        "results": results,
+    }
+
+    regressions = []
+    baseline = find_baseline(history, args.baseline, commit)
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+    else:
+        print(f"\nno baseline {args.baseline!r} in {args.history}", file=sys.stderr)
+
+    if not args.no_record:
+        os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+        with open(args.history, "a") as file:
+            file.write(json.dumps(entry) + "\n")
+    json.dump(entry, sys.stdout, indent=2)
+    print()
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+import random
+
+# synthetic transcript text shaped like the UTD unofficial transcript, used by the benchmarks instead of real student data
+
+SUBJECTS = ["CS", "SE", "MATH", "PHYS", "ECS", "RHET", "HIST", "GOVT", "ECON", "ATCM"]
+GRADES = ["A", "A-", "B+", "B", "B-", "C+", "C", "CR", "P", None]
+TERMS = ["Spring", "Summer", "Fall"]
+
+
+# builds the lines of each page of a synthetic transcript, including the repeated page headers and footers
+def build_transcript_pages(pages=20, lines_per_page=45, transfer_courses=6, test_courses=4, seed=0,
+                           name="Jane Doe", major="Computer Science"):
+    rng = random.Random(seed)
+    body = [
+        "Name: " + name,
+        f"Student ID: {rng.randint(2021000000, 2021999999)}",
+        "Program: Bachelor of Science",
+        f"{2020 + rng.randint(0, 3)}-08-20: Active in Program",
+        f"Plan: {major} Major",
+        "Transfer Credits",
+    ]
+    body += [course_line(rng) for _ in range(transfer_courses)]
+    body.append("Test Credits")
+    body += [course_line(rng, grade="CR") for _ in range(test_courses)]
+    body.append("Beginning of Undergraduate Record")
+
+    # keep adding semesters until the requested number of pages is filled
+    year, term = 2020, 2
+    target_lines = pages * (lines_per_page - 3)
+    while len(body) < target_lines:
+        body.append(f"{year} {TERMS[term]}")
+        body.append("Course Description Attempted Earned Grade Points")
+        for _ in range(rng.randint(3, 6)):
+            body.append(course_line(rng))
+        body.append(f"Term GPA: {rng.uniform(2.5, 4.0):.3f} Term Totals 15.000 15.000 45.000")
+        body.append(f"Cum GPA: {rng.uniform(2.5, 4.0):.3f} Cum Totals 60.000 60.000 180.000")
+        term += 1
+        if term == len(TERMS):
+            year, term = year + 1, 0
+    body = body[:target_lines]
+
+    chunk = lines_per_page - 3
+    result = []
+    for index in range(pages):
+        page = ["Unofficial Transcript - UT-Dallas"]
+        if index > 0:
+            page.append("Name: " + name)
+        page += body[index * chunk:(index + 1) * chunk]
+        page.append(f"{index + 1} {pages}")
+        result.append(page)
+    return result
+
+
+def course_line(rng, grade=""):
+    code = f"{rng.choice(SUBJECTS)} {rng.randint(1, 4)}{rng.randint(1, 3)}{rng.randint(0, 9)}{rng.randint(0, 9)}"
+    if grade == "":
+        grade = rng.choice(GRADES)
+    earned = "0.000" if grade is None else "3.000"
+    line = f"{code} Synthetic Course Title {rng.randint(1, 99)} 3.000 {earned}"
+    return line + (f" {grade} 12.000" if grade else "")
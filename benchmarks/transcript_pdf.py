@@ -0,0 +1,115 @@
+import os
+import re
+
+from benchmarks.transcript_fixtures import build_transcript_pages
+
+# writes synthetic transcript PDFs without a PDF library: every page is one text object in Helvetica with one
+# line per text row, which pdfplumber extracts back line by line like the real unofficial transcript
+#
+# with columns=True the course rows are laid out like the real transcript, every field (code, title, attempted,
+# earned, grade, points) is placed at its own column position, so extractors have to join the fields of a row
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+FONT_SIZE = 9
+LEADING = 11
+LEFT_MARGIN = 40
+
+# x positions of the course row fields in columns mode
+COURSE_COLUMNS = (40, 95, 330, 390, 450, 490)
+COURSE_ROW_PATTERN = re.compile(r"^([A-Z]+ [\w\-]+) (.+?) ([\d.]+) ([\d.]+)(?: (\S+) ([\d.]+))?$")
+
+
+def escape_text(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+# function to split a course row into (x, text) fields at the column positions, other lines are kept as they are
+def course_row_columns(line):
+    match = COURSE_ROW_PATTERN.match(line)
+    if not match:
+        return line
+    return [(x, text) for x, text in zip(COURSE_COLUMNS, match.groups()) if text is not None]
+
+
+# function to build the text operators of one page, a line is a string or a list of (x, text) fields
+def page_operators(lines):
+    rows = [f"BT /F1 {FONT_SIZE} Tf"]
+    for index, line in enumerate(lines):
+        y = PAGE_HEIGHT - 32 - index * LEADING
+        fields = [(LEFT_MARGIN, line)] if isinstance(line, str) else line
+        for x, text in fields:
+            rows.append(f"1 0 0 1 {x} {y} Tm ({escape_text(text)}) Tj")
+    rows.append("ET")
+    return rows
+
+
+# function to build the bytes of a PDF with one page per list of lines
+def build_pdf(pages_lines):
+    objects = []
+
+    def add(data):
+        objects.append(data)
+        return len(objects)
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    # every page is a content stream and a page object, the page tree comes right after them
+    pages_id = len(objects) + 2 * len(pages_lines) + 1
+    page_ids = []
+    for lines in pages_lines:
+        stream = "\n".join(page_operators(lines)).encode("latin-1")
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R "
+                            b"/Resources << /Font << /F1 %d 0 R >> >> >>"
+                            % (pages_id, PAGE_WIDTH, PAGE_HEIGHT, content_id, font_id)))
+    add(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % page_id for page_id in page_ids), len(page_ids)))
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, data in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + data + b"\nendobj\n"
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref_offset)
+    return bytes(output)
+
+
+# function to write a synthetic transcript PDF, the options are those of build_transcript_pages
+def write_transcript_pdf(path, pages=4, lines_per_page=45, transfer_courses=6, test_courses=4, seed=0, columns=False,
+                         **options):
+    if lines_per_page * LEADING > PAGE_HEIGHT - 40:
+        raise ValueError(f"at most {(PAGE_HEIGHT - 40) // LEADING} lines fit on a page")
+    pages_lines = build_transcript_pages(pages=pages, lines_per_page=lines_per_page, transfer_courses=transfer_courses,
+                                         test_courses=test_courses, seed=seed, **options)
+    if columns:
+        pages_lines = [[course_row_columns(line) for line in lines] for lines in pages_lines]
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(build_pdf(pages_lines))
+    return path
+
+
+# function to write count transcripts with different seeds to a directory, returns their paths
+def write_transcript_pdfs(directory, count, **options):
+    return [write_transcript_pdf(os.path.join(directory, f"transcript-{seed:04d}.pdf"), seed=seed, **options)
+            for seed in range(count)]
+
+
+# writes a few synthetic transcripts for manual runs of main.py, batch_parse.py or the advising service
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write synthetic transcript PDFs.")
+    parser.add_argument("directory")
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--transfer-courses", type=int, default=6)
+    parser.add_argument("--test-courses", type=int, default=4)
+    parser.add_argument("--columns", action="store_true", help="lay the course rows out in columns like the real transcript")
+    args = parser.parse_args()
+    paths = write_transcript_pdfs(args.directory, args.count, pages=args.pages, transfer_courses=args.transfer_courses,
+                                  test_courses=args.test_courses, columns=args.columns)
+    print(f"wrote {len(paths)} transcripts to {args.directory}")
@@ -0,0 +1,147 @@
+import datetime
+import os
+import sqlite3
+import threading
+import time
+
+# on-disk cache for catalog pages so repeat runs (and other students of the same cohort) skip the network
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "utd-transcript-parser", "catalog.sqlite3")
+
+# the catalog of the current year can still be edited, so its pages are revalidated after a week
+DEFAULT_TTL = 7 * 24 * 60 * 60
+
+# catalogs of past years are frozen, their pages stay fresh for a year
+ARCHIVED_TTL = 365 * 24 * 60 * 60
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class CatalogCacheMiss(Exception):
+    """Raised in offline mode when a catalog page is not in the cache."""
+
+
+class CatalogEntry:
+    def __init__(self, url, year, body, etag, last_modified, fetched_at):
+        self.url = url
+        self.year = year
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+
+class CatalogCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, archived_ttl=ARCHIVED_TTL,
+                 max_bytes=DEFAULT_MAX_BYTES, offline=False):
+        self.path = path
+        self.ttl = ttl
+        self.archived_ttl = archived_ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        # the scraper fetches pages from a thread pool, so one connection is shared behind a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT NOT NULL,
+                    year TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    size INTEGER NOT NULL,
+                    PRIMARY KEY (url, year)
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at)")
+
+    def ttl_for_year(self, year):
+        """Return how long a page of the given catalog year stays fresh, in seconds."""
+        try:
+            archived = int(year) < datetime.date.today().year
+        except (TypeError, ValueError):
+            archived = False
+        return self.archived_ttl if archived else self.ttl
+
+    def is_fresh(self, entry):
+        return time.time() - entry.fetched_at < self.ttl_for_year(entry.year)
+
+    def get(self, url, year):
+        """Return the cached entry for the url, or None. Stale entries are returned too so they can be revalidated."""
+        year = str(year)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM pages WHERE url = ? AND year = ?", (url, year)
+            ).fetchone()
+            if row is None:
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ? AND year = ?", (time.time(), url, year))
+        body, etag, last_modified, fetched_at = row
+        return CatalogEntry(url, year, bytes(body), etag, last_modified, fetched_at)
+
+    def put(self, url, year, body, etag=None, last_modified=None):
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO pages (url, year, body, etag, last_modified, fetched_at, accessed_at, size) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url, str(year), body, etag, last_modified, now, now, len(body))
+                )
+            self._evict()
+
+    def touch(self, entry):
+        """Mark an entry as fresh again after the server answered 304 Not Modified."""
+        entry.fetched_at = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.execute("UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url = ? AND year = ?",
+                                   (entry.fetched_at, entry.fetched_at, entry.url, entry.year))
+
+    def revalidation_headers(self, entry):
+        """Return the conditional request headers for a stale entry."""
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def _evict(self):
+        # drop the least recently used pages until the cache fits in max_bytes
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        with self._conn:
+            for url, year, size in self._conn.execute(
+                "SELECT url, year, size FROM pages ORDER BY accessed_at"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM pages WHERE url = ? AND year = ?", (url, year))
+                total -= size
+
+    def purge_expired(self):
+        """Delete every page that is past its TTL, returns the number of pages removed."""
+        now = time.time()
+        removed = 0
+        with self._lock:
+            with self._conn:
+                for url, year, fetched_at in self._conn.execute("SELECT url, year, fetched_at FROM pages").fetchall():
+                    if now - fetched_at >= self.ttl_for_year(year):
+                        self._conn.execute("DELETE FROM pages WHERE url = ? AND year = ?", (url, year))
+                        removed += 1
+        return removed
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
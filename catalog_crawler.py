@@ -0,0 +1,213 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+import metrics
+from plan_store import DEFAULT_PLAN_STORE, PlanStore, build_plan, parse_years
+
+# catalog-wide crawler: scrapes the degree plan of every (school, major, catalog year) target into the plan store
+# with a few plans in flight at once, for the overnight refresh of every plan
+#
+# - the targets go through a work queue drained by a bounded number of worker threads, each one scrapes one plan
+#   at a time (with the scraper's own pool for its course pages), the transport's rate limit bounds the requests
+# - one CourseRequisiteRegistry and the catalog cache are shared by all plans, so a course listed by many majors
+#   (MATH 2413, PHYS 2325, ...) is fetched and parsed once per year, even when two plans ask for it at once
+# - every finished target is written to a checkpoint file, an interrupted crawl run again with the same checkpoint
+#   skips what is already done and retries what failed. The checkpoint is removed once every target is done
+# - a plan with a course page that could not be fetched is failed and not stored (see build_plan), and the shared
+#   registry does not keep failed course lookups, so the target is retried on resume until every course is fetched
+
+DEFAULT_PLAN_WORKERS = 4
+
+CHECKPOINT_VERSION = 1
+
+# statuses of build_plan that count as done, anything else ("failed") is retried when the crawl is resumed
+DONE_STATUSES = {"built", "unchanged", "up to date"}
+
+
+def default_checkpoint_path(store):
+    return os.path.join(store.root, "crawl-checkpoint.json")
+
+
+def target_key(school, major, year):
+    return f"{year}/{school}/{major}"
+
+
+# function to list the (school, major, year) targets of the majors in school_mapping for the given years
+def crawl_targets(years, majors=None):
+    from transcript_parser import school_mapping
+
+    return [(school, major, str(year)) for year in years for major, school in school_mapping.items()
+            if not majors or major in majors]
+
+
+class CrawlCheckpoint:
+    """Status of every finished target of a crawl, rewritten atomically after each target."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.targets = {}
+        try:
+            with open(path, "r") as checkpoint_file:
+                data = json.load(checkpoint_file)
+            if data.get("version") == CHECKPOINT_VERSION:
+                self.targets = data["targets"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+
+    def is_done(self, school, major, year):
+        entry = self.targets.get(target_key(school, major, year))
+        return entry is not None and entry["status"] in DONE_STATUSES
+
+    def record(self, school, major, year, status, seconds, error=None):
+        entry = {"status": status, "seconds": round(seconds, 3), "finished": time.time()}
+        if error:
+            entry["error"] = error
+        with self._lock:
+            self.targets[target_key(school, major, year)] = entry
+            self._save()
+
+    def _save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as checkpoint_file:
+            json.dump({"version": CHECKPOINT_VERSION, "targets": self.targets}, checkpoint_file)
+        os.replace(temp_path, self.path)
+
+    def remove(self):
+        with self._lock, contextlib.suppress(FileNotFoundError):
+            os.remove(self.path)
+
+
+# function to crawl the targets into the store, returns (school, major, year, status) for every target of this run
+# targets already done in the checkpoint are skipped and reported as "resumed", a Ctrl-C lets the running plans
+# finish and keeps the checkpoint so the crawl can be resumed
+def crawl(store, targets, checkpoint_path=None, plan_workers=DEFAULT_PLAN_WORKERS, force=False, incremental=False,
+          restart=False, quiet=True):
+    from degree_scraper import CourseRequisiteRegistry
+
+    checkpoint_path = checkpoint_path or default_checkpoint_path(store)
+    if restart:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(checkpoint_path)
+    checkpoint = CrawlCheckpoint(checkpoint_path)
+
+    results = []
+    work = queue.Queue()
+    for school, major, year in targets:
+        if checkpoint.is_done(school, major, year):
+            results.append((school, major, year, "resumed"))
+        else:
+            work.put((school, major, year))
+    if results:
+        print(f"resuming from {checkpoint_path}: {len(results)} of {len(targets)} targets already done", file=sys.stderr)
+
+    registry = CourseRequisiteRegistry()
+    results_lock = threading.Lock()
+    stop = threading.Event()
+
+    def worker():
+        while not stop.is_set():
+            try:
+                school, major, year = work.get_nowait()
+            except queue.Empty:
+                return
+            start = time.perf_counter()
+            error = None
+            try:
+                with metrics.span("crawl_target"):
+                    status = build_plan(store, school, major, year, registry, force, incremental)
+            except Exception as e:
+                status, error = "failed", f"{type(e).__name__}: {e}"
+            seconds = time.perf_counter() - start
+            checkpoint.record(school, major, year, status, seconds, error)
+            metrics.count("crawl_targets_total", status=status)
+            with results_lock:
+                results.append((school, major, year, status))
+            if status != "up to date":
+                print(f"{year} {school}/{major}: {status} in {seconds:.1f} s" + (f" ({error})" if error else ""),
+                      file=sys.stderr)
+
+    # the scraper prints its progress to stdout, redirected once here since redirect_stdout is not per thread
+    with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, min(plan_workers, work.qsize())))]
+        for thread in threads:
+            thread.start()
+        try:
+            # joined with a timeout so Ctrl-C reaches the main thread
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            stop.set()
+            print("interrupted, waiting for the plans being scraped", file=sys.stderr)
+            for thread in threads:
+                thread.join()
+            print(f"{work.qsize()} targets left, run again with the same checkpoint to resume", file=sys.stderr)
+            raise
+
+    stats = registry.stats()
+    print(f"course requisite registry: {stats['courses']} courses, {stats['hits']} hits, {stats['misses']} misses",
+          file=sys.stderr)
+    if all(status in DONE_STATUSES or status == "resumed" for _, _, _, status in results):
+        checkpoint.remove()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape the degree plans of every major and catalog year into the plan store.")
+    parser.add_argument("--years", required=True, type=parse_years, help='i.e. "2021-2024" or "2022,2024"')
+    parser.add_argument("--major", action="append", help="only crawl this major (repeatable)")
+    parser.add_argument("--root", default=DEFAULT_PLAN_STORE, help="directory of the plan store")
+    parser.add_argument("--checkpoint", help="checkpoint file of the crawl (default: crawl-checkpoint.json in the store)")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint of an interrupted crawl")
+    parser.add_argument("--workers", type=int, default=DEFAULT_PLAN_WORKERS, help="plans scraped at the same time")
+    parser.add_argument("--requests-per-second", type=float, help="rate limit of the catalog requests (default: the transport's)")
+    parser.add_argument("--force", action="store_true", help="rebuild plans that are already in the store")
+    parser.add_argument("--incremental", action="store_true",
+                        help="re-scrape existing plans against their fingerprints and rewrite the changed ones")
+    parser.add_argument("--cache", help="path of the on-disk catalog cache (default: ~/.cache/utd-transcript-parser/catalog.sqlite3)")
+    parser.add_argument("--no-cache", action="store_true", help="always fetch catalog pages from the network")
+    parser.add_argument("--offline", action="store_true", help="only use cached catalog pages")
+    parser.add_argument("--metrics", help="write the crawl's metrics to this file (.prom/.txt or JSON)")
+    args = parser.parse_args()
+    if args.offline and args.no_cache:
+        print("Error: --offline needs the catalog cache, it cannot be combined with --no-cache.", file=sys.stderr)
+        return 2
+
+    from catalog_cache import CatalogCache, DEFAULT_CACHE_PATH
+    from catalog_transport import HttpTransport
+    from degree_scraper import set_catalog_cache, set_transport
+
+    if not args.no_cache:
+        set_catalog_cache(CatalogCache(args.cache or DEFAULT_CACHE_PATH, offline=args.offline))
+    if args.requests_per_second:
+        set_transport(HttpTransport(requests_per_second=args.requests_per_second))
+
+    store = PlanStore(args.root)
+    targets = crawl_targets(args.years, args.major)
+    start = time.perf_counter()
+    try:
+        results = crawl(store, targets, args.checkpoint, args.workers, args.force, args.incremental, args.restart)
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        if args.metrics:
+            metrics.METRICS.write(args.metrics)
+
+    failed = sum(1 for result in results if result[3] not in DONE_STATUSES and result[3] != "resumed")
+    print(f"{len(results) - failed}/{len(results)} plans in {store.root} after {time.perf_counter() - start:.1f} s",
+          file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
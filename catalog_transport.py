@@ -0,0 +1,153 @@
+import datetime
+import email.utils
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+import metrics
+
+# transports used by the scraper to fetch catalog pages: HttpTransport talks to the catalog server,
+# FixtureTransport serves saved pages from a local directory for tests and benchmarks
+
+DEFAULT_TIMEOUT = 15
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+
+# requests per second sent to one host, keeps the catalog server from throttling us when many majors are scraped
+DEFAULT_REQUESTS_PER_SECOND = 10.0
+
+# keep-alive connections kept open per host, matches the scraper's default worker count
+DEFAULT_POOL_SIZE = 8
+
+# responses worth another try, anything else is returned to the caller as is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HttpTransport:
+    """Pooled HTTP session with timeouts, per-host rate limiting and jittered exponential backoff."""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES, backoff=DEFAULT_BACKOFF,
+                 requests_per_second=DEFAULT_REQUESTS_PER_SECOND, pool_size=DEFAULT_POOL_SIZE):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.requests_per_second = requests_per_second
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def get(self, url, headers=None):
+        """GET the url, retrying connection errors, timeouts and retryable statuses. Returns the requests.Response."""
+        host = urlsplit(url).netloc
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_slot(host)
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise
+                metrics.count("catalog_http_retries_total", reason=type(e).__name__)
+                time.sleep(self._backoff_delay(attempt))
+                continue
+
+            metrics.count("catalog_http_responses_total", status=response.status_code)
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                metrics.count("catalog_http_retries_total", reason=str(response.status_code))
+                time.sleep(self._retry_after(response) or self._backoff_delay(attempt))
+                continue
+            return response
+
+    def _wait_for_slot(self, host):
+        # each host hands out evenly spaced request slots, callers sleep until their slot comes up
+        if not self.requests_per_second:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + 1 / self.requests_per_second
+        if slot > now:
+            time.sleep(slot - now)
+
+    def _backoff_delay(self, attempt):
+        # the jitter spreads the retries of parallel workers so they don't hit the server at the same moment
+        return self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def _retry_after(self, response):
+        # Retry-After is either a number of seconds or an HTTP date, a date in the past (or a negative number)
+        # means no wait
+        value = response.headers.get("Retry-After", "").strip()
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+        return max(0.0, (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+    def close(self):
+        self.session.close()
+
+
+class FixtureTransport:
+    """Serves catalog pages from saved HTML instead of the network.
+
+    pages is either a directory mirroring the catalog URL paths (i.e. <root>/2024/undergraduate/courses/cs1337.html)
+    or a dict of URL path -> HTML. Unknown pages answer 404 like the catalog server would.
+    """
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.request_count = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None):
+        with self._lock:
+            self.request_count += 1
+        path = urlsplit(url).path
+        body = self._read(path)
+
+        response = requests.Response()
+        response.url = url
+        response.headers = CaseInsensitiveDict({"Content-Type": "text/html; charset=utf-8"})
+        if body is None:
+            response.status_code = 404
+            response.reason = "Not Found"
+            response._content = b""
+        else:
+            response.status_code = 200
+            response.reason = "OK"
+            response._content = body if isinstance(body, bytes) else body.encode("utf-8")
+        return response
+
+    def _read(self, path):
+        if isinstance(self.pages, dict):
+            return self.pages.get(path)
+
+        file_path = os.path.join(self.pages, *path.strip("/").split("/"))
+        if not os.path.splitext(file_path)[1]:
+            file_path += ".html"
+        try:
+            with open(file_path, "rb") as file:
+                return file.read()
+        except (FileNotFoundError, IsADirectoryError):
+            return None
+
+    def close(self):
+        pass
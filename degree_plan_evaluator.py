@@ -1,94 +1,274 @@
 import json
 import re
 
-class DegreePlanEvaluator:
-    def __init__(self, degree_plan, transcript):
-        self.completed_courses = set()
-        self.core_courses = set() # tracks core curriculum courses that overlap with major requirements (i.e. "beyond core curriculum")
+import metrics
+from records import CourseRow, categories_from_plan, categories_to_plan
 
-        # collect all completed courses from transcript from each section
-        if 'courses' in transcript:
-            if 'transfer_credits' in transcript['courses']:
-                self.completed_courses.update(course['course_code'] for course in transcript['courses']['transfer_credits'])
+CATEGORY_HOURS_PATTERN = re.compile(r'(\d+)\s*semester credit hours')
+COURSE_HOURS_PATTERN = re.compile(r'[A-Za-z]+\s*\d(\d)')
+
+
+def category_credit_hours(category_name):
+    """Extract the total required credit hours from the category name."""
+    match = CATEGORY_HOURS_PATTERN.search(category_name)
+    if match:
+        return int(match.group(1))
+    return 0
+
+
+def course_credit_hours(course_code):
+    """Extract credit hours from the course code based on the second digit in the course number."""
+    match = COURSE_HOURS_PATTERN.search(course_code)
+    if match:
+        return int(match.group(1))
+    return 0
+
+
+def course_row_codes(rows):
+    """Return the course codes of transcript course rows, dicts or CourseRow records."""
+    if rows and isinstance(rows[0], CourseRow):
+        return [row.course_code for row in rows]
+    return [row['course_code'] for row in rows]
 
-            if 'test_credits' in transcript['courses']:
-                self.completed_courses.update(course['course_code'] for course in transcript['courses']['test_credits'])
 
-            if 'utd_classes' in transcript['courses']:
-                for semester, courses in transcript['courses']['utd_classes'].items():
-                    self.completed_courses.update(course['course_code'] for course in courses)
+def collect_completed_courses(transcript):
+    """Collect the course codes of every section of a parsed transcript."""
+    completed_courses = set()
+    if 'courses' in transcript:
+        if 'transfer_credits' in transcript['courses']:
+            completed_courses.update(course_row_codes(transcript['courses']['transfer_credits']))
 
-        self.degree_plan = degree_plan
-        self.course_graph = self.build_course_graph(degree_plan)
+        if 'test_credits' in transcript['courses']:
+            completed_courses.update(course_row_codes(transcript['courses']['test_credits']))
 
-    def build_course_graph(self, degree_plan):
-        """Build a graph where nodes are courses, and edges represent prerequisites and corequisites."""
+        if 'utd_classes' in transcript['courses']:
+            for semester, courses in transcript['courses']['utd_classes'].items():
+                completed_courses.update(course_row_codes(courses))
+    return completed_courses
+
+
+class CompiledDegreePlan:
+    """Read-only, evaluation ready form of a scraped degree plan.
+
+    It is built once per (major, year) and shared by every DegreePlanEvaluator of that plan. Each plan course
+    gets a bit so a student's completed courses become one integer and category membership is a bitwise AND.
+    """
+
+    @metrics.span("plan_compile")
+    def __init__(self, degree_plan):
         course_graph = {}
+        core_courses = set()    # tracks core curriculum courses that overlap with major requirements (i.e. "beyond core curriculum")
+        categories = []         # (section, category name, course codes) in plan order
+        category_index = {}     # category name -> index of its last occurrence in categories
+        category_required_hours = {}
+        course_categories = {}  # course code -> indexes of the categories listing it
+        credit_hours = {}
+        course_bits = {}        # course code -> bit of the course in the completed course masks
+        category_masks = []
+        category_positions = [] # per category: bit -> positions of the course in the category's course list
+
+        category_records = categories_from_plan(degree_plan)
+        for category in category_records:
+            section, category_name = category.section, category.name
+
+            # build a graph where nodes are courses, and edges represent prerequisites and corequisites
+            codes = []
+            for course in category.courses:
+                course_graph[course.code] = course
+                if section == 'core_requirements':
+                    core_courses.add(course.code)  # add core courses for comparison later
+                codes.append(course.code)
+
+            index = len(categories)
+            categories.append((section, category_name, tuple(codes)))
+            category_index[category_name] = index
+            category_required_hours[category_name] = category_credit_hours(category_name)
+
+            mask = 0
+            positions = {}
+            for position, code in enumerate(codes):
+                if code not in course_bits:
+                    course_bits[code] = len(course_bits)
+                    credit_hours[code] = course_credit_hours(code)
+                bit = course_bits[code]
+                mask |= 1 << bit
+                positions.setdefault(bit, []).append(position)
+                if index not in course_categories.setdefault(code, []):
+                    course_categories[code].append(index)
+            category_masks.append(mask)
+            category_positions.append(positions)
+
+        # prerequisite courses outside the plan get bits after the plan courses, then every prerequisite group
+        # (i.e. (X OR Y)) becomes one mask: the group is satisfied when it shares a bit with the completed mask
+        prerequisite_masks = {}
+        for course_code, course_data in course_graph.items():
+            group_masks = []
+            for group in course_data.prerequisites:
+                group_mask = 0
+                for prereq in group:
+                    if prereq not in course_bits:
+                        course_bits[prereq] = len(course_bits)
+                    group_mask |= 1 << course_bits[prereq]
+                group_masks.append(group_mask)
+            prerequisite_masks[course_code] = tuple(group_masks)
+
+        # the plan is kept as its records only, degree_plan rebuilds the scraped dict from them when needed
+        self.category_records = category_records
+        self.elective_requirements = degree_plan.get('elective_requirements')
+        self.course_graph = course_graph
+        self.core_courses = frozenset(core_courses)
+        self.categories = tuple(categories)
+        self.category_index = category_index
+        self.category_required_hours = category_required_hours
+        self.course_categories = course_categories
+        self.course_credit_hours = credit_hours
+        self.course_bits = course_bits
+        self.category_masks = tuple(category_masks)
+        self.category_positions = tuple(category_positions)
+        self.prerequisite_masks = prerequisite_masks
+        self.course_masks = {code: 1 << bit for code, bit in course_bits.items()}
+        self._frozen = True
+
+    @property
+    def degree_plan(self):
+        """The scraped degree plan dict (degree_plan_data.json shape), rebuilt on every access."""
+        return categories_to_plan(self.category_records, self.elective_requirements)
+
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False):
+            raise AttributeError("CompiledDegreePlan is read-only, compile a new plan instead")
+        super().__setattr__(name, value)
+
+    def completed_mask(self, completed_courses):
+        """Return the bitmask of the plan courses and prerequisites among the given completed course codes."""
+        mask = 0
+        course_masks = self.course_masks
+        for code in completed_courses:
+            mask |= course_masks.get(code, 0)
+        return mask
+
+    def prerequisites_satisfied(self, course_code, completed_mask):
+        """Check if every prerequisite group of the course shares at least one course with the completed mask."""
+        for group_mask in self.prerequisite_masks.get(course_code, ()):
+            if not group_mask & completed_mask:
+                return False
+        return True
+
+    def satisfied_mask(self, completed_mask):
+        """Return the mask of the plan courses whose prerequisites are all satisfied by the completed mask."""
+        mask = 0
+        for course_code, group_masks in self.prerequisite_masks.items():
+            for group_mask in group_masks:
+                if not group_mask & completed_mask:
+                    break
+            else:
+                mask |= self.course_masks[course_code]
+        return mask
+
 
-        # handle core requirements to build the core course list
-        core_requirements = degree_plan.get('core_requirements', {})
-        if isinstance(core_requirements, dict):
-            core_requirements = list(core_requirements.values())
-
-        for category in core_requirements:
-            if isinstance(category, list):
-                for course in category:
-                    if isinstance(course, dict):
-                        course_code = course.get('course_info', '')
-                        prereqs = course.get('prerequisites', [])
-                        coreqs = course.get('corequisites', [])
-                        course_graph[course_code] = {
-                            'prerequisites': prereqs,
-                            'corequisites': coreqs
-                        }
-                        self.core_courses.add(course_code)  # add core courses for comparison later
-
-        # handle major requirements to build the full course graph
-        major_requirements = degree_plan.get('major_requirements', {})
-        if isinstance(major_requirements, dict):
-            major_requirements = list(major_requirements.values())
-
-        for category in major_requirements:
-            if isinstance(category, list):
-                for course in category:
-                    if isinstance(course, dict):
-                        course_code = course.get('course_info', '')
-                        prereqs = course.get('prerequisites', [])
-                        coreqs = course.get('corequisites', [])
-                        course_graph[course_code] = {
-                            'prerequisites': prereqs,
-                            'corequisites': coreqs
-                        }
-        
-        return course_graph
+def compile_degree_plan(degree_plan):
+    """Return a CompiledDegreePlan for the scraped degree plan dict, compiled plans are returned as they are."""
+    if isinstance(degree_plan, CompiledDegreePlan):
+        return degree_plan
+    return CompiledDegreePlan(degree_plan)
 
 
+def evaluate_many(degree_plan, transcripts):
+    """Evaluate many transcripts against one degree plan, the plan is compiled once and shared.
+
+    Returns one {'category_completion', 'recommended_courses'} dict per transcript, in the same order.
+    """
+    plan = compile_degree_plan(degree_plan)
+    results = []
+    for transcript in transcripts:
+        evaluator = DegreePlanEvaluator(plan, transcript)
+        results.append({
+            'category_completion': evaluator.calculate_category_completion(),
+            'recommended_courses': evaluator.recommend_courses()
+        })
+    return results
+
+
+class DegreePlanEvaluator:
+    def __init__(self, degree_plan, transcript):
+        # collect all completed courses from transcript from each section
+        self.completed_courses = collect_completed_courses(transcript)
+
+        # the raw plan dict is compiled here, pass a CompiledDegreePlan to share one between evaluators
+        self.plan = compile_degree_plan(degree_plan)
+        self.course_graph = self.plan.course_graph
+        self.core_courses = self.plan.core_courses
+        self.categories = self.plan.categories
+        self.completed_mask = self.plan.completed_mask(self.completed_courses)
+
+        # category completion is computed once and then kept up to date incrementally, see add_completed_courses
+        self._category_completion = None
+
+    @property
+    def degree_plan(self):
+        return self.plan.degree_plan
+
     def calculate_category_completion(self):
-        category_completion = {}
-
-        for section in ['core_requirements', 'major_requirements']:
-            for category_name, courses in self.degree_plan.get(section, {}).items():
-                if isinstance(courses, list):
-                    total_required = self.get_category_credit_hours(category_name, courses)
-                    completed_credits, completed_courses = self.get_completed_credit_hours_and_courses(courses)
-
-                    # exclude core courses from contributing to "beyond core" credit totals for major requirements
-                    if section == 'major_requirements' and "beyond Core Curriculum" in category_name:
-                        # subtract core curriculum credits from total
-                        core_only_credits = self.exclude_core_courses(completed_courses)
-                        completed_credits -= core_only_credits
-
-                    remaining = max(0, total_required - completed_credits)
-
-                    category_completion[category_name] = {
-                        'total_required': total_required,
-                        'completed': completed_credits,
-                        'remaining': remaining,
-                        'completed_courses': completed_courses
-                    }
-
-        return category_completion
-    
+        """Return the completion of every category, computed on the first call and reused afterwards."""
+        if self._category_completion is None:
+            with metrics.span("evaluator_category_completion"):
+                self._category_completion = {}
+                for index in range(len(self.categories)):
+                    self.update_category_completion(index)
+        return self._category_completion
+
+    def update_category_completion(self, index):
+        """Recompute the completion entry of a single category from the plan's bitmasks."""
+        plan = self.plan
+        section, category_name, codes = self.categories[index]
+        total_required = plan.category_required_hours[category_name]
+
+        # walk the set bits of the completed courses of this category, keeping the catalog order of the category
+        positions = []
+        hits = self.completed_mask & plan.category_masks[index]
+        while hits:
+            lowest = hits & -hits
+            positions.extend(plan.category_positions[index][lowest.bit_length() - 1])
+            hits ^= lowest
+        positions.sort()
+        completed_courses = [codes[position] for position in positions]
+        completed_credits = sum(plan.course_credit_hours[code] for code in completed_courses)
+
+        # exclude core courses from contributing to "beyond core" credit totals for major requirements
+        if section == 'major_requirements' and "beyond Core Curriculum" in category_name:
+            # subtract core curriculum credits from total
+            completed_credits -= self.exclude_core_courses(completed_courses)
+
+        remaining = max(0, total_required - completed_credits)
+
+        self._category_completion[category_name] = {
+            'total_required': total_required,
+            'completed': completed_credits,
+            'remaining': remaining,
+            'completed_courses': completed_courses
+        }
+
+    def add_completed_courses(self, course_codes):
+        """Mark courses as completed, only the categories containing them are recomputed."""
+        self._change_completed_courses(set(course_codes) - self.completed_courses, self.completed_courses.add)
+
+    def remove_completed_courses(self, course_codes):
+        """Unmark completed courses, only the categories containing them are recomputed."""
+        self._change_completed_courses(set(course_codes) & self.completed_courses, self.completed_courses.discard)
+
+    @metrics.span("evaluator_incremental_update")
+    def _change_completed_courses(self, changed, apply):
+        for code in changed:
+            apply(code)
+        self.completed_mask = self.plan.completed_mask(self.completed_courses)
+        if self._category_completion is None:
+            return
+
+        # categories sharing a name overwrite each other in the completion dict, so the last one in plan order is recomputed
+        affected_names = {self.categories[index][1] for code in changed for index in self.plan.course_categories.get(code, [])}
+        for category_name in affected_names:
+            self.update_category_completion(self.plan.category_index[category_name])
+
     def exclude_core_courses(self, completed_courses):
         """Exclude courses that count towards both core and major requirements from the major's total credits."""
         core_credit_total = 0
@@ -113,10 +293,7 @@ class DegreePlanEvaluator:
 
     def get_category_credit_hours(self, category_name, courses):
         """Extract the total required credit hours from the category name."""
-        match = re.search(r'(\d+)\s*semester credit hours', category_name)
-        if match:
-            return int(match.group(1))
-        return 0
+        return category_credit_hours(category_name)
 
     def get_completed_credit_hours(self, courses):
         """Calculates the completed credit hours in a given category."""
@@ -124,24 +301,23 @@ class DegreePlanEvaluator:
 
     def get_course_credit_hours(self, course_code):
         """Extract credit hours from the course code based on the second digit in the course number."""
-        match = re.search(r'[A-Za-z]+\s*\d(\d)', course_code)
-        if match:
-            return int(match.group(1))
-        return 0
+        hours = self.plan.course_credit_hours.get(course_code)
+        return hours if hours is not None else course_credit_hours(course_code)
 
+    @metrics.span("evaluator_recommend")
     def recommend_courses(self):
         recommended_courses = []
+        category_completion = self.calculate_category_completion()
 
-        for section in ['core_requirements', 'major_requirements']:
-            for category, courses in self.degree_plan.get(section, {}).items():
-                category_data = self.calculate_category_completion().get(category, {})
-                if category_data.get('remaining', 0) > 0:  # Only recommend if there are remaining credits
-                    for course in courses:
-                        if isinstance(course, dict):
-                            course_code = course.get('course_info')
+        plan = self.plan
+        completed_mask = self.completed_mask
 
-                            if course_code not in self.completed_courses and self.prerequisites_satisfied(course_code):
-                                recommended_courses.append(course_code)
+        for _, category, codes in self.categories:
+            category_data = category_completion.get(category, {})
+            if category_data.get('remaining', 0) > 0:  # Only recommend if there are remaining credits
+                for course_code in codes:
+                    if not plan.course_masks[course_code] & completed_mask and plan.prerequisites_satisfied(course_code, completed_mask):
+                        recommended_courses.append(course_code)
 
         # can add extra requirements here to refine the selection
         # i.e. can prioritize core requirements, for major requirements prioritize the major prefix (i.e. CS vs SE)
@@ -153,34 +329,40 @@ class DegreePlanEvaluator:
         if course_code not in self.course_graph:
             return True  # if the course has no prerequisites, it's considered satisfied.
 
-        course_data = self.course_graph[course_code]
-        prereqs = course_data.get('prerequisites', [])
-        for group in prereqs:
-            # if any group of prerequisites (i.e. (X OR Y)) has at least one course that is completed, we are good
-            if any(prereq in self.completed_courses for prereq in group):
-                continue
-            else:
-                return False
-        return True
+        # if any group of prerequisites (i.e. (X OR Y)) has at least one course that is completed, we are good
+        return self.plan.prerequisites_satisfied(course_code, self.completed_mask)
+
+
+# can be used to test the DegreePlanEvaluator class, run this file in isolation with the degree plan and transcript
+# json already populated (i.e. by main.py): python degree_plan_evaluator.py [degree_plan_data.json] [transcript_data.json]
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Evaluate a saved transcript against a saved degree plan.")
+    parser.add_argument("degree_plan", nargs="?", default="degree_plan_data.json")
+    parser.add_argument("transcript", nargs="?", default="transcript_data.json")
+    args = parser.parse_args(argv)
+
+    with open(args.degree_plan) as degree_plan_file:
+        degree_plan_data = json.load(degree_plan_file)
+    with open(args.transcript) as transcript_file:
+        transcript_data = json.load(transcript_file)
 
+    evaluator = DegreePlanEvaluator(degree_plan_data, transcript_data)
 
-# can be used to test the DegreePlanEvaluator class, just run this file in isolation with the degree plan and transcript json already populated
-degree_plan_data = json.load(open("degree_plan_data.json"))
-transcript_data = json.load(open("transcript_data.json"))
+    # Calculate category completion
+    category_completion = evaluator.calculate_category_completion()
+    print("Category Completion:", category_completion)
 
-evaluator = DegreePlanEvaluator(degree_plan_data, transcript_data)
+    # Recommend courses for next semester
+    recommended_courses = evaluator.recommend_courses()
+    print("Recommended Courses:", recommended_courses)
+    with open("recommended_courses.json", "w") as file:
+        json.dump(recommended_courses, file, indent=4)
 
-# Calculate category completion
-category_completion = evaluator.calculate_category_completion()
-print("Category Completion:", category_completion)
+    with open("category_completion.json", "w") as file:
+        json.dump(category_completion, file, indent=4)
 
-# Recommend courses for next semester
-recommended_courses = evaluator.recommend_courses()
-print("Recommended Courses:", recommended_courses)
-file = open("recommended_courses.json", "w")
-json.dump(recommended_courses, file, indent=4)
-file.close()
 
-file = open("category_completion.json", "w")
-json.dump(category_completion, file, indent=4)
-file.close()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,141 @@
-import requests
-from bs4 import BeautifulSoup
+from concurrent.futures import Future, ThreadPoolExecutor
+import hashlib
+import importlib.util
+import json
+import os
 import re
-
-# scrapes the prerequisites and corequisites for a given course
-def scrape_course_prerequisites(code, year):
-    url_code = code.replace(" ", "").lower()
-    course_url = f"https://catalog.utdallas.edu/{year}/undergraduate/courses/{url_code}"
-    
+import threading
+import time
+import metrics
+from requisites import compile_requisite
+
+# requests and bs4 (and catalog_transport and catalog_cache) are imported inside the functions that use them,
+# importing this module for its helpers or for evaluating stored plans does not pay for loading them
+
+CATALOG_BASE_URL = "https://catalog.utdallas.edu"
+
+# lxml parses the catalog pages several times faster than the builtin parser, it is used when installed
+HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+# the credit hours in the major requirements heading differ per major, i.e. "II. Major Requirements: 72 semester credit hours"
+MAJOR_REQUIREMENTS_PATTERN = re.compile(r"II\. Major Requirements")
+ELECTIVE_REQUIREMENTS_PATTERN = re.compile(r"Elective Requirements")
+COURSE_CODE_PATTERN = re.compile(r"([A-Z]+\s+\d+)")
+
+# number of course pages fetched at the same time when scraping a degree plan
+DEFAULT_MAX_WORKERS = 8
+
+# optional on-disk cache consulted before every catalog request, see set_catalog_cache
+_catalog_cache = None
+
+# transport used for every catalog request, created on first use, see set_transport
+_transport = None
+_transport_lock = threading.Lock()
+
+# function to replace the transport of the scraper, i.e. with a FixtureTransport for tests and benchmarks
+def set_transport(transport):
+    global _transport
+    _transport = transport
+
+# function to return the current transport, one pooled HttpTransport is shared by the whole scraper by default
+def get_transport():
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                from catalog_transport import HttpTransport
+                _transport = HttpTransport()
+    return _transport
+
+# function to route every catalog request of the scraper through the given CatalogCache (or None to disable caching)
+def set_catalog_cache(cache):
+    global _catalog_cache
+    _catalog_cache = cache
+
+# function to fetch the raw HTML of a catalog page, served from the catalog cache when one is configured
+# with revalidate, a cached page is always checked with a conditional request even while it is fresh (the
+# incremental scrapes look for changes before the TTL expires)
+# the latency and size of every fetch are recorded in the metrics by where the page came from
+def fetch_page(url, year, revalidate=False):
+    start = time.perf_counter()
     try:
-        print(f"Fetching course prerequisites for course {url_code} from URL: {course_url}")
-        response = requests.get(course_url)
+        body, source = _fetch_page(url, year, revalidate)
+    except Exception as e:
+        metrics.count("catalog_fetch_errors_total", error=type(e).__name__)
+        raise
+    seconds = time.perf_counter() - start
+    metrics.count("catalog_fetches_total", source=source)
+    metrics.observe("catalog_fetch_seconds", seconds, source=source)
+    metrics.observe("catalog_fetch_bytes", len(body), buckets=metrics.BYTE_BUCKETS, source=source)
+    metrics.event("catalog_fetch", url=url, source=source, seconds=round(seconds, 6), bytes=len(body))
+    return body
+
+# returns (body, source) where source is network (no cache), cache (fresh hit), revalidated (304) or refreshed
+def _fetch_page(url, year, revalidate=False):
+    cache = _catalog_cache
+    if cache is None:
+        response = get_transport().get(url)
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
+        return response.content, "network"
+
+    entry = cache.get(url, year)
+    if entry is not None and (cache.offline or (not revalidate and cache.is_fresh(entry))):
+        return entry.body, "cache"
+    if cache.offline:
+        from catalog_cache import CatalogCacheMiss
+        raise CatalogCacheMiss(f"{url} is not in the catalog cache")
+
+    # stale entries are revalidated with a conditional request so an unchanged page is not downloaded again
+    response = get_transport().get(url, headers=cache.revalidation_headers(entry))
+    if entry is not None and response.status_code == 304:
+        cache.touch(entry)
+        return entry.body, "revalidated"
+    response.raise_for_status()
+    cache.put(url, year, response.content, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+    return response.content, "refreshed"
+
+# function to construct the catalog URL of a course page
+def course_page_url(code, year):
+    url_code = code.replace(" ", "").lower()
+    return f"{CATALOG_BASE_URL}/{year}/undergraduate/courses/{url_code}"
+
+# function to read the prerequisites and corequisites out of the HTML of a course page
+@metrics.span("catalog_parse", page="course")
+def parse_course_page(html):
+    from bs4 import BeautifulSoup, SoupStrainer
 
-        # extract the section of text from the HTML that contains the course description
-        description_section = soup.find("div", id="bukku-page").find("p")
-        if not description_section:
-            return {"prerequisites": [], "corequisites": []}
+    # only the description container is parsed, the rest of the course page is skipped
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=SoupStrainer("div", id="bukku-page"))
 
-        description_text = description_section.get_text(" ", strip=True)
+    # extract the section of text from the HTML that contains the course description
+    description_section = soup.find("div", id="bukku-page").find("p")
+    if not description_section:
+        return {"prerequisites": [], "corequisites": []}
+
+    description_text = description_section.get_text(" ", strip=True)
+
+    prereq_text = extract_prerequisite_text(description_text)
+    coreq_text = extract_corequisite_text(description_text)
 
-        prereq_text = extract_prerequisite_text(description_text)
-        coreq_text = extract_corequisite_text(description_text)
+    prerequisites = parse_courses_from_text(prereq_text) if prereq_text else []
+    corequisites = parse_courses_from_text(coreq_text) if coreq_text else []
 
-        prerequisites = parse_courses_from_text(prereq_text) if prereq_text else []
-        corequisites = parse_courses_from_text(coreq_text) if coreq_text else []
+    return {"prerequisites": prerequisites, "corequisites": corequisites}
 
-        return {"prerequisites": prerequisites, "corequisites": corequisites}
+# scrapes the prerequisites and corequisites for a given course, None when the course page could not be fetched
+# (an empty result would be taken for a course without requisites)
+def scrape_course_prerequisites(code, year):
+    import requests
+
+    course_url = course_page_url(code, year)
+    
+    try:
+        print(f"Fetching course prerequisites for course {code} from URL: {course_url}")
+        return parse_course_page(fetch_page(course_url, year))
 
     except requests.exceptions.RequestException as e:
         print(f"Error fetching course prerequisites from {course_url}: {e}")
-        return {"prerequisites": [], "corequisites": []}
+        return None
 
 # function to extract prerequisite text from "Prerequisite:" up to "Corequisite:" or the end of text
 def extract_prerequisite_text(text):
@@ -46,175 +151,406 @@ def extract_corequisite_text(text):
         return match.group(2).strip()
     return None
 
-# function to parse courses from the extracted req text
+# function to parse the courses of the extracted req text into groups of alternatives, i.e. [["CS 1337", "CE 1337"], ["CS 2305"]]
+# the text is compiled into a requisite expression (see requisites.py) so nesting like "(A or B) and C" and
+# "A or (B and C)" is kept, and the groups are its CNF: every group needs one of its courses
 def parse_courses_from_text(text):
-    course_groups = []
-    current_group = []
-
-    # match course codes with regex i.e. "MATH 2413" or "PHYS 2125"
-    course_pattern = re.compile(r"([A-Z]+\s+\d+)")
-
-    # split the text by "or" or "and" to separate the groups and parse the courses
-    # note that "or" indicates the same group as the courses have equivalency in determining requisite satisfaction
-    # "and" indicates a new group functioning and additional requisites
-    tokens = re.split(r'(\s+or\s+|\s+and\s+)', text)
-
-    for token in tokens:
-        token = token.strip()
-        
-        course_match = course_pattern.findall(token)
-        if course_match:
-            current_group.extend(course_match)
-
-        # if "and" is found, it indicates the end of a group
-        if 'and' in token.lower():
-            if current_group:
-                course_groups.append(current_group)
-                current_group = []
-
-        # if "or" is found, continue adding to the same group
-        elif 'or' in token.lower():
+    return compile_requisite(text).to_cnf()
+
+
+# memoizes scraped course requisites by catalog year and course code so each course page is fetched and parsed once,
+# a registry can be scoped to one scrape or shared between scrapes of several degree plans
+class CourseRequisiteRegistry:
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, code, year):
+        """Return the requisites of the course, scraping its page only on the first successful lookup.
+
+        A failed fetch (None) is not kept, the next lookup of the course tries again.
+        """
+        return self._lookup((str(year), code), lambda: scrape_course_prerequisites(code, year))
+
+    def fingerprint(self, code, year):
+        """Return the page hash and requisites of the course revalidated against the catalog, once per registry.
+
+        A failed fetch (None) is not kept, the next lookup of the course tries again.
+        """
+        return self._lookup((str(year), code, "fingerprint"), lambda: fetch_course_fingerprint(code, year, True))
+
+    def _lookup(self, key, scrape):
+        with self._lock:
+            future = self._entries.get(key)
+            if future is None:
+                self.misses += 1
+                metrics.count("requisite_registry_lookups_total", result="miss")
+                future = self._entries[key] = Future()
+                owner = True
+            else:
+                self.hits += 1
+                metrics.count("requisite_registry_lookups_total", result="hit")
+                owner = False
+
+        # concurrent lookups of the same course wait for the thread that is already scraping it, a failed scrape
+        # (None or an exception) is handed to them but dropped from the registry so a later lookup tries again
+        if owner:
+            try:
+                result = scrape()
+                if result is None:
+                    with self._lock:
+                        del self._entries[key]
+                future.set_result(result)
+            except BaseException as e:
+                with self._lock:
+                    del self._entries[key]
+                future.set_exception(e)
+        return future.result()
+
+    def stats(self):
+        return {"courses": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+# function to fetch the requisites of every course code in parallel, returns a dict keyed by course code with None
+# for the courses whose page could not be fetched
+def fetch_course_requisites(codes, year, max_workers=DEFAULT_MAX_WORKERS, registry=None):
+    if registry is None:
+        registry = CourseRequisiteRegistry()
+    if not codes:
+        return {}
+
+    # every occurrence goes through the registry so repeated courses show up as hits, only misses are fetched
+    workers = max(1, min(max_workers, len(codes)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(lambda code: registry.get(code, year), codes)
+        return dict(zip(codes, results))
+
+# function to turn the collected course codes of each category into course entries using the fetched requisites
+# a course without requisites (its page could not be fetched) gets empty prerequisite and corequisite groups
+def build_course_entries(codes_by_category, requisites):
+    return {
+        category: [{"course_info": code, **(requisites[code] or {"prerequisites": [], "corequisites": []})}
+                   for code in codes]
+        for category, codes in codes_by_category.items()
+    }
+
+# function to walk the degree plan page once and route every requirement paragraph to its section
+# returns the core categories (course codes or core curriculum links per category), the major categories
+# (course codes per category) and the elective requirements
+@metrics.span("catalog_parse", page="plan")
+def parse_degree_page(html):
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    # only the <p> elements carry requirements, everything else on the page is skipped by the parser
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=SoupStrainer("p"))
+
+    core_items = {}
+    major_codes = {}
+    elective_requirements = {}
+
+    section = None
+    core_seen = major_seen = elective_seen = False
+    current_category = ""
+
+    for paragraph in soup.find_all("p"):
+        classes = paragraph.get("class", [])
+        text = paragraph.string
+
+        # Break on reaching the next section
+        if section and "cat-reqa" in classes:
+            section = None
+
+        if not core_seen and paragraph.get("id") == "degree-requirements":
+            section, core_seen = "core", True
+            continue
+        if not major_seen and text and MAJOR_REQUIREMENTS_PATTERN.match(text):
+            section, major_seen = "major", True
             continue
 
-    # add any remaining group leftover
-    if current_group:
-        course_groups.append(current_group)
-
-    # clean up course_groups by removing periods and trailing characters
-    cleaned_course_groups = [[course.replace(".", "") for course in group] for group in course_groups]
+        # parse elective section to find required credit hours
+        if not elective_seen and text and ELECTIVE_REQUIREMENTS_PATTERN.search(text):
+            elective_seen = True
+            match = re.search(r"(\d+) semester credit hours", paragraph.get_text())
+            if match:
+                elective_requirements = {"required_credit_hours": int(match.group(1))}
 
-    return cleaned_course_groups
+        if section is None:
+            continue
 
+        # Category title
+        if "cat-reqg" in classes:
+            current_category = paragraph.get_text(strip=True)
+            if section == "core":
+                core_items[current_category] = []
+            else:
+                major_codes[current_category] = []
+
+        # Course information or, in the core section, link to core curriculum page
+        elif "cat-reqi" in classes:
+            link = paragraph.find("a", href=True)
+            course_url = link['href'] if link else None
+            if section == "core" and course_url and "/undergraduate/curriculum/core-curriculum" in course_url:
+                core_items[current_category].append(CoreCurriculumLink(course_url))
+                continue
+
+            course_code_match = COURSE_CODE_PATTERN.match(paragraph.get_text(strip=True))
+            code = course_code_match.group(1) if course_code_match else None
+            items = core_items[current_category] if section == "core" else major_codes[current_category]
+            if code and code not in items:
+                items.append(code)
+
+    return core_items, major_codes, elective_requirements
+
+# a core category entry pointing at a section of the core curriculum page
+class CoreCurriculumLink:
+    def __init__(self, url):
+        self.url = url
+        self.section_id = url.split("#")[1]
+
+# function to construct the degree plan URL of a major for a catalog year
+def build_degree_plan_url(school, major, year):
+    formatted_major = major.lower().replace(" ", "-")
+    return f"{CATALOG_BASE_URL}/{year}/undergraduate/programs/{school}/{formatted_major}"
+
+# function to collect the course codes of every category of a degree plan page in catalog order,
+# the core curriculum page is fetched for the categories that link to it
+def collect_degree_plan_codes(html, year, revalidate=False):
+    core_items, major_codes, elective_requirements = parse_degree_page(html)
+
+    core_codes = {}
+    core_curriculum_soup = None
+
+    # this list will be used to store the courses that are part of the 090 Component Area Option
+    # the courses listed under the category on the site are not all that apply, any course with an asterisk next to it
+    # and the link to this section also should be counted as part of the 090 Component Area Option
+    component_area_codes = []
+
+    for category, items in core_items.items():
+        codes = core_codes[category] = []
+        for item in items:
+            if not isinstance(item, CoreCurriculumLink):
+                if item not in codes:
+                    codes.append(item)
+                continue
+
+            # Fetch the core curriculum page if it hasn't been fetched yet
+            if core_curriculum_soup is None:
+                core_curriculum_soup = fetch_core_curriculum_page(item.url, year, revalidate)
+
+            # Scrape the specific section of the core curriculum page
+            if core_curriculum_soup:
+                section_codes = scrape_core_curriculum_section(core_curriculum_soup, item.section_id, component_area_codes)
+
+                # Add the core courses to the current category and handle the 090 Component Area Option
+                for code in section_codes:
+                    if code not in codes:
+                        codes.append(code)
+
+    # append collected courses to the Component Area Option aka Core 090
+    component_area_key = next((key for key in core_codes if "Component Area Option" in key), None)
+    if component_area_key:
+        core_codes[component_area_key].extend(component_area_codes)
+
+    return core_codes, major_codes, elective_requirements
 
 # function to scrape the degree plan page
-def scrape_degree_plan(url, year):
+# courses whose page could not be fetched get empty requisites, without allow_partial the scrape fails (None) instead
+@metrics.span("scrape_degree_plan")
+def scrape_degree_plan(url, year, max_workers=DEFAULT_MAX_WORKERS, registry=None, allow_partial=True):
+    import requests
+
     print(f"Fetching degree plan from URL: {url}")
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        core_curriculum_section = soup.find("p", id="degree-requirements")
-        core_requirements = {}
-        major_requirements = {}
-        elective_requirements = {}
-
-        core_curriculum_soup = None
-
-        # this list will be used to store the courses that are part of the 090 Component Area Option
-        # the courses listed under the category on the site are not all that apply, any course with an asterisk next to it
-        # and the link to this section also should be counted as part of the 090 Component Area Option
-        component_area_courses = []
-
-        if core_curriculum_section:
-            current_category = ""
-            for sibling in core_curriculum_section.find_next_siblings():
-                # Category title
-                if sibling.name == "p" and "cat-reqg" in sibling.get("class", []):
-                    current_category = sibling.get_text(strip=True)
-                    core_requirements[current_category] = []
-
-                # Course information or link to core curriculum page
-                elif sibling.name == "p" and "cat-reqi" in sibling.get("class", []):
-                    course_info = sibling.get_text(strip=True)
-                    course_url = sibling.find("a", href=True)['href'] if sibling.find("a", href=True) else None
-
-                    # If the URL links to the core curriculum page, fetch courses from there
-                    if course_url and "/undergraduate/curriculum/core-curriculum" in course_url:
-                        section_id = course_url.split("#")[1]
-
-                        # Fetch the core curriculum page if it hasn't been fetched yet
-                        if core_curriculum_soup is None:
-                            core_curriculum_soup = fetch_core_curriculum_page(course_url)
-
-                        # Scrape the specific section of the core curriculum page
-                        if core_curriculum_soup:
-                            core_courses = scrape_core_curriculum_section(core_curriculum_soup, section_id, year, component_area_courses)
-
-                            # Add the core courses to the current category and handle the 090 Component Area Option
-                            for course in core_courses:
-                                if course not in core_requirements[current_category]:
-                                    core_requirements[current_category].append(course)
-
-                    else:
-                        # Direct course info, append the parsed course
-                        course_code_match = re.match(r"([A-Z]+\s+\d+)", course_info)
-                        code = course_code_match.group(1) if course_code_match else None
-                        if code:
-                            course_entry = {
-                                "course_info": code,
-                                **scrape_course_prerequisites(code, year)
-                            }
-                            if course_entry not in core_requirements[current_category]:
-                                core_requirements[current_category].append(course_entry)
-
-                # Break on reaching the next section
-                elif sibling.name == "p" and "cat-reqa" in sibling.get("class", []):
-                    break
-        
-        # append collected courses to the Component Area Option aka Core 090
-        component_area_key = next((key for key in core_requirements if "Component Area Option" in key), None)
-        if component_area_key:
-            core_requirements[component_area_key].extend(component_area_courses)
-
-        # extract the major specific requirements, no external fetching needed for this section
-        major_requirements_section = soup.find("p", text="II. Major Requirements: 72 semester credit hours")
-
-        if major_requirements_section:
-            for sibling in major_requirements_section.find_next_siblings():
-                if sibling.name == "p" and "cat-reqg" in sibling.get("class", []):
-                    current_category = sibling.get_text(strip=True)
-                    major_requirements[current_category] = []
-                elif sibling.name == "p" and "cat-reqi" in sibling.get("class", []):
-                    course_info = sibling.get_text(strip=True)
-                    course_url = sibling.find("a", href=True)['href'] if sibling.find("a", href=True) else None
-                    course_code_match = re.match(r"([A-Z]+\s+\d+)", course_info)
-                    code = course_code_match.group(1) if course_code_match else None
-                    if course_code_match:
-                        course_entry = {
-                            "course_info": code,
-                            **scrape_course_prerequisites(code, year)
-                        }
-                        if course_entry not in major_requirements[current_category]:
-                            major_requirements[current_category].append(course_entry)
-                elif sibling.name == "p" and "cat-reqa" in sibling.get("class", []):
-                    break
-
-        # parse elective section to find required credit hours
-        elective_requirements_section = soup.find("p", text=re.compile(r"Elective Requirements"))
-        if elective_requirements_section:
-            match = re.search(r"(\d+) semester credit hours", elective_requirements_section.get_text())
-            if match:
-                elective_credits_required = int(match.group(1))
-                elective_requirements = {"required_credit_hours": elective_credits_required}
+        # the page is walked first to collect the course codes of every category in catalog order,
+        # the course pages are then fetched concurrently and put back into the same structure
+        core_codes, major_codes, elective_requirements = collect_degree_plan_codes(fetch_page(url, year), year)
+
+        # fetch every course page collected above in parallel, the 090 courses and courses listed under
+        # several categories are looked up more than once but only scraped on the first lookup
+        if registry is None:
+            registry = CourseRequisiteRegistry()
+        all_codes = [code for codes in (*core_codes.values(), *major_codes.values()) for code in codes]
+        requisites = fetch_course_requisites(all_codes, year, max_workers, registry)
+        stats = registry.stats()
+        print(f"Course requisite registry: {stats['courses']} courses, {stats['hits']} hits, {stats['misses']} misses")
+        failed = [code for code, course in requisites.items() if course is None]
+        if failed:
+            print(f"Could not fetch the requisites of {len(failed)} courses: {', '.join(failed)}")
+            if not allow_partial:
+                return None
 
         # combine into one dictionary to represent the whole degree plan to return
         return {
-            "core_requirements": core_requirements,
-            "major_requirements": major_requirements,
+            "core_requirements": build_course_entries(core_codes, requisites),
+            "major_requirements": build_course_entries(major_codes, requisites),
             "elective_requirements": elective_requirements
         }
     
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching the degree plan: {e}")
+        return None
+
+# function to hash the raw HTML of a catalog page for the incremental scrape fingerprints
+def page_hash(html):
+    return hashlib.sha256(html).hexdigest()
+
+# function to fetch a course page and return its hash with the parsed requisites, None when the fetch fails
+def fetch_course_fingerprint(code, year, revalidate=False):
+    import requests
+
+    course_url = course_page_url(code, year)
+    try:
+        print(f"Fetching course prerequisites for course {code} from URL: {course_url}")
+        html = fetch_page(course_url, year, revalidate)
+        return {"page_hash": page_hash(html), **parse_course_page(html)}
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching course prerequisites from {course_url}: {e}")
+        return None
+
+# function to scrape a degree plan again using the fingerprint of the previous run saved at fingerprint_path
+# with check_courses (the default) the page of every course is checked and re-parsed only when its hash changed,
+# with the catalog cache an unchanged page costs a conditional request answered by 304. Without check_courses only
+# added courses and courses whose catalog cache entry expired (or is missing) are fetched, and the course codes
+# are taken from the fingerprint while the plan page did not change
+# every page is revalidated with a conditional request, a fresh catalog cache entry does not hide a change. Courses
+# whose fetch failed on an earlier run are fetched again. With a shared registry, a course page is fetched once
+# for all the plans listing it
+# returns (degree plan, change report) and saves the new fingerprint, the report's failed lists the courses whose page
+# could not be fetched and that have no earlier requisites to fall back on
+@metrics.span("scrape_degree_plan", mode="incremental")
+def scrape_degree_plan_incremental(url, year, fingerprint_path, check_courses=True, max_workers=DEFAULT_MAX_WORKERS,
+                                   registry=None):
+    import requests
+
+    print(f"Fetching degree plan from URL: {url}")
+    previous = load_fingerprint(fingerprint_path)
+    if previous and (previous.get("url") != url or previous.get("year") != str(year)):
+        previous = None
+    if registry is None:
+        registry = CourseRequisiteRegistry()
+
+    try:
+        html = fetch_page(url, year, revalidate=True)
+        plan_hash = page_hash(html)
+        report = {"plan_page_changed": previous is None or previous["plan_page_hash"] != plan_hash,
+                  "added": [], "removed": [], "changed": {}, "categories": {}, "failed": []}
+
+        if previous and not report["plan_page_changed"] and not check_courses:
+            categories = previous["categories"]
+            elective_requirements = previous["elective_requirements"]
+        else:
+            core_codes, major_codes, elective_requirements = collect_degree_plan_codes(html, year, revalidate=True)
+            categories = {"core_requirements": core_codes, "major_requirements": major_codes}
+
+        previous_courses = previous["courses"] if previous else {}
+        codes = list(dict.fromkeys(code for section in categories.values() for category_codes in section.values()
+                                   for code in category_codes))
+
+        # added courses and courses whose page could not be fetched before are always scraped, the others when
+        # their pages are checked or their cached page expired
+        to_fetch = [code for code in codes if check_courses or code not in previous_courses
+                    or previous_courses[code]["page_hash"] is None or course_page_expired(code, year)]
+        fetched = {}
+        if to_fetch:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(to_fetch)))) as executor:
+                fetched = dict(zip(to_fetch, executor.map(lambda code: registry.fingerprint(code, year), to_fetch)))
+
+        courses = {}
+        for code in codes:
+            before = previous_courses.get(code)
+            after = fetched.get(code) or before or {"page_hash": None, "prerequisites": [], "corequisites": []}
+            courses[code] = after
+            if after["page_hash"] is None:
+                report["failed"].append(code)
+            if before is None:
+                report["added"].append(code)
+            elif after["page_hash"] != before["page_hash"] and (
+                    after["prerequisites"] != before["prerequisites"] or after["corequisites"] != before["corequisites"]):
+                report["changed"][code] = {
+                    "before": {"prerequisites": before["prerequisites"], "corequisites": before["corequisites"]},
+                    "after": {"prerequisites": after["prerequisites"], "corequisites": after["corequisites"]},
+                }
+        report["removed"] = [code for code in previous_courses if code not in courses]
+
+        # courses moved between categories show up per category even when they stay in the plan
+        if previous:
+            for section, section_categories in categories.items():
+                previous_section = previous["categories"].get(section, {})
+                for category in dict.fromkeys([*previous_section, *section_categories]):
+                    before_codes = previous_section.get(category, [])
+                    after_codes = section_categories.get(category, [])
+                    added = [code for code in after_codes if code not in before_codes]
+                    removed = [code for code in before_codes if code not in after_codes]
+                    if added or removed:
+                        report["categories"][category] = {"added": added, "removed": removed}
+
+        save_fingerprint(fingerprint_path, {
+            "url": url,
+            "year": str(year),
+            "plan_page_hash": plan_hash,
+            "categories": categories,
+            "elective_requirements": elective_requirements,
+            "courses": courses,
+        })
+
+        requisites = {code: {"prerequisites": course["prerequisites"], "corequisites": course["corequisites"]}
+                      for code, course in courses.items()}
+        degree_plan = {
+            "core_requirements": build_course_entries(categories["core_requirements"], requisites),
+            "major_requirements": build_course_entries(categories["major_requirements"], requisites),
+            "elective_requirements": elective_requirements
+        }
+        print(f"Incremental scrape: {len(fetched)} course pages fetched, {len(report['added'])} added, "
+              f"{len(report['removed'])} removed, {len(report['changed'])} changed, {len(report['failed'])} failed")
+        return degree_plan, report
+
     except requests.exceptions.RequestException as e:
         print(f"Error fetching the degree plan: {e}")
         return None, None
 
+# function to check whether the catalog cache has no fresh copy of a course page, False without a catalog cache
+# (nothing tells when a page was fetched) and offline (nothing can be fetched)
+def course_page_expired(code, year):
+    cache = _catalog_cache
+    if cache is None or cache.offline:
+        return False
+    entry = cache.get(course_page_url(code, year), year)
+    return entry is None or not cache.is_fresh(entry)
+
+# function to read the fingerprint of a previous incremental scrape, None when there is none
+def load_fingerprint(path):
+    try:
+        with open(path, "r") as fingerprint_file:
+            return json.load(fingerprint_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
 
+def save_fingerprint(path, fingerprint):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as fingerprint_file:
+        json.dump(fingerprint, fingerprint_file)
+    os.replace(temp_path, path)
 
 # function to fetch and store the HTML for the core curriculum page
-def fetch_core_curriculum_page(url):
-    full_url = "https://catalog.utdallas.edu" + url
+def fetch_core_curriculum_page(url, year, revalidate=False):
+    import requests
+    from bs4 import BeautifulSoup
+
+    full_url = CATALOG_BASE_URL + url.split("#")[0]
     try:
-        response = requests.get(full_url)
-        response.raise_for_status()
-        return BeautifulSoup(response.content, 'html.parser')  # Return the soup object
+        html = fetch_page(full_url, year, revalidate)
+        with metrics.span("catalog_parse", page="core"):
+            return BeautifulSoup(html, HTML_PARSER)  # Return the soup object
     except requests.exceptions.RequestException as e:
         print(f"Error scraping the core curriculum page: {e}")
         return None
 
-# function to scrape a specific section from the core curriculum page
-def scrape_core_curriculum_section(soup, section_id, year, component_area_courses):
-    core_courses = []
+# function to collect the course codes of a specific section from the core curriculum page
+def scrape_core_curriculum_section(soup, section_id, component_area_codes):
+    core_codes = []
     core_section = soup.find(id=section_id)
 
     if core_section:
@@ -232,14 +568,8 @@ def scrape_core_curriculum_section(soup, section_id, year, component_area_course
                     # Detect asterisk for Component Area Option (090)
                     asterisk = sibling.find('a', href=True, text="*")
                     if asterisk and "090-component-area" in asterisk.get("href"):
-                        component_area_courses.append({
-                            "course_info": course_code_formatted,
-                            **scrape_course_prerequisites(course_code_formatted, year)
-                        })
+                        component_area_codes.append(course_code_formatted)
                     
-                    core_courses.append({
-                        "course_info": course_code_formatted,
-                        **scrape_course_prerequisites(course_code_formatted, year)
-                    })
+                    core_codes.append(course_code_formatted)
 
-    return core_courses
\ No newline at end of file
+    return core_codes
\ No newline at end of file
@@ -1,53 +1,117 @@
+import argparse
+import contextlib
 import json
-import time
-from transcript_parser import extract_transcript_data
-from degree_scraper import scrape_degree_plan
+import os
+import metrics
+from degree_scraper import build_degree_plan_url, scrape_degree_plan, set_catalog_cache
 from degree_plan_evaluator import DegreePlanEvaluator
+from plan_store import DEFAULT_PLAN_STORE, PlanStore
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Evaluate a UTD transcript against its degree plan.")
+    parser.add_argument("pdf_path", nargs="?", default="SSR_TSRPT.pdf", help="path to the unofficial transcript PDF")
+    parser.add_argument("--transcript-json", help="evaluate a transcript parsed by an earlier run (transcript_data.json) instead of a PDF")
+    parser.add_argument("--cache", help="path of the on-disk catalog cache (default: ~/.cache/utd-transcript-parser/catalog.sqlite3)")
+    parser.add_argument("--no-cache", action="store_true", help="always fetch catalog pages from the network")
+    parser.add_argument("--plans", default=DEFAULT_PLAN_STORE, help="directory of the compiled degree plan store")
+    parser.add_argument("--offline", action="store_true", help="only use cached catalog pages, fail if one is missing")
+    parser.add_argument("--transcript-cache", help="path of the parsed transcript cache (default: ~/.cache/utd-transcript-parser/transcripts.sqlite3)")
+    parser.add_argument("--no-transcript-cache", action="store_true", help="always parse the transcript PDF")
+    parser.add_argument("--pdf-backend", choices=["auto", "pypdfium2", "pdfminer", "pdfplumber"],
+                        help="PDF text extraction backend (default: $UTD_PDF_BACKEND or auto)")
+    parser.add_argument("--page-workers", type=int, default=os.cpu_count() or 1,
+                        help="processes extracting the pages of a long transcript in parallel (default: number of cores, 1 disables)")
+    parser.add_argument("--schedule", action="store_true", help="also plan the remaining courses term by term (saved to schedule_plan.json)")
+    parser.add_argument("--max-credits", type=int, default=15, help="credit hour cap of a planned term (default: 15)")
+    parser.add_argument("--what-if", action="store_true", help="also show the completion of the transcript against every stored major of its catalog year")
+    parser.add_argument("--metrics", help="write the run's metrics to this file (.prom/.txt for Prometheus text, JSON otherwise)")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"], help="profile the run (default: $UTD_PROFILE)")
+    parser.add_argument("--profile-output", help="file for the profile (cProfile stats or pyinstrument HTML), printed otherwise")
+    return parser.parse_args()
 
 # Main function to load and process transcript, then fetch degree plan
 def main():
-    pdf_path = "SSR_TSRPT.pdf"
+    args = parse_args()
+    with metrics.profile(args.profile, args.profile_output):
+        run(args)
+
+    # the stage timings of the run, recorded by the instrumented modules
+    print("Stage timings:")
+    print(metrics.METRICS.summary())
+    if args.metrics:
+        metrics.METRICS.write(args.metrics)
+        print(f"Metrics saved to '{args.metrics}'.")
 
-    # extract transcript data
-    start_time = time.time()
-    transcript_data = extract_transcript_data(pdf_path)
-    end_time = time.time()
-    print(f"Transcript parsing took {round(end_time - start_time, 2)} seconds")
+def run(args):
+    if args.offline and args.no_cache:
+        print("Error: --offline needs the catalog cache, it cannot be combined with --no-cache.")
+        return
+
+    if args.transcript_json:
+        # evaluate-only run, pdfplumber is never loaded
+        with open(args.transcript_json, "r") as transcript_file:
+            transcript_data = json.load(transcript_file)
+    else:
+        # a PDF parsed before (same bytes, same parser version) is served from the transcript cache without opening it
+        from transcript_cache import DEFAULT_TRANSCRIPT_CACHE_PATH, TranscriptCache, load_transcript
+        transcript_cache = None
+        if not args.no_transcript_cache:
+            transcript_cache = TranscriptCache(args.transcript_cache or DEFAULT_TRANSCRIPT_CACHE_PATH)
 
-    # TEMP: save transcript data to a JSON file for reference
-    with open("transcript_data.json", "w") as transcript_file:
-        json.dump(transcript_data, transcript_file, indent=4)
+        # extract transcript data
+        extraction = {}
+        # the worker processes are only started when the transcript is long enough to be split into page ranges
+        if args.page_workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            page_pool = ProcessPoolExecutor(max_workers=args.page_workers)
+        else:
+            page_pool = contextlib.nullcontext()
+        with page_pool as page_executor:
+            transcript_data, cached = load_transcript(args.pdf_path, transcript_cache, backend=args.pdf_backend,
+                                                      report=extraction, page_executor=page_executor)
+        if transcript_cache is not None:
+            transcript_cache.close()
+        if cached:
+            print("Transcript loaded from the transcript cache.")
+        else:
+            fallback = f" after {extraction['fallback_from']} fell back" if extraction['fallback_from'] else ""
+            ranges = f" from {extraction['page_ranges']} page ranges" if extraction['page_ranges'] else ""
+            print(f"Transcript text extracted with {extraction['backend']}{fallback}{ranges} in {extraction['extract_seconds']:.3f} s.")
+
+        # TEMP: save transcript data to a JSON file for reference
+        with open("transcript_data.json", "w") as transcript_file:
+            json.dump(transcript_data, transcript_file, separators=(",", ":"))
 
     # build the degree plan URL for the student's corresponding major
     major = transcript_data['major']
     school = transcript_data['school']
     program_start_date = transcript_data['program_start_date']
-
-    # function to construct the degree plan URL
-    formatted_major = major.lower().replace(" ", "-")
     year = program_start_date.split("-")[0]
-    url = f"https://catalog.utdallas.edu/{year}/undergraduate/programs/{school}/{formatted_major}"
-
-    # commented to test the degree plan completion without the need to scrape the website, results are saved in degree_plan_data.json
-    # scrape the degree plan from the URL
-    start_time = time.time()
-    degree_plan_data = scrape_degree_plan(url, year)
-    end_time = time.time()
-    print(f"Degree plan retrieval took {round(end_time - start_time, 2)} seconds")
-
-    if degree_plan_data:
-        with open("degree_plan_data.json", "w") as degree_plan_file:
-            json.dump(degree_plan_data, degree_plan_file, indent=4)
-        print("Degree plan data saved to 'degree_plan_data.json'.")
-    else:
-        print("Failed to fetch degree plan. Loading from existing JSON file.")
+
+    # load the compiled plan for this major and year from the plan store, scrape it only when it is not there yet
+    plan_store = PlanStore(args.plans)
+    degree_plan_data = plan_store.load(school, major, year)
+    if degree_plan_data is None:
+        # the catalog cache, requests and bs4 are only loaded when the plan has to be scraped
+        from catalog_cache import CatalogCache, CatalogCacheMiss, DEFAULT_CACHE_PATH
+        if not args.no_cache:
+            set_catalog_cache(CatalogCache(args.cache or DEFAULT_CACHE_PATH, offline=args.offline))
+
+        url = build_degree_plan_url(school, major, year)
         try:
-            with open("degree_plan_data.json", "r") as degree_plan_file:
-                degree_plan_data = json.load(degree_plan_file)
-            print("Degree plan data successfully loaded from 'degree_plan_data.json'.")
-        except FileNotFoundError:
-            print("Error: No degree plan data found. Please ensure scraping works.")
+            scraped_plan = scrape_degree_plan(url, year)
+        except CatalogCacheMiss as e:
+            print(f"Error: running offline and {e}.")
+            return
+        if not scraped_plan:
+            print(f"Error: failed to fetch the {year} degree plan for {major}.")
             return
+        degree_plan_data = plan_store.save(school, major, year, scraped_plan)
+        print(f"Degree plan saved to '{plan_store.path(school, major, year)}'.")
+
+    # TEMP: save degree plan data to a JSON file for reference
+    with open("degree_plan_data.json", "w") as degree_plan_file:
+        json.dump(degree_plan_data.degree_plan, degree_plan_file, separators=(",", ":"))
 
     # initialize DegreePlanEvaluator with transcript and degree plan data
     print("Initializing DegreePlanEvaluator...")
@@ -60,7 +124,7 @@ def main():
 
     # save category completion data to JSON
     with open("category_completion.json", "w") as category_file:
-        json.dump(category_completion, category_file, indent=4)
+        json.dump(category_completion, category_file, separators=(",", ":"))
     print("Category completion data saved to 'category_completion.json'.")
 
     # recommend courses for the next semester
@@ -70,8 +134,29 @@ def main():
 
     # Save recommended courses to JSON for reference
     with open("recommended_courses.json", "w") as recommended_file:
-        json.dump(recommended_courses, recommended_file, indent=4)
+        json.dump(recommended_courses, recommended_file, separators=(",", ":"))
     print("Recommended courses data saved to 'recommended_courses.json'.")
+
+    # term by term plan of the remaining courses
+    if args.schedule:
+        from schedule_planner import SchedulePlanner
+        schedule = SchedulePlanner(degree_plan_data).plan_terms(evaluator.completed_courses, args.max_credits)
+        for term in schedule['terms']:
+            print(f"Term {term['term']} ({term['credit_hours']} hours): {', '.join(term['courses'])}")
+        if schedule['unscheduled']:
+            print("Courses that cannot be scheduled:", schedule['unscheduled'])
+        for category_name, hours in schedule['uncovered_hours'].items():
+            print(f"{hours} hours of '{category_name}' are not covered by the courses the plan lists.")
+        with open("schedule_plan.json", "w") as schedule_file:
+            json.dump(schedule, schedule_file, separators=(",", ":"))
+        print("Schedule plan saved to 'schedule_plan.json'.")
+
+    # completion against every other major of the year, from the plans already in the store (see catalog_crawler.py)
+    if args.what_if:
+        from what_if import WhatIfIndex, print_what_if
+        what_if_index = WhatIfIndex.from_store(plan_store, year)
+        print(f"What-if completion against the {len(what_if_index.plans)} stored {year} plans:")
+        print_what_if(what_if_index.evaluate_transcript(transcript_data), major)
     
 
 
@@ -0,0 +1,268 @@
+import bisect
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+
+# process wide instrumentation shared by every module: counters, histograms and timed spans, exported as a JSON
+# report or in the Prometheus text format, plus an optional profiler switched on per run
+#
+#   with metrics.span("transcript_parse"):        -> histogram transcript_parse_seconds
+#   metrics.count("catalog_cache_requests", result="hit")
+#   metrics.observe("catalog_fetch_bytes", len(body), buckets=metrics.BYTE_BUCKETS)
+#
+# only coarse stages are instrumented (a page, a URL, an evaluator phase), never single lines, so the overhead of
+# a lock and a perf_counter call per observation stays far below the work being measured
+
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# per-URL fetch events kept for the JSON report, the oldest are dropped once the limit is reached
+MAX_EVENTS = 10000
+
+# environment variable naming the profiler of a run (cprofile or pyinstrument), see profile()
+PROFILE_ENV = "UTD_PROFILE"
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, fraction):
+        """Upper bound of the bucket holding the quantile, the max for the overflow bucket."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.bucket_counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return self.buckets[index] if index < len(self.buckets) else self.max
+        return self.max
+
+    def merge(self, other):
+        for index, bucket_count in enumerate(other.bucket_counts):
+            self.bucket_counts[index] += bucket_count
+        self.count += other.count
+        self.sum += other.sum
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+
+class Metrics:
+    """Thread safe store of counters, histograms and fetch events, keyed by name and label values."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.events = []
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=DURATION_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def event(self, kind, **fields):
+        with self._lock:
+            if len(self.events) >= MAX_EVENTS:
+                del self.events[:MAX_EVENTS // 10]
+            self.events.append({"kind": kind, **fields})
+
+    @contextlib.contextmanager
+    def span(self, name, **labels):
+        """Time the block into the <name>_seconds histogram, failed blocks are counted in <name>_errors_total."""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.count(name + "_errors_total", **labels)
+            raise
+        finally:
+            self.observe(name + "_seconds", time.perf_counter() - start, **labels)
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+            self.events = []
+
+    def merge(self, other):
+        """Add the observations of another Metrics (i.e. one returned by a worker process) into this one."""
+        with self._lock:
+            for key, value in other.counters.items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            for key, histogram in other.histograms.items():
+                if key in self.histograms:
+                    self.histograms[key].merge(histogram)
+                else:
+                    merged = self.histograms[key] = Histogram(histogram.buckets)
+                    merged.merge(histogram)
+            self.events.extend(other.events)
+
+    def snapshot(self):
+        """Return a copy that can be pickled to another process and merged there."""
+        copy = Metrics()
+        copy.merge(self)
+        return copy
+
+    def __getstate__(self):
+        with self._lock:
+            return {"counters": self.counters, "histograms": self.histograms, "events": self.events}
+
+    def __setstate__(self, state):
+        self._lock = threading.Lock()
+        self.__dict__.update(state)
+
+    def report(self):
+        """Return the metrics as a JSON serializable dict."""
+        with self._lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self.counters.items())]
+            histograms = []
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                histograms.append({
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "mean": histogram.sum / histogram.count if histogram.count else None,
+                    "min": histogram.min,
+                    "max": histogram.max,
+                    "p50": histogram.quantile(0.50),
+                    "p90": histogram.quantile(0.90),
+                    "p99": histogram.quantile(0.99),
+                })
+            return {"counters": counters, "histograms": histograms, "events": list(self.events)}
+
+    def prometheus(self, prefix="utd_"):
+        """Return the counters and histograms in the Prometheus text exposition format."""
+        def label_text(labels, extra=()):
+            pairs = [*labels, *extra]
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{key}="{str(value)}"' for key, value in pairs) + "}"
+
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                full_name = prefix + name
+                if full_name not in typed:
+                    lines.append(f"# TYPE {full_name} counter")
+                    typed.add(full_name)
+                lines.append(f"{full_name}{label_text(labels)} {value}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                full_name = prefix + name
+                if full_name not in typed:
+                    lines.append(f"# TYPE {full_name} histogram")
+                    typed.add(full_name)
+                cumulative = 0
+                for bound, bucket_count in zip((*histogram.buckets, "+Inf"), histogram.bucket_counts):
+                    cumulative += bucket_count
+                    lines.append(f"{full_name}_bucket{label_text(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{full_name}_sum{label_text(labels)} {histogram.sum}")
+                lines.append(f"{full_name}_count{label_text(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write the report to path, in the Prometheus format for .prom/.txt files and as JSON otherwise."""
+        text = self.prometheus() if path.endswith((".prom", ".txt")) else json.dumps(self.report(), indent=2)
+        with open(path, "w") as file:
+            file.write(text)
+
+    def summary(self):
+        """One line per histogram with its count and timings, for printing at the end of a run."""
+        lines = []
+        for histogram in self.report()["histograms"]:
+            labels = ",".join(f"{key}={value}" for key, value in histogram["labels"].items())
+            name = histogram["name"] + (f"{{{labels}}}" if labels else "")
+            if histogram["name"].endswith("_seconds"):
+                lines.append(f"{name:<58} n={histogram['count']:<6} total {histogram['sum']:8.3f} s  "
+                             f"mean {histogram['mean'] * 1000:9.3f} ms  max {histogram['max'] * 1000:9.3f} ms")
+            else:
+                lines.append(f"{name:<58} n={histogram['count']:<6} total {histogram['sum']:12.0f}  "
+                             f"mean {histogram['mean']:12.1f}")
+        return "\n".join(lines)
+
+
+# the metrics of this process, every module records into it
+METRICS = Metrics()
+
+count = METRICS.count
+observe = METRICS.observe
+event = METRICS.event
+span = METRICS.span
+
+
+@contextlib.contextmanager
+def profile(mode=None, output=None):
+    """Profile the block with cProfile or pyinstrument, mode defaults to the UTD_PROFILE environment variable.
+
+    cProfile stats are dumped to output (readable with pstats or snakeviz) or the top functions are printed to
+    stderr, pyinstrument writes an HTML report to output or prints its text report. With no mode this does nothing.
+    """
+    mode = mode or os.environ.get(PROFILE_ENV)
+    if not mode:
+        yield
+        return
+
+    if mode == "cprofile":
+        import cProfile
+        import pstats
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            if output:
+                profiler.dump_stats(output)
+            else:
+                stream = io.StringIO()
+                pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(30)
+                print(stream.getvalue(), file=sys.stderr)
+    elif mode == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise RuntimeError("pyinstrument is not installed, use --profile cprofile or pip install pyinstrument")
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            if output:
+                with open(output, "w") as file:
+                    file.write(profiler.output_html())
+            else:
+                print(profiler.output_text(), file=sys.stderr)
+    else:
+        raise ValueError(f"unknown profiler {mode!r}, use cprofile or pyinstrument")
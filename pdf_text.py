@@ -0,0 +1,212 @@
+import importlib.metadata
+import importlib.util
+import io
+import itertools
+import os
+import time
+
+# text extraction backends for transcript PDFs, each one yields the text of every page with one line per text row
+# and the fields of a row joined by single spaces, the way pdfplumber's extract_text lays the transcript out
+#
+#   pypdfium2   PDFium's text layer, by far the fastest, used when it is installed
+#   pdfminer    pdfminer's interpreter without layout analysis, characters are grouped into rows by baseline here
+#   pdfplumber  the reference extractor, about 3-4x slower than pdfminer on the transcript (it builds a dict per
+#               character and clusters words before lines), used as the fallback of the fast backends
+#
+# every library is imported when a PDF is read, none of them is loaded by importing this module
+
+PYPDFIUM2 = "pypdfium2"
+PDFMINER = "pdfminer"
+PDFPLUMBER = "pdfplumber"
+AUTO = "auto"
+
+# fast backends in order of preference, the first installed one is tried before pdfplumber
+FAST_BACKENDS = (PYPDFIUM2, PDFMINER)
+
+# environment variable overriding the default backend of a run (auto, pypdfium2, pdfminer or pdfplumber)
+BACKEND_ENV = "UTD_PDF_BACKEND"
+
+# distribution of every backend's library, for the version that goes into the transcript cache key
+DISTRIBUTIONS = {PYPDFIUM2: "pypdfium2", PDFMINER: "pdfminer.six", PDFPLUMBER: "pdfplumber"}
+
+# characters further apart than this (in points) are separated by a space, pdfplumber's default x_tolerance
+WORD_GAP = 3
+# characters whose baselines round to the same point are on the same row
+ROW_PRECISION = 0
+
+
+def installed(backend):
+    return importlib.util.find_spec(backend) is not None
+
+
+# function to pick the fast backend tried first in auto mode, None when only pdfplumber is installed
+def fast_backend():
+    for backend in FAST_BACKENDS:
+        if installed(backend):
+            return backend
+    return None
+
+
+def default_backend():
+    return os.environ.get(BACKEND_ENV) or AUTO
+
+
+# function to return the installed version of a backend's library (read from its metadata, it is not imported)
+def library_version(backend):
+    try:
+        return importlib.metadata.version(DISTRIBUTIONS[backend])
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+# function to describe what extracts the text with the backend setting (None for the default), i.e.
+# "auto:pypdfium2-5.14.0,pdfplumber-0.11.10". In auto mode the fast backend and the pdfplumber fallback are both named
+# since either one may produce the text
+def extraction_key(backend=None):
+    backend = backend or default_backend()
+    if backend == AUTO:
+        backends = [candidate for candidate in (fast_backend(), PDFPLUMBER) if candidate]
+    else:
+        backends = [backend]
+    return backend + ":" + ",".join(f"{candidate}-{library_version(candidate)}" for candidate in backends)
+
+
+# a file object is rewound before every read so a fallback backend can read it again
+def rewind(pdf_source):
+    if hasattr(pdf_source, "seek"):
+        pdf_source.seek(0)
+    return pdf_source
+
+
+# every extractor yields the pages from start up to stop (None for the last page), see extract_page_range
+def pypdfium2_pages(pdf_source, start=0, stop=None):
+    import pypdfium2
+
+    source = rewind(pdf_source)
+    if hasattr(source, "read"):
+        source = source.read()
+    document = pypdfium2.PdfDocument(source)
+    try:
+        for index in range(start, len(document) if stop is None else min(stop, len(document))):
+            page = document[index]
+            text_page = page.get_textpage()
+            text = text_page.get_text_range()
+            text_page.close()
+            page.close()
+            # PDFium ends rows with \r\n and may keep trailing blanks of a row
+            yield "\n".join(line.rstrip() for line in text.splitlines())
+    finally:
+        document.close()
+
+
+# function to join the characters of one page into rows top to bottom, inserting a space at every gap between fields
+def chars_to_text(chars):
+    rows = {}
+    for char in chars:
+        rows.setdefault(round(char.y1, ROW_PRECISION), []).append(char)
+
+    lines = []
+    for baseline in sorted(rows, reverse=True):
+        parts = []
+        previous_x1 = None
+        for char in sorted(rows[baseline], key=lambda char: char.x0):
+            if previous_x1 is not None and char.x0 - previous_x1 > WORD_GAP and parts[-1] != " ":
+                parts.append(" ")
+            parts.append(char.get_text())
+            previous_x1 = char.x1
+        lines.append("".join(parts))
+    return "\n".join(lines)
+
+
+def pdfminer_pages(pdf_source, start=0, stop=None):
+    from pdfminer.converter import PDFPageAggregator
+    from pdfminer.layout import LTChar
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFParser
+
+    source = rewind(pdf_source)
+    file = source if hasattr(source, "read") else open(source, "rb")
+    try:
+        document = PDFDocument(PDFParser(file))
+        resources = PDFResourceManager(caching=True)
+        # laparams=None skips pdfminer's layout analysis, the page is only a flat list of characters
+        device = PDFPageAggregator(resources, laparams=None)
+        interpreter = PDFPageInterpreter(resources, device)
+        # pages before start are skipped without running the interpreter on them
+        for page in itertools.islice(PDFPage.create_pages(document), start, stop):
+            interpreter.process_page(page)
+            yield chars_to_text(item for item in device.get_result() if isinstance(item, LTChar))
+    finally:
+        if file is not source:
+            file.close()
+
+
+def pdfplumber_pages(pdf_source, start=0, stop=None):
+    import pdfplumber
+
+    with pdfplumber.open(rewind(pdf_source)) as pdf:
+        for page in pdf.pages[start:stop]:
+            yield page.extract_text() or ""
+
+
+PAGE_EXTRACTORS = {
+    PYPDFIUM2: pypdfium2_pages,
+    PDFMINER: pdfminer_pages,
+    PDFPLUMBER: pdfplumber_pages,
+}
+
+
+# function to yield the text of every page of the PDF (a path or a binary file object) with the given backend
+def iter_page_texts(pdf_source, backend=PDFPLUMBER, start=0, stop=None):
+    extractor = PAGE_EXTRACTORS.get(backend)
+    if extractor is None:
+        raise ValueError(f"unknown PDF backend {backend!r}, use {AUTO}, {', '.join(PAGE_EXTRACTORS)}")
+    return extractor(pdf_source, start, stop)
+
+
+# function to count the pages of the PDF without extracting any text, with the cheapest installed library
+def page_count(pdf_source):
+    source = rewind(pdf_source)
+    if installed(PYPDFIUM2):
+        import pypdfium2
+
+        document = pypdfium2.PdfDocument(source.read() if hasattr(source, "read") else source)
+        try:
+            return len(document)
+        finally:
+            document.close()
+
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFParser
+
+    file = source if hasattr(source, "read") else open(source, "rb")
+    try:
+        return sum(1 for _ in PDFPage.create_pages(PDFDocument(PDFParser(file))))
+    finally:
+        if file is not source:
+            file.close()
+
+
+# function to make a PDF source that can be sent to a worker process: paths are kept, file objects are read
+def portable_source(pdf_source):
+    source = rewind(pdf_source)
+    return source.read() if hasattr(source, "read") else source
+
+
+# runs in a worker process of a page-parallel extraction, returns (page texts, seconds spent extracting each page)
+# the worker records no metrics of its own, the caller observes the page timings in its process
+def extract_page_range(pdf_source, backend, start, stop):
+    source = io.BytesIO(pdf_source) if isinstance(pdf_source, bytes) else pdf_source
+    texts = []
+    page_seconds = []
+    pages = iter_page_texts(source, backend, start, stop)
+    while True:
+        begin = time.perf_counter()
+        page_text = next(pages, None)
+        if page_text is None:
+            return texts, page_seconds
+        page_seconds.append(time.perf_counter() - begin)
+        texts.append(page_text)
@@ -0,0 +1,229 @@
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import mmap
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+import metrics
+from degree_plan_evaluator import CompiledDegreePlan, compile_degree_plan
+
+# store of compiled degree plans, one versioned artifact per (school, major, catalog year), so request-time
+# evaluation loads a plan from disk instead of scraping the catalog
+
+DEFAULT_PLAN_STORE = os.path.join(os.path.expanduser("~"), ".cache", "utd-transcript-parser", "plans")
+
+# bump whenever CompiledDegreePlan or the scraped plan shape changes, older artifacts are then rebuilt
+# 3: prerequisite groups come from the requisite expressions of requisites.py
+# 4: bare course numbers ("MATH 2413 or 2417") are no longer dropped from the requisite groups
+# 5: an "or" with a condition ("A or instructor consent") no longer requires its courses, level numbers are not courses
+SCHEMA_VERSION = 5
+
+ARTIFACT_MAGIC = b"UTDPLAN1"
+
+
+def plan_content_hash(degree_plan):
+    """Hash of the scraped plan data, equal for two scrapes that found the same requirements."""
+    return hashlib.sha256(json.dumps(degree_plan, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class PlanStore:
+    """Compiled plan artifacts on disk.
+
+    Each artifact is the magic bytes, one JSON header line (schema version, key, content hash of the plan and
+    hash of the payload) and the pickled CompiledDegreePlan. Artifacts are written by this project only, never
+    load a store directory from an untrusted source.
+    """
+
+    def __init__(self, root=DEFAULT_PLAN_STORE):
+        self.root = root
+        self._loaded = {}
+
+    def path(self, school, major, year):
+        formatted_major = major.lower().replace(" ", "-")
+        return os.path.join(self.root, str(year), school, formatted_major + ".plan")
+
+    def fingerprint_path(self, school, major, year):
+        """Path of the incremental scrape fingerprint kept next to the artifact."""
+        return os.path.splitext(self.path(school, major, year))[0] + ".fingerprint.json"
+
+    @metrics.span("plan_store_save")
+    def save(self, school, major, year, degree_plan):
+        """Compile and store the plan, returns the CompiledDegreePlan."""
+        compiled = compile_degree_plan(degree_plan)
+        payload = pickle.dumps(compiled, protocol=pickle.HIGHEST_PROTOCOL)
+        header = {
+            "schema_version": SCHEMA_VERSION,
+            "school": school,
+            "major": major,
+            "year": str(year),
+            "content_hash": plan_content_hash(compiled.degree_plan),
+            "payload_hash": hashlib.sha256(payload).hexdigest(),
+            "created": time.time(),
+        }
+
+        path = self.path(school, major, year)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # written to a temporary file first so a reader never sees a half written artifact
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(ARTIFACT_MAGIC)
+                file.write(json.dumps(header).encode("utf-8") + b"\n")
+                file.write(payload)
+            os.replace(temp_path, path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temp_path)
+            raise
+
+        self._loaded[path] = (os.stat(path).st_mtime_ns, compiled)
+        return compiled
+
+    def read_header(self, school, major, year):
+        """Return the JSON header of the artifact, or None if there is none."""
+        try:
+            with open(self.path(school, major, year), "rb") as file:
+                if file.read(len(ARTIFACT_MAGIC)) != ARTIFACT_MAGIC:
+                    return None
+                return json.loads(file.readline())
+        except FileNotFoundError:
+            return None
+
+    def load(self, school, major, year):
+        """Return the CompiledDegreePlan for the key, or None if it is missing, outdated or corrupt."""
+        compiled, result = self._load(school, major, year)
+        metrics.count("plan_store_loads_total", result=result)
+        return compiled
+
+    def _load(self, school, major, year):
+        # returns (compiled plan or None, how the load went) for the load counters
+        path = self.path(school, major, year)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None, "missing"
+
+        # plans already loaded by this process are reused until the artifact changes on disk
+        loaded = self._loaded.get(path)
+        if loaded and loaded[0] == mtime:
+            return loaded[1], "memory"
+
+        try:
+            with metrics.span("plan_store_read"), open(path, "rb") as file, \
+                    mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if mapped[:len(ARTIFACT_MAGIC)] != ARTIFACT_MAGIC:
+                    return None, "invalid"
+                header_end = mapped.find(b"\n", len(ARTIFACT_MAGIC))
+                if header_end == -1:
+                    return None, "invalid"
+                header = json.loads(mapped[len(ARTIFACT_MAGIC):header_end])
+                if not isinstance(header, dict):
+                    return None, "invalid"
+                if header.get("schema_version") != SCHEMA_VERSION:
+                    return None, "outdated"
+
+                with memoryview(mapped)[header_end + 1:] as payload:
+                    if hashlib.sha256(payload).hexdigest() != header.get("payload_hash"):
+                        return None, "invalid"
+                    compiled = pickle.loads(payload)
+        except ValueError:
+            # an empty file cannot be mapped, a header that is not JSON raises JSONDecodeError (a ValueError)
+            return None, "invalid"
+
+        if not isinstance(compiled, CompiledDegreePlan):
+            return None, "invalid"
+        self._loaded[path] = (mtime, compiled)
+        return compiled, "disk"
+
+
+def parse_years(text):
+    """Parse "2021-2024" or "2021,2023" into a list of years."""
+    years = []
+    for part in text.split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            years.extend(range(int(first), int(last) + 1))
+        else:
+            years.append(int(part))
+    return years
+
+
+# function to scrape one plan into the store, returns "up to date", "unchanged", "built" or "failed"
+# with incremental, an existing plan is re-scraped against its fingerprint and only rewritten when it changed
+# a plan with a course page that could not be fetched is not stored, it would pass as up to date on later runs
+# with the requisites of that course missing
+def build_plan(store, school, major, year, registry=None, force=False, incremental=False):
+    from degree_scraper import build_degree_plan_url, scrape_degree_plan, scrape_degree_plan_incremental
+
+    existing = store.load(school, major, year)
+    if not force and not incremental and existing is not None:
+        return "up to date"
+
+    url = build_degree_plan_url(school, major, year)
+    if incremental:
+        degree_plan, report = scrape_degree_plan_incremental(
+            url, year, store.fingerprint_path(school, major, year), registry=registry)
+        if report and report["failed"]:
+            return "failed"
+    else:
+        degree_plan = scrape_degree_plan(url, year, registry=registry, allow_partial=False)
+
+    if (incremental and not force and degree_plan and existing is not None
+            and plan_content_hash(degree_plan) == plan_content_hash(existing.degree_plan)):
+        return "unchanged"
+    if degree_plan and (degree_plan["core_requirements"] or degree_plan["major_requirements"]):
+        store.save(school, major, year, degree_plan)
+        return "built"
+    return "failed"
+
+
+# function to scrape every major of school_mapping for the given years into the store ahead of time, one plan
+# after the other (see catalog_crawler.py for a concurrent and resumable crawl)
+def prebuild(store, years, majors=None, force=False, quiet=True, incremental=False):
+    from degree_scraper import CourseRequisiteRegistry
+    from transcript_parser import school_mapping
+
+    # courses like MATH 2413 show up in most plans of a year, they are scraped once for all of them
+    registry = CourseRequisiteRegistry()
+    results = []
+    for year in years:
+        for major, school in school_mapping.items():
+            if majors and major not in majors:
+                continue
+            with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+                status = build_plan(store, school, major, year, registry, force, incremental)
+            results.append((school, major, year, status))
+            if status != "up to date":
+                print(f"{year} {school}/{major}: {status}", file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the compiled degree plan store.")
+    parser.add_argument("--root", default=DEFAULT_PLAN_STORE, help="directory of the plan store")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    prebuild_parser = commands.add_parser("prebuild", help="scrape and compile every major for a range of catalog years")
+    prebuild_parser.add_argument("--years", required=True, type=parse_years, help='i.e. "2021-2024" or "2022,2024"')
+    prebuild_parser.add_argument("--major", action="append", help="only build this major (repeatable)")
+    prebuild_parser.add_argument("--force", action="store_true", help="rebuild artifacts that are already up to date")
+    prebuild_parser.add_argument("--incremental", action="store_true",
+                                 help="re-scrape existing plans against their fingerprints and rewrite the changed ones")
+
+    args = parser.parse_args()
+    store = PlanStore(args.root)
+    if args.command == "prebuild":
+        results = prebuild(store, args.years, args.major, args.force, incremental=args.incremental)
+        failed = sum(1 for result in results if result[3] == "failed")
+        print(f"{len(results) - failed}/{len(results)} plans in {store.root}", file=sys.stderr)
+        return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
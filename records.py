@@ -0,0 +1,196 @@
+import sys
+
+# compact records for the parsed transcripts and the compiled degree plans kept in memory, every record has
+# __slots__ instead of a per-object __dict__ and shares its strings (course codes, titles, grades) through
+# sys.intern, so thousands of transcripts naming the same courses hold one copy of every code
+#
+# the JSON files keep their dict shape, to_dict/from_dict convert between the two, and the records answer
+# record['key'] and record.get('key') for the dict keys so code written against the dict shape keeps working
+
+
+class CourseRow:
+    """One course line of a transcript."""
+
+    __slots__ = ('course_code', 'course_name', 'credits_attempted', 'credits_earned', 'grade')
+
+    def __init__(self, course_code, course_name, credits_attempted, credits_earned, grade):
+        self.course_code = sys.intern(course_code)
+        self.course_name = sys.intern(course_name)
+        self.credits_attempted = credits_attempted
+        self.credits_earned = credits_earned
+        self.grade = sys.intern(grade)
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def __eq__(self, other):
+        if not isinstance(other, CourseRow):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"CourseRow({self.course_code!r}, {self.course_name!r}, {self.grade!r})"
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['course_code'], data.get('course_name', ''), data.get('credits_attempted', 0.0),
+                   data.get('credits_earned', 0.0), data.get('grade', ''))
+
+
+class Requisite(tuple):
+    """Prerequisite or corequisite groups of a course, i.e. ((X, Y), (Z,)) for (X or Y) and Z.
+
+    A tuple of tuples of interned codes, equal requisites are shared through from_lists.
+    """
+
+    __slots__ = ()
+
+    # groups -> the shared Requisite, bounded by the number of distinct requisites in the catalog
+    _shared = {}
+
+    @classmethod
+    def from_lists(cls, groups):
+        key = tuple(tuple(sys.intern(code) for code in group) for group in groups)
+        requisite = cls._shared.get(key)
+        if requisite is None:
+            requisite = cls._shared.setdefault(key, cls(key))
+        return requisite
+
+    def to_lists(self):
+        return [list(group) for group in self]
+
+
+EMPTY_REQUISITE = Requisite.from_lists([])
+
+
+class Course:
+    """A course of a degree plan with its requisites."""
+
+    __slots__ = ('code', 'prerequisites', 'corequisites')
+
+    # dict keys of the scraped plan JSON -> record attributes
+    _keys = {'course_info': 'code', 'prerequisites': 'prerequisites', 'corequisites': 'corequisites'}
+
+    def __init__(self, code, prerequisites=EMPTY_REQUISITE, corequisites=EMPTY_REQUISITE):
+        self.code = sys.intern(code)
+        self.prerequisites = prerequisites
+        self.corequisites = corequisites
+
+    def __getitem__(self, key):
+        return getattr(self, self._keys[key])
+
+    def get(self, key, default=None):
+        return getattr(self, self._keys[key]) if key in self._keys else default
+
+    def __eq__(self, other):
+        if not isinstance(other, Course):
+            return NotImplemented
+        return (self.code, self.prerequisites, self.corequisites) == (other.code, other.prerequisites, other.corequisites)
+
+    def __repr__(self):
+        return f"Course({self.code!r}, {self.prerequisites!r}, {self.corequisites!r})"
+
+    def to_dict(self):
+        return {
+            'course_info': self.code,
+            'prerequisites': self.prerequisites.to_lists(),
+            'corequisites': self.corequisites.to_lists()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('course_info', ''),
+                   Requisite.from_lists(data.get('prerequisites', [])),
+                   Requisite.from_lists(data.get('corequisites', [])))
+
+
+class Category:
+    """A requirement category of a degree plan, i.e. "Major Core Courses: 42 semester credit hours"."""
+
+    __slots__ = ('section', 'name', 'courses')
+
+    def __init__(self, section, name, courses):
+        self.section = sys.intern(section)
+        self.name = sys.intern(name)
+        self.courses = tuple(courses)
+
+    def __eq__(self, other):
+        if not isinstance(other, Category):
+            return NotImplemented
+        return (self.section, self.name, self.courses) == (other.section, other.name, other.courses)
+
+    def __repr__(self):
+        return f"Category({self.section!r}, {self.name!r}, {len(self.courses)} courses)"
+
+    @property
+    def codes(self):
+        return tuple(course.code for course in self.courses)
+
+    def to_dict(self):
+        return [course.to_dict() for course in self.courses]
+
+
+# function to convert the sections of a scraped degree plan dict into Category records in plan order,
+# a course listed under several categories is one shared Course record
+def categories_from_plan(degree_plan):
+    categories = []
+    courses = {}
+    for section in ('core_requirements', 'major_requirements'):
+        for name, entries in degree_plan.get(section, {}).items():
+            if not isinstance(entries, list):
+                continue
+            category_courses = []
+            for entry in entries:
+                if not isinstance(entry, dict):
+                    continue
+                course = Course.from_dict(entry)
+                shared = courses.setdefault(course.code, course)
+                category_courses.append(shared if shared == course else course)
+            categories.append(Category(section, name, category_courses))
+    return tuple(categories)
+
+
+# function to rebuild the degree plan dict (the degree_plan_data.json shape) from Category records
+def categories_to_plan(categories, elective_requirements):
+    degree_plan = {'core_requirements': {}, 'major_requirements': {}}
+    for category in categories:
+        degree_plan[category.section][category.name] = category.to_dict()
+    degree_plan['elective_requirements'] = elective_requirements
+    return degree_plan
+
+
+# function to convert the course dicts of a parsed transcript (transcript_data.json shape) into CourseRow records,
+# the header fields are kept as they are
+def transcript_from_dict(transcript):
+    records = dict(transcript)
+    courses = transcript.get('courses')
+    if courses is not None:
+        records['courses'] = {
+            'transfer_credits': [CourseRow.from_dict(course) for course in courses.get('transfer_credits', [])],
+            'test_credits': [CourseRow.from_dict(course) for course in courses.get('test_credits', [])],
+            'utd_classes': {sys.intern(semester): [CourseRow.from_dict(course) for course in rows]
+                            for semester, rows in courses.get('utd_classes', {}).items()}
+        }
+    return records
+
+
+# function to turn a transcript holding CourseRow records back into the JSON shape
+def transcript_to_dict(transcript):
+    data = dict(transcript)
+    courses = transcript.get('courses')
+    if courses is not None:
+        data['courses'] = {
+            'transfer_credits': [course.to_dict() for course in courses['transfer_credits']],
+            'test_credits': [course.to_dict() for course in courses['test_credits']],
+            'utd_classes': {semester: [course.to_dict() for course in rows]
+                            for semester, rows in courses['utd_classes'].items()}
+        }
+    return data
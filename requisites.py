@@ -0,0 +1,410 @@
+import functools
+import re
+
+# requisite expressions of the catalog course descriptions, i.e. the text after "Prerequisites:" in
+#   "(CS 1337 or CE 1337) and CS 2305 with a grade of C or better, or instructor consent"
+# compiled into a small boolean tree once per distinct text and turned into the CNF groups of the scraped plans
+#
+#   CourseRequirement   one course, optionally with a minimum grade ("with a grade of C or better")
+#   AllOf / AnyOf       "and" / "or" of their terms, parentheses nest them
+#   Condition           anything that is not a course (junior standing, instructor consent, 3000-level coursework, ...)
+#
+# "or" binds tighter than "and" ("A or B and C" is (A or B) and C) like the scraper's original group splitting, and a
+# comma takes the meaning of the next "and"/"or" of its list ("A, B, or C"). A ", or" after a list joined by "and"
+# binds loosest ("A and B, or C" is (A and B) or C). Terms next to each other without a conjunction are all required.
+# A bare course number in a course list takes the prefix of the course before it ("MATH 2413 or 2417" is MATH 2413
+# or MATH 2417), a number followed by "level" or "hours" is not a course ("4000 level standing")
+#
+# the CNF groups only hold courses: a condition is left out, an "or" with a branch that is not a course requirement
+# ("MATH 2418 or any 3000-level MATH course", "A or instructor consent") is left out as a whole since the branch may
+# be the one met, and minimum grades are not kept. RequisiteExpression.unchecked lists what was left out
+
+# a number followed by this is a course level or an amount of hours, not a course ("3000-level", "6 hours")
+NOT_A_COURSE = r"(?!\s*-?\s*(?i:level|semester|credit|hours)\b)"
+
+# only the keywords are case insensitive, course prefixes are upper case ("Cs 1337" is not a course and "or 2417" is
+# "or" followed by a bare course number)
+TOKEN_PATTERN = re.compile(
+    r"(?P<grade>(?i:with\s+a\s+(?:minimum\s+)?grade\s+of\s+(?P<min_grade>[A-D][+-]?)\s+or\s+(?:better|higher)))"
+    r"|(?P<course>\b[A-Z]{2,5}\s+\d[\dV]\d\d\b" + NOT_A_COURSE + ")"
+    r"|(?P<number>\b\d[\dV]\d\d\b" + NOT_A_COURSE + ")"
+    r"|(?P<lparen>\()"
+    r"|(?P<rparen>\))"
+    r"|(?P<and>(?i:\band\b))"
+    r"|(?P<semicolon>;)"
+    r"|(?P<or>(?i:\bor\b))"
+    r"|(?P<comma>,)"
+    r"|(?P<word>[^\s(),;]+)"
+)
+
+# an "or" whose CNF would have more groups than this is not distributed, see AnyOf.to_cnf
+MAX_CNF_GROUPS = 64
+
+
+class CourseRequirement:
+    __slots__ = ("code", "min_grade")
+
+    def __init__(self, code, min_grade=None):
+        self.code = code
+        self.min_grade = min_grade
+
+    # the CNF of a node is a list of groups (None when it requires no course), what it cannot hold goes to unchecked
+    def to_cnf(self, unchecked):
+        if self.min_grade:
+            unchecked.append(f"{self.code} with a grade of {self.min_grade} or better")
+        return [[self.code]]
+
+    def courses(self):
+        yield self.code
+
+    def with_min_grade(self, grade):
+        return CourseRequirement(self.code, self.min_grade or grade)
+
+    def __eq__(self, other):
+        return isinstance(other, CourseRequirement) and (self.code, self.min_grade) == (other.code, other.min_grade)
+
+    def __hash__(self):
+        return hash((self.code, self.min_grade))
+
+    def __repr__(self):
+        return self.code + (f" [{self.min_grade}]" if self.min_grade else "")
+
+
+class Condition:
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+    def to_cnf(self, unchecked):
+        unchecked.append(self.text)
+        return None
+
+    def courses(self):
+        return iter(())
+
+    def with_min_grade(self, grade):
+        return self
+
+    def __eq__(self, other):
+        return isinstance(other, Condition) and self.text == other.text
+
+    def __hash__(self):
+        return hash(self.text)
+
+    def __repr__(self):
+        return repr(self.text)
+
+
+class AllOf:
+    __slots__ = ("terms",)
+
+    def __init__(self, terms):
+        self.terms = tuple(terms)
+
+    def to_cnf(self, unchecked):
+        groups = [term.to_cnf(unchecked) for term in self.terms]
+        groups = [group for group in groups if group is not None]
+        if not groups:
+            return None
+        return [clause for group in groups for clause in group]
+
+    def courses(self):
+        for term in self.terms:
+            yield from term.courses()
+
+    def with_min_grade(self, grade):
+        return AllOf(term.with_min_grade(grade) for term in self.terms)
+
+    def __eq__(self, other):
+        return isinstance(other, AllOf) and self.terms == other.terms
+
+    def __hash__(self):
+        return hash(("and", self.terms))
+
+    def __repr__(self):
+        return "(" + " and ".join(map(repr, self.terms)) + ")"
+
+
+class AnyOf:
+    __slots__ = ("terms",)
+
+    def __init__(self, terms):
+        self.terms = tuple(terms)
+
+    def to_cnf(self, unchecked):
+        # a branch without a course requirement may be the one met, then no course of the others is required
+        branch_unchecked = []
+        groups = [term.to_cnf(branch_unchecked) for term in self.terms]
+        if any(group is None for group in groups):
+            unchecked.append(repr(self))
+            return None
+        unchecked.extend(branch_unchecked)
+
+        # (a1 and a2) or (b1) -> (a1 or b1) and (a2 or b1), every clause of every term distributed over the others.
+        # Past MAX_CNF_GROUPS only the weaker "one of all these courses" group is kept
+        size = 1
+        for group in groups:
+            size *= len(group)
+        if size > MAX_CNF_GROUPS:
+            unchecked.append(repr(self))
+            return [list(dict.fromkeys(code for group in groups for clause in group for code in clause))]
+        clauses = [[]]
+        for group in groups:
+            clauses = [list(dict.fromkeys(clause + other)) for clause in clauses for other in group]
+        return clauses
+
+    def courses(self):
+        for term in self.terms:
+            yield from term.courses()
+
+    def with_min_grade(self, grade):
+        return AnyOf(term.with_min_grade(grade) for term in self.terms)
+
+    def __eq__(self, other):
+        return isinstance(other, AnyOf) and self.terms == other.terms
+
+    def __hash__(self):
+        return hash(("or", self.terms))
+
+    def __repr__(self):
+        return "(" + " or ".join(map(repr, self.terms)) + ")"
+
+
+class RequisiteExpression:
+    """Compiled requisite text: the tree under root (None for text without any requirement) and the source text."""
+
+    __slots__ = ("text", "root")
+
+    def __init__(self, text, root):
+        self.text = text
+        self.root = root
+
+    def to_cnf(self):
+        """Return the course requirement as groups of alternatives, the [[X, Y], [Z]] shape of the scraped plans.
+
+        Every group needs one of its courses. Conditions, "or" clauses with a branch that is not a course and
+        minimum grades are left out, see unchecked.
+        """
+        return self._cnf()[0]
+
+    def unchecked(self):
+        """Return the parts of the requirement to_cnf leaves out, in text order, i.e. ["instructor consent"]."""
+        return self._cnf()[1]
+
+    def _cnf(self):
+        unchecked = []
+        if self.root is None:
+            return [], unchecked
+        # a group that comes out more than once (i.e. "(A or A) and A") is kept once
+        groups = list({tuple(group): group for group in self.root.to_cnf(unchecked) or []}.values())
+        return groups, list(dict.fromkeys(unchecked))
+
+    def courses(self):
+        """Return every course code the requirement mentions, in text order."""
+        if self.root is None:
+            return []
+        return list(dict.fromkeys(self.root.courses()))
+
+    def __repr__(self):
+        return f"RequisiteExpression({self.root!r})"
+
+
+# function to split requisite text into (kind, value) tokens, consecutive non-course words become one condition
+def tokenize(text):
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if kind == "grade":
+            tokens.append(("grade", match.group("min_grade").upper()))
+        elif kind == "course":
+            prefix, number = match.group().split()
+            tokens.append(("course", f"{prefix} {number}"))
+            continue
+        elif kind == "number":
+            # a bare number continues the subject of the course it is listed after, anywhere else it is a word
+            prefix = list_prefix(tokens)
+            if prefix is not None:
+                tokens.append(("course", f"{prefix} {match.group()}"))
+                continue
+            kind = "word"
+        if kind == "word":
+            value = match.group().strip(".")
+            if not value:
+                continue
+            if tokens and tokens[-1][0] == "condition":
+                tokens[-1] = ("condition", tokens[-1][1] + " " + value)
+            else:
+                tokens.append(("condition", value))
+        elif kind == "semicolon":
+            # a semicolon is an "and" that also ends a comma list
+            tokens.append(("and", ";"))
+        elif kind in ("and", "or", "lparen", "rparen", "comma"):
+            tokens.append((kind, None))
+    return resolve_commas(tokens)
+
+
+# function to return the prefix of the course a bare number is listed after ("MATH 2413, 2417, or" -> MATH), None
+# when the tokens before the number are not a course and the "and", "or" or commas of a list
+def list_prefix(tokens):
+    index = len(tokens) - 1
+    while index >= 0 and tokens[index][0] in ("and", "or", "comma") and tokens[index][1] is None:
+        index -= 1
+    if index == len(tokens) - 1 or index < 0 or tokens[index][0] != "course":
+        return None
+    return tokens[index][1].split()[0]
+
+
+# function to replace every comma by the conjunction that ends its list at the same nesting depth ("and" by default),
+# a comma right before that conjunction ("A, B, and C") is dropped. A ", or" after an "and" of the same list makes
+# that "or" the loosest operator (weak_or, "A and B, or C")
+def resolve_commas(tokens):
+    resolved = []
+    for index, (kind, value) in enumerate(tokens):
+        if kind != "comma":
+            resolved.append((kind, value))
+            continue
+        depth = 0
+        conjunction = "and"
+        for next_kind, _ in tokens[index + 1:]:
+            if next_kind == "lparen":
+                depth += 1
+            elif next_kind == "rparen":
+                if depth == 0:
+                    break
+                depth -= 1
+            elif depth == 0 and next_kind in ("and", "or"):
+                conjunction = next_kind
+                break
+        following = tokens[index + 1][0] if index + 1 < len(tokens) else None
+        if following == "or" and joined_by_and(tokens, index):
+            tokens[index + 1] = ("weak_or", None)
+        elif following not in ("and", "or"):
+            resolved.append((conjunction, None))
+    return resolved
+
+
+# function to check whether the list segment before the comma at index (back to the previous comma, semicolon or
+# opening parenthesis of the same depth) holds an "and"
+def joined_by_and(tokens, index):
+    depth = 0
+    for kind, value in reversed(tokens[:index]):
+        if kind == "rparen":
+            depth += 1
+        elif kind == "lparen":
+            if depth == 0:
+                return False
+            depth -= 1
+        elif depth == 0:
+            if kind == "comma" or value == ";":
+                return False
+            if kind == "and":
+                return True
+    return False
+
+
+class _Parser:
+    # recursive descent over the tokens: expression := all ("weak_or" all)*, all := any (["and"] any)*,
+    # any := term ("or" term)*, term := (course | condition | "(" expression ")") [grade]. Stray operators are skipped
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position][0] if self.position < len(self.tokens) else None
+
+    def expression(self):
+        terms = [self.all_of()]
+        while self.peek() == "weak_or":
+            self.position += 1
+            terms.append(self.all_of())
+        return combine(AnyOf, terms)
+
+    def all_of(self):
+        terms = [self.any_of()]
+        # a term right after another one without a conjunction ("junior standing CS 3345") is required too
+        while self.peek() in ("and", "course", "condition", "lparen"):
+            if self.peek() == "and":
+                self.position += 1
+            terms.append(self.any_of())
+        return combine(AllOf, terms)
+
+    def any_of(self):
+        terms = [self.term()]
+        while self.peek() == "or":
+            self.position += 1
+            terms.append(self.term())
+        return combine(AnyOf, terms)
+
+    def term(self):
+        kind = self.peek()
+        node = None
+        if kind == "course" or kind == "condition":
+            value = self.tokens[self.position][1]
+            node = CourseRequirement(value) if kind == "course" else Condition(value)
+            self.position += 1
+        elif kind == "lparen":
+            self.position += 1
+            node = self.expression()
+            if self.peek() == "rparen":
+                self.position += 1
+        elif kind == "grade":
+            # a grade clause with nothing before it, i.e. after an operator
+            self.position += 1
+            return None
+        elif kind is not None and kind != "rparen":
+            # an operator where a term was expected ("and or"), skipped
+            self.position += 1
+            return self.term()
+        while self.peek() == "grade":
+            grade = self.tokens[self.position][1]
+            self.position += 1
+            if node is not None:
+                node = node.with_min_grade(grade)
+        return node
+
+
+# function to build an AllOf/AnyOf of the terms, flattening nested ones of the same kind and dropping empty terms
+def combine(kind, terms):
+    flat = []
+    for term in terms:
+        if term is None:
+            continue
+        if isinstance(term, kind):
+            flat.extend(term.terms)
+        else:
+            flat.append(term)
+    if not flat:
+        return None
+    if len(flat) == 1:
+        return flat[0]
+    return kind(flat)
+
+
+def parse_requisite(text):
+    """Parse requisite text into a RequisiteExpression, without the cache of compile_requisite."""
+    parser = _Parser(tokenize(text))
+    root = parser.expression()
+    # the parser only stops early at an unbalanced closing parenthesis, the text after it is parsed as more
+    # requirements of the whole expression
+    while parser.position < len(parser.tokens):
+        if parser.peek() == "rparen":
+            parser.position += 1
+        root = combine(AllOf, [root, parser.expression()])
+    return RequisiteExpression(text, root)
+
+
+# every distinct text is parsed once per process, the same requisite text shows up on many course pages and years
+@functools.lru_cache(maxsize=16384)
+def _compile_normalized(text):
+    return parse_requisite(text)
+
+
+def compile_requisite(text):
+    """Return the compiled RequisiteExpression of the text, memoized by its whitespace normalized form."""
+    return _compile_normalized(" ".join((text or "").split()))
+
+
+compile_cache_info = _compile_normalized.cache_info
+clear_compile_cache = _compile_normalized.cache_clear
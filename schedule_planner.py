@@ -0,0 +1,220 @@
+from functools import lru_cache
+import metrics
+from degree_plan_evaluator import DegreePlanEvaluator, compile_degree_plan
+
+# credit hour cap of a regular long semester
+DEFAULT_MAX_CREDITS_PER_TERM = 15
+
+
+class SchedulePlanner:
+    """Plans the remaining courses of a degree plan term by term.
+
+    The prerequisite graph of the plan is layered once when the planner is built. A plan is then computed from
+    a student's completed courses by picking the courses that cover the remaining hours of every category,
+    pulling in the prerequisites and corequisites they need, and filling terms up to a credit hour cap in
+    topological order. Plans are memoized by the completed course mask, so re-planning an unchanged state is
+    free and a changed state costs one linear pass over the plan.
+    """
+
+    def __init__(self, degree_plan, cache_size=1024):
+        self.plan = compile_degree_plan(degree_plan)
+
+        # corequisites outside the prerequisite masks get their own bits on top of the plan's
+        self.course_masks = dict(self.plan.course_masks)
+        self.corequisite_masks = {}
+        for course_code, course_data in self.plan.course_graph.items():
+            group_masks = []
+            for group in course_data.corequisites:
+                group_mask = 0
+                for coreq in group:
+                    if coreq not in self.course_masks:
+                        self.course_masks[coreq] = 1 << len(self.course_masks)
+                    group_mask |= self.course_masks[coreq]
+                group_masks.append(group_mask)
+            self.corequisite_masks[course_code] = tuple(group_masks)
+
+        # catalog order of the plan courses, used to break ties
+        self.order = {code: index for index, code in enumerate(self.plan.course_graph)}
+        self.heights = self.build_heights()
+        self._plan_terms = lru_cache(maxsize=cache_size)(self._compute_plan)
+
+    def build_heights(self):
+        """Layer the prerequisite graph topologically and return, for every plan course, the length of the longest
+        chain of plan courses that depend on it. Courses heading long chains are scheduled first."""
+        course_graph = self.plan.course_graph
+        dependents = {code: [] for code in course_graph}
+        indegree = {code: 0 for code in course_graph}
+        for course_code, course_data in course_graph.items():
+            for prereq in {prereq for group in course_data.prerequisites for prereq in group}:
+                if prereq in dependents and prereq != course_code:
+                    dependents[prereq].append(course_code)
+                    indegree[course_code] += 1
+
+        # Kahn's algorithm, courses stuck in a prerequisite cycle never get a layer and keep height 0
+        layer = [code for code, degree in indegree.items() if degree == 0]
+        topological_order = []
+        while layer:
+            topological_order.extend(layer)
+            next_layer = []
+            for code in layer:
+                for dependent in dependents[code]:
+                    indegree[dependent] -= 1
+                    if indegree[dependent] == 0:
+                        next_layer.append(dependent)
+            layer = next_layer
+
+        heights = {code: 0 for code in course_graph}
+        for code in reversed(topological_order):
+            for dependent in dependents[code]:
+                heights[code] = max(heights[code], heights[dependent] + 1)
+        return heights
+
+    def plan_terms(self, completed_courses, max_credits_per_term=DEFAULT_MAX_CREDITS_PER_TERM):
+        """Return {'terms': [{'term', 'courses', 'credit_hours'}], 'unscheduled': [...], 'uncovered_hours': {...}}
+        for the completed courses.
+
+        uncovered_hours maps every category whose listed courses cannot cover its remaining hours to the hours
+        left over, i.e. hours to be taken from courses outside the plan. A plan with uncovered hours or unscheduled
+        courses does not complete the degree. The returned dict is shared with the planner's cache and must not be
+        modified."""
+        completed_mask = 0
+        for code in completed_courses:
+            completed_mask |= self.course_masks.get(code, 0)
+        return self._plan_terms(completed_mask, max_credits_per_term)
+
+    @metrics.span("schedule_plan")
+    def _compute_plan(self, completed_mask, max_credits_per_term):
+        targets, unreachable, uncovered_hours = self.select_courses(completed_mask)
+        terms, unscheduled = self.layer_terms(targets, completed_mask, max_credits_per_term)
+        return {'terms': terms, 'unscheduled': unscheduled + unreachable, 'uncovered_hours': uncovered_hours}
+
+    def select_courses(self, completed_mask):
+        """Pick the courses that cover the remaining hours of every category, plus the requisites they need.
+
+        Returns (courses, unreachable courses, {category name: hours the listed courses leave uncovered})."""
+        plan = self.plan
+        course_masks = self.course_masks
+        completed_courses = [code for code, mask in course_masks.items() if mask & completed_mask]
+        evaluator = DegreePlanEvaluator(plan, {})
+        evaluator.add_completed_courses(completed_courses)
+        category_completion = evaluator.calculate_category_completion()
+
+        reachable = {}
+
+        def is_reachable(code, visiting=()):
+            # a course can be scheduled if every prerequisite group has a completed member or a reachable plan course,
+            # corequisites only need a member in the plan since they are taken in the same term
+            if code in reachable:
+                return reachable[code]
+            if code not in plan.course_graph or code in visiting:
+                return False
+            course_data = plan.course_graph[code]
+            result = all(
+                group_mask & completed_mask or any(is_reachable(member, visiting + (code,)) for member in group)
+                for group_mask, group in zip(plan.prerequisite_masks[code], course_data.prerequisites)
+            ) and all(
+                group_mask & completed_mask or any(member in plan.course_graph for member in group)
+                for group_mask, group in zip(self.corequisite_masks[code], course_data.corequisites)
+            )
+            # a failure found while inside a prerequisite cycle is not final, only cache answers that are
+            if result or not visiting:
+                reachable[code] = result
+            return result
+
+        targets = {}
+        unreachable = []
+        uncovered_hours = {}
+
+        def add_target(code):
+            if code in targets or course_masks.get(code, 0) & completed_mask:
+                return
+            targets[code] = True
+            # pull in the first reachable plan course of every requisite group that nothing covers yet
+            course_data = plan.course_graph[code]
+            groups = list(zip(plan.prerequisite_masks[code], course_data.prerequisites))
+            groups += zip(self.corequisite_masks[code], course_data.corequisites)
+            for group_mask, group in groups:
+                if group_mask & completed_mask or any(member in targets for member in group):
+                    continue
+                for member in group:
+                    if is_reachable(member):
+                        add_target(member)
+                        break
+
+        for section, category_name, codes in plan.categories:
+            hours_needed = category_completion[category_name]['remaining']
+            beyond_core = section == 'major_requirements' and "beyond Core Curriculum" in category_name
+            for code in codes:
+                if hours_needed <= 0:
+                    break
+                if course_masks[code] & completed_mask or (beyond_core and code in plan.core_courses):
+                    continue
+                if code not in targets:
+                    if not is_reachable(code):
+                        if code not in unreachable:
+                            unreachable.append(code)
+                        continue
+                    add_target(code)
+                hours_needed -= plan.course_credit_hours[code]
+            # the category lists too few (reachable) courses for its hours, i.e. "24 semester credit hours" over 12
+            if hours_needed > 0:
+                uncovered_hours[category_name] = hours_needed
+
+        # an unreachable course may have been covered by another pick, only report the ones left out
+        unreachable = [code for code in unreachable if code not in targets]
+        return list(targets), unreachable, uncovered_hours
+
+    def layer_terms(self, targets, completed_mask, max_credits_per_term):
+        """Fill terms in topological order, a course is placed once its prerequisites are done in earlier terms
+        and its corequisites are done or placed in the same term."""
+        plan = self.plan
+        course_masks = self.course_masks
+        remaining = sorted(targets, key=lambda code: (-self.heights[code], self.order[code]))
+        done_mask = completed_mask
+        terms = []
+
+        while remaining:
+            term_courses = []
+            term_mask = 0
+            term_hours = 0
+
+            for code in remaining:
+                if course_masks[code] & term_mask or not plan.prerequisites_satisfied(code, done_mask):
+                    continue
+
+                # grow a bundle of the course and the corequisites it has to be taken with
+                bundle = [code]
+                bundle_mask = course_masks[code]
+                pending = [code]
+                while pending and bundle is not None:
+                    current = pending.pop()
+                    for group in self.corequisite_masks[current]:
+                        if group & (done_mask | term_mask | bundle_mask):
+                            continue
+                        partner = next((other for other in remaining
+                                        if course_masks[other] & group and not course_masks[other] & term_mask
+                                        and plan.prerequisites_satisfied(other, done_mask)), None)
+                        if partner is None:
+                            bundle = None
+                            break
+                        bundle.append(partner)
+                        bundle_mask |= course_masks[partner]
+                        pending.append(partner)
+                if bundle is None:
+                    continue
+
+                bundle_hours = sum(plan.course_credit_hours[member] for member in bundle)
+                # a course above the cap on its own still gets a term to itself
+                if term_hours + bundle_hours > max_credits_per_term and term_courses:
+                    continue
+                term_courses.extend(bundle)
+                term_mask |= bundle_mask
+                term_hours += bundle_hours
+
+            if not term_courses:
+                break
+            terms.append({'term': len(terms) + 1, 'courses': term_courses, 'credit_hours': term_hours})
+            done_mask |= term_mask
+            remaining = [code for code in remaining if not course_masks[code] & term_mask]
+
+        return terms, remaining
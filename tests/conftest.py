@@ -0,0 +1,40 @@
+# shared fixtures of the tests: the scraper is pointed at in-memory catalog pages instead of the live catalog
+import threading
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+
+import degree_scraper
+from catalog_transport import FixtureTransport
+
+
+class FlakyTransport(FixtureTransport):
+    """FixtureTransport whose first request to each of the failing paths raises a ConnectionError."""
+
+    def __init__(self, pages, failing=()):
+        super().__init__(pages)
+        self.failing = set(failing)
+        self.requested = []
+        self._fail_lock = threading.Lock()
+
+    def get(self, url, headers=None):
+        path = urlsplit(url).path
+        with self._fail_lock:
+            self.requested.append(path)
+            fail = path in self.failing
+            self.failing.discard(path)
+        if fail:
+            raise requests.exceptions.ConnectionError(f"connection to {url} reset")
+        return super().get(url, headers)
+
+
+@pytest.fixture
+def use_transport():
+    """Route the scraper through the given transport for one test, without a catalog cache."""
+    transport = degree_scraper.get_transport()
+    cache = degree_scraper._catalog_cache
+    degree_scraper.set_catalog_cache(None)
+    yield degree_scraper.set_transport
+    degree_scraper.set_transport(transport)
+    degree_scraper.set_catalog_cache(cache)
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from advising_service import AdvisingService, HttpError
+from plan_store import PlanStore
+
+
+def read_requests(data, count):
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return [await service.read_request(reader) for _ in range(count)]
+
+    service = AdvisingService(PlanStore(), parse_workers=1)
+    try:
+        return asyncio.run(read())
+    finally:
+        service.close()
+
+
+def test_a_get_body_is_not_read_as_the_next_request():
+    body = b"POST /evaluate HTTP/1.1\r\n\r\n"
+    requests = read_requests(b"GET /health HTTP/1.1\r\nContent-Length: %d\r\n\r\n%sGET /metrics HTTP/1.1\r\n\r\n"
+                             % (len(body), body), 2)
+    assert [(method, path, request_body) for method, path, _, request_body in requests] == [
+        ("GET", "/health", body), ("GET", "/metrics", b"")]
+
+
+@pytest.mark.parametrize("headers, status", [
+    (b"POST /evaluate HTTP/1.1\r\n", 411),
+    (b"POST /evaluate HTTP/1.1\r\nContent-Length: -5\r\n", 400),
+    (b"DELETE /evaluate HTTP/1.1\r\nContent-Length: abc\r\n", 400),
+    (b"GET /health HTTP/1.1\r\nTransfer-Encoding: chunked\r\n", 411),
+])
+def test_bodies_that_cannot_be_read_are_rejected(headers, status):
+    with pytest.raises(HttpError) as error:
+        read_requests(headers + b"\r\n", 1)
+    assert error.value.status == status
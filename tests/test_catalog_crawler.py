@@ -0,0 +1,29 @@
+import json
+import os
+
+from benchmarks.catalog_fixtures import build_catalog
+from catalog_crawler import crawl, default_checkpoint_path
+from catalog_transport import FixtureTransport
+from plan_store import PlanStore
+
+YEAR = "2024"
+TARGETS = [("ecs", "Computer Science", YEAR)]
+MISSING_COURSE = f"/{YEAR}/undergraduate/courses/cs3307"
+
+
+def test_a_plan_with_a_failed_course_fetch_is_retried_on_resume(tmp_path, use_transport):
+    pages = build_catalog(YEAR)
+    course_page = pages.pop(MISSING_COURSE)
+    use_transport(FixtureTransport(pages))
+    store = PlanStore(str(tmp_path))
+    checkpoint_path = default_checkpoint_path(store)
+
+    assert crawl(store, TARGETS) == [("ecs", "Computer Science", YEAR, "failed")]
+    with open(checkpoint_path) as checkpoint_file:
+        assert json.load(checkpoint_file)["targets"][f"{YEAR}/ecs/Computer Science"]["status"] == "failed"
+
+    # resumed with the same checkpoint, the failed target is scraped again and the finished crawl drops the checkpoint
+    pages[MISSING_COURSE] = course_page
+    assert crawl(store, TARGETS) == [("ecs", "Computer Science", YEAR, "built")]
+    assert not os.path.exists(checkpoint_path)
+    assert store.load("ecs", "Computer Science", YEAR) is not None
@@ -0,0 +1,23 @@
+import email.utils
+import time
+
+import requests
+
+from catalog_transport import HttpTransport
+
+
+def response_with_retry_after(value):
+    response = requests.Response()
+    response.status_code = 503
+    response.headers["Retry-After"] = value
+    return response
+
+
+def test_retry_after_is_never_negative():
+    transport = HttpTransport()
+    assert transport._retry_after(response_with_retry_after("2.5")) == 2.5
+    assert transport._retry_after(response_with_retry_after("-3")) == 0.0
+    assert transport._retry_after(response_with_retry_after(email.utils.formatdate(time.time() - 3600, usegmt=True))) == 0.0
+    assert 0 < transport._retry_after(response_with_retry_after(email.utils.formatdate(time.time() + 60, usegmt=True))) <= 60
+    assert transport._retry_after(response_with_retry_after("soon")) is None
+    assert transport._retry_after(requests.Response()) is None
@@ -0,0 +1,75 @@
+import re
+
+import pytest
+
+from benchmarks.catalog_fixtures import build_catalog
+from catalog_cache import CatalogCache
+from catalog_transport import FixtureTransport
+from degree_scraper import (CATALOG_BASE_URL, CourseRequisiteRegistry, course_page_url, scrape_degree_plan_incremental,
+                            set_catalog_cache)
+from tests.conftest import FlakyTransport
+
+YEAR = "2024"
+
+
+def course_page(code, description):
+    return f'<html><div id="bukku-page"><h1>{code}</h1><p>{description}</p></div></html>'
+
+
+def course_path(code):
+    return course_page_url(code, YEAR).split("catalog.utdallas.edu", 1)[1]
+
+
+def test_registry_retries_a_failed_course_fetch(use_transport):
+    pages = {course_path("CS 3345"): course_page("CS 3345", "Prerequisites: CS 2336 and CS 2305.")}
+    transport = FlakyTransport(pages, failing=[course_path("CS 3345")])
+    use_transport(transport)
+    registry = CourseRequisiteRegistry()
+
+    assert registry.get("CS 3345", YEAR) is None
+    requisites = {"prerequisites": [["CS 2336"], ["CS 2305"]], "corequisites": []}
+    assert registry.get("CS 3345", YEAR) == requisites
+    # the successful scrape is kept, the failed one was not
+    assert registry.get("CS 3345", YEAR) == requisites
+    assert len(transport.requested) == 2
+    assert registry.stats() == {"courses": 1, "hits": 1, "misses": 2}
+
+
+PLAN_URL = f"{CATALOG_BASE_URL}/{YEAR}/undergraduate/programs/ecs/computer-science"
+
+
+def plan_requisites(degree_plan, code):
+    return next(entry for section in ("core_requirements", "major_requirements")
+                for entries in degree_plan[section].values() for entry in entries if entry["course_info"] == code)
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_incremental_scrape_finds_a_changed_course_page(tmp_path, use_transport, cached):
+    if cached:
+        # the first run leaves every page fresh in the catalog cache, the second run must look past that
+        set_catalog_cache(CatalogCache(":memory:"))
+    pages = build_catalog(YEAR)
+    transport = FixtureTransport(pages)
+    use_transport(transport)
+    fingerprint = str(tmp_path / "plan.fingerprint.json")
+    scrape_degree_plan_incremental(PLAN_URL, YEAR, fingerprint)
+
+    path = course_path("CS 3307")
+    pages[path] = re.sub(r"Prerequisites: [^.]*\.", "Prerequisites: CS 1107 or CS 1110.", pages[path])
+    degree_plan, report = scrape_degree_plan_incremental(PLAN_URL, YEAR, fingerprint)
+
+    assert list(report["changed"]) == ["CS 3307"]
+    assert report["changed"]["CS 3307"]["after"]["prerequisites"] == [["CS 1107", "CS 1110"]]
+    assert plan_requisites(degree_plan, "CS 3307")["prerequisites"] == [["CS 1107", "CS 1110"]]
+    assert not report["plan_page_changed"] and not report["added"] and not report["removed"]
+
+
+def test_incremental_scrape_of_an_unchanged_catalog(tmp_path, use_transport):
+    use_transport(FixtureTransport(build_catalog(YEAR)))
+    fingerprint = str(tmp_path / "plan.fingerprint.json")
+    first_plan, _ = scrape_degree_plan_incremental(PLAN_URL, YEAR, fingerprint)
+    degree_plan, report = scrape_degree_plan_incremental(PLAN_URL, YEAR, fingerprint)
+
+    assert degree_plan == first_plan
+    assert report == {"plan_page_changed": False, "added": [], "removed": [], "changed": {}, "categories": {},
+                      "failed": []}
@@ -0,0 +1,26 @@
+import pytest
+
+from benchmarks.catalog_fixtures import build_catalog
+from catalog_transport import FixtureTransport
+from degree_scraper import parse_course_page
+from plan_store import PlanStore, build_plan
+
+YEAR = "2024"
+MISSING_COURSE = f"/{YEAR}/undergraduate/courses/cs3307"
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_build_plan_fails_when_a_course_page_is_missing(tmp_path, use_transport, incremental):
+    pages = build_catalog(YEAR)
+    course_page = pages.pop(MISSING_COURSE)
+    use_transport(FixtureTransport(pages))
+    store = PlanStore(str(tmp_path))
+
+    assert build_plan(store, "ecs", "Computer Science", YEAR, incremental=incremental) == "failed"
+    assert store.load("ecs", "Computer Science", YEAR) is None
+
+    # the next run fetches the course again and stores the plan with its requisites
+    pages[MISSING_COURSE] = course_page
+    assert build_plan(store, "ecs", "Computer Science", YEAR, incremental=incremental) == "built"
+    prerequisites = store.load("ecs", "Computer Science", YEAR).course_graph["CS 3307"].prerequisites
+    assert prerequisites.to_lists() == parse_course_page(course_page)["prerequisites"] != []
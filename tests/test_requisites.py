@@ -0,0 +1,58 @@
+import pytest
+
+from requisites import MAX_CNF_GROUPS, compile_requisite, parse_requisite
+
+
+@pytest.mark.parametrize("text, groups", [
+    ("CS 1337", [["CS 1337"]]),
+    ("(CS 1337 or CE 1337) and CS 2305", [["CS 1337", "CE 1337"], ["CS 2305"]]),
+    ("CS 1337 or (CS 2305 and CS 2336)", [["CS 1337", "CS 2305"], ["CS 1337", "CS 2336"]]),
+    ("CS 1337, CS 2305, or CS 2336", [["CS 1337", "CS 2305", "CS 2336"]]),
+    ("CS 1337, CS 2305, and CS 2336", [["CS 1337"], ["CS 2305"], ["CS 2336"]]),
+    ("CS 1337 and CS 2305; CS 2336", [["CS 1337"], ["CS 2305"], ["CS 2336"]]),
+    # a bare number in a course list continues the subject of the course before it
+    ("MATH 2413 or 2417", [["MATH 2413", "MATH 2417"]]),
+    ("MATH 2413, 2417, or 2419", [["MATH 2413", "MATH 2417", "MATH 2419"]]),
+    # courses next to each other are all required, none of them is skipped
+    ("CS 1337 CS 2305", [["CS 1337"], ["CS 2305"]]),
+    ("junior standing CS 3345", [["CS 3345"]]),
+    ("CS 2305) and CS 3345", [["CS 2305"], ["CS 3345"]]),
+    # level and hour numbers are not courses
+    ("CS 3345 or 4000 level standing", []),
+    ("CS 2336 and (CS 2305 or 3000-level CS coursework)", [["CS 2336"]]),
+    ("CS 1337 and 12 semester credit hours of 3000 level CS", [["CS 1337"]]),
+    # an "or" with a branch that is not a course requirement does not require the courses of the other branches
+    ("MATH 2418 or any 3000-level MATH course", []),
+    ("ACCT 2301 and ACCT 2302, or 6 hours of 2000 level accounting", []),
+    ("CS 1337 or instructor consent", []),
+    ("CS 2305 and (CS 1337 or department consent)", [["CS 2305"]]),
+    # ", or" after an "and" splits the whole list
+    ("PHYS 3357 and PHYS 2580, or STAT 3505", [["PHYS 3357", "STAT 3505"], ["PHYS 2580", "STAT 3505"]]),
+    ("Department consent required", []),
+    ("", []),
+])
+def test_cnf_groups(text, groups):
+    assert parse_requisite(text).to_cnf() == groups
+
+
+@pytest.mark.parametrize("text, unchecked", [
+    ("(CS 1337 or CE 1337) and CS 2305 with a grade of C or better", ["CS 2305 with a grade of C or better"]),
+    ("CS 3345 and junior standing", ["junior standing"]),
+    ("MATH 2418 or any 3000-level MATH course", ["(MATH 2418 or 'any 3000-level MATH course')"]),
+    ("CS 1337 or CE 1337", []),
+])
+def test_parts_left_out_of_the_cnf_are_listed(text, unchecked):
+    assert parse_requisite(text).unchecked() == unchecked
+
+
+def test_large_or_is_not_distributed():
+    # four alternatives of four courses each would distribute into 256 groups
+    text = " or ".join("(" + " and ".join(f"CS {1000 + 10 * i + j}" for j in range(4)) + ")" for i in range(4))
+    expression = parse_requisite(text)
+    assert 4 ** 4 > MAX_CNF_GROUPS
+    assert expression.to_cnf() == [expression.courses()]
+    assert expression.unchecked()
+
+
+def test_compile_is_memoized_by_normalized_text():
+    assert compile_requisite("CS 1337  or\nCE 1337") is compile_requisite("CS 1337 or CE 1337")
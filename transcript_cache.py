@@ -0,0 +1,135 @@
+import hashlib
+import io
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+
+import metrics
+from records import transcript_from_dict
+from pdf_text import extraction_key
+from transcript_parser import PARSER_VERSION, extract_transcript_data
+
+# on-disk cache of parsed transcripts keyed by the SHA-256 of the PDF bytes, the parser version and the extraction
+# backend with its library version (see pdf_text.extraction_key), so a transcript uploaded again is served without
+# opening the PDF (no pdfplumber, pdfminer or pypdfium2 at all), and a run asking for another backend parses it again
+#
+# entries are the transcript dict pickled and zlib compressed, a few KB each. Entries of another PARSER_VERSION are
+# never returned and are deleted when the cache is opened. The least recently used entries are evicted once the
+# cache holds more than max_entries or max_bytes. Like the plan store, the cache is written by this project only,
+# never open a cache file from an untrusted source
+
+DEFAULT_TRANSCRIPT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "utd-transcript-parser",
+                                             "transcripts.sqlite3")
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def pdf_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class TranscriptCache:
+    def __init__(self, path=DEFAULT_TRANSCRIPT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES,
+                 parser_version=PARSER_VERSION):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.parser_version = parser_version
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        # the advising service uses the cache from its event loop and its parse threads, one connection behind a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            # caches written before the extraction backend was part of the key are dropped, they are only a cache
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(transcripts)")]
+            if columns and "extractor" not in columns:
+                self._conn.execute("DROP TABLE transcripts")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS transcripts (
+                    digest TEXT NOT NULL,
+                    parser_version INTEGER NOT NULL,
+                    extractor TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    size INTEGER NOT NULL,
+                    PRIMARY KEY (digest, parser_version, extractor)
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS transcripts_accessed_at ON transcripts (accessed_at)")
+            # results of other parser versions can never be served again
+            self._conn.execute("DELETE FROM transcripts WHERE parser_version != ?", (parser_version,))
+
+    def get(self, digest, extractor):
+        """Return the transcript of the PDF with this digest parsed with the extractor (an extraction_key), or None."""
+        key = (digest, self.parser_version, extractor)
+        with self._lock:
+            row = self._conn.execute("SELECT body FROM transcripts WHERE digest = ? AND parser_version = ? "
+                                     "AND extractor = ?", key).fetchone()
+            if row is not None:
+                with self._conn:
+                    self._conn.execute("UPDATE transcripts SET accessed_at = ? WHERE digest = ? AND parser_version = ? "
+                                       "AND extractor = ?", (time.time(), *key))
+        metrics.count("transcript_cache_lookups_total", result="miss" if row is None else "hit")
+        if row is None:
+            return None
+        return pickle.loads(zlib.decompress(row[0]))
+
+    def put(self, digest, extractor, transcript):
+        body = zlib.compress(pickle.dumps(transcript, protocol=pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO transcripts (digest, parser_version, extractor, body, accessed_at, size) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (digest, self.parser_version, extractor, body, time.time(), len(body))
+                )
+            self._evict()
+
+    def _evict(self):
+        # drop the least recently used transcripts until the cache fits in max_entries and max_bytes
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcripts").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        with self._conn:
+            for digest, parser_version, extractor, size in self._conn.execute(
+                "SELECT digest, parser_version, extractor, size FROM transcripts ORDER BY accessed_at"
+            ).fetchall():
+                if count <= self.max_entries and total <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM transcripts WHERE digest = ? AND parser_version = ? AND extractor = ?",
+                                   (digest, parser_version, extractor))
+                count -= 1
+                total -= size
+                metrics.count("transcript_cache_evictions_total")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# function to return (transcript, cache hit) for a PDF path or bytes, parsing it with extract_transcript_data only
+# when the cache has no result for these bytes and this backend. The options are those of extract_transcript_data
+def load_transcript(pdf_source, cache, records=False, **options):
+    if isinstance(pdf_source, bytes):
+        data = pdf_source
+    else:
+        with open(pdf_source, "rb") as pdf_file:
+            data = pdf_file.read()
+    digest = pdf_digest(data)
+    extractor = extraction_key(options.get("backend"))
+
+    transcript = cache.get(digest, extractor) if cache is not None else None
+    hit = transcript is not None
+    if not hit:
+        # always parsed to dicts, the form that is cached, records are built from it below
+        transcript = extract_transcript_data(io.BytesIO(data), **options)
+        if cache is not None:
+            cache.put(digest, extractor, transcript)
+    return (transcript_from_dict(transcript) if records else transcript), hit
@@ -1,5 +1,13 @@
-import pdfplumber
 import re
+import time
+
+import metrics
+import pdf_text
+from records import CourseRow
+
+# version of the parsed transcript, bump it whenever a change here or in pdf_text.py can change the parse of a PDF
+# so the results stored by transcript_cache.py are parsed again instead of being served stale
+PARSER_VERSION = 1
 
 # hardcoded mapping of majors to their associated schools, not exhaustive just temp for now
 school_mapping = {
@@ -23,111 +31,290 @@ school_mapping = {
     "Physics": "nsm",
 }
 
-def extract_transcript_data(pdf_path):
-   # open the PDF and read its content
-    with pdfplumber.open(pdf_path) as pdf:
-        transcript_text = ""
-
-        # extract text from each page and remove headers/footers
-        for i, page in enumerate(pdf.pages):
-            page_text = page.extract_text()
-            lines = page_text.split('\n')
-            
-            # For the first page, don't filter out the "Name" header line
-            if i == 0:
-                lines = [line for line in lines if not re.match(r"^\d+\s+\d+.*$", line)
-                         and not line.startswith("Unofficial Transcript - UT-Dallas")]
-            else:
-                # For subsequent pages, filter out the repeated headers/footers
-                lines = [line for line in lines if not re.match(r"^\d+\s+\d+.*$", line)
-                         and not line.startswith("Unofficial Transcript - UT-Dallas")
-                         and not line.startswith("Name:")]
+# header fields of the transcript, each one is taken from the first line its pattern matches
+HEADER_FIELDS = [
+    ('name', re.compile(r"Name:\s+(.+)"), lambda match: match.group(1).strip()),
+    ('utd_id', re.compile(r"Student ID:\s+(\d+)"), lambda match: match.group(1)),
+    ('major', re.compile(r":\s+(.*) Major"), lambda match: match.group(1).strip()),
+    ('gpa', re.compile(r"Cum GPA:\s+([\d\.]+)"), lambda match: float(match.group(1))),
+    ('program_start_date', re.compile(r"(\d{4}-\d{2}-\d{2}): Active in Program"), lambda match: match.group(1)),
+]
 
-            transcript_text += '\n'.join(lines) + '\n'
+# line kinds assigned by classify_line
+LINE_HEADER = "header"
+LINE_FOOTER = "footer"
+LINE_SECTION = "section"
+LINE_SEMESTER = "semester"
+LINE_COURSE = "course"
+LINE_OTHER = "other"
 
-    # json object to store the extracted data
-    transcript_data = {}
+# footer, semester and course lines are told apart by one precompiled alternation, the name of the group that
+# matched is the line kind. Footers are matched on the raw line, semesters and courses on the stripped line
+LINE_PATTERN = re.compile(
+    r"(?P<footer>\d+\s+\d+)"
+    r"|\s*(?:"
+    r"(?P<semester>\d{4} (?:Fall|Spring|Summer))\s*$"
+    r"|(?P<course>(?P<code>[A-Z]+\s+[\w\-]+)\s+(?P<title>.+?)\s+(?P<attempted>[\d\.]+)\s+(?P<earned>[\d\.]+)"
+    r"(?:\s+(?P<grade>[A-Z\+\-]+))?)"
+    r")"
+)
+
+TRANSCRIPT_HEADER_PREFIX = "Unofficial Transcript - UT-Dallas"
+
+# page-parallel extraction: with a page executor, a PDF of at least this many pages (per backend, the faster the
+# backend the more pages it takes to pay for the round trip to the workers) is split into ranges of PAGES_PER_RANGE
+# pages that are extracted by the executor's worker processes and merged back in page order
+PARALLEL_MIN_PAGES = {pdf_text.PYPDFIUM2: 40, pdf_text.PDFMINER: 8, pdf_text.PDFPLUMBER: 6}
+PAGES_PER_RANGE = 4
+
+# section marker lines and the course storage key they start
+SECTION_MARKERS = {
+    "Transfer Credits": "transfer_credits",
+    "Test Credits": "test_credits",
+    "Beginning of Undergraduate Record": "utd_classes",
+}
+
+# function to tag a single line as header, footer, section marker, semester, course or other
+# returns (kind, payload) where the payload is the section key, semester title or course match
+def classify_line(line, page_index=0):
+    match = LINE_PATTERN.match(line)
+    if match:
+        kind = match.lastgroup
+        if kind == LINE_FOOTER:
+            return LINE_FOOTER, None
+        if kind == LINE_SEMESTER:
+            return LINE_SEMESTER, match.group(LINE_SEMESTER)
+        return LINE_COURSE, match
+
+    # For the first page, don't filter out the "Name" header line
+    if line.startswith(TRANSCRIPT_HEADER_PREFIX) or (page_index > 0 and line.startswith("Name:")):
+        return LINE_HEADER, None
+
+    stripped = line.strip()
+    section = SECTION_MARKERS.get(stripped)
+    if section:
+        return LINE_SECTION, section
+    return LINE_OTHER, stripped
+
+# function to classify every line of one page, a page is classified in one go so the regex time is measured apart
+# from the PDF extraction
+def classify_page(page_text, page_index):
+    with metrics.span("transcript_line_classify"):
+        lines = page_text.split('\n')
+        classified = [(line, *classify_line(line, page_index)) for line in lines]
+    metrics.count("pdf_pages_total")
+    metrics.count("transcript_lines_total", len(lines))
+    return classified
+
+# function to split the pages of a PDF into (start, stop) ranges for the page executor
+def page_ranges(pages, pages_per_range=PAGES_PER_RANGE):
+    return [(start, min(start + pages_per_range, pages)) for start in range(0, pages, pages_per_range)]
+
+# function to tell whether a PDF is long enough to be split into page ranges, backend is that of iter_classified_lines
+def is_page_parallel(pdf_path, backend=None):
+    backend = backend or pdf_text.default_backend()
+    if backend == pdf_text.AUTO:
+        backend = pdf_text.fast_backend() or pdf_text.PDFPLUMBER
+    try:
+        return pdf_text.page_count(pdf_path) >= PARALLEL_MIN_PAGES[backend]
+    except Exception:
+        # a PDF that cannot be opened is left to the backend, which raises its own error for it
+        return False
+
+# function to yield the page texts of a backend, timing every page into the report and the backend's histogram
+# with a page executor large PDFs are extracted page range by page range in its worker processes
+def extract_page_texts(pdf_path, backend, report, page_executor=None):
+    if page_executor is not None and is_page_parallel(pdf_path, backend):
+        yield from extract_page_texts_parallel(pdf_path, backend, report, page_executor)
+        return
 
-    # extract student name
-    name_match = re.search(r"Name:\s+(.+)", transcript_text)
-    if name_match:
-        transcript_data['name'] = name_match.group(1).strip()
+    pages = pdf_text.iter_page_texts(pdf_path, backend)
+    try:
+        while True:
+            start = time.perf_counter()
+            page_text = next(pages, None)
+            elapsed = time.perf_counter() - start
+            if page_text is None:
+                return
+            report['extract_seconds'] += elapsed
+            metrics.observe("pdf_page_extract_seconds", elapsed, backend=backend)
+            yield page_text
+    finally:
+        pages.close()
 
-    # extract UTD ID
-    id_match = re.search(r"Student ID:\s+(\d+)", transcript_text)
-    if id_match:
-        transcript_data['utd_id'] = id_match.group(1)
+# function to yield the page texts of every range in page order, the ranges are submitted at once so the later ones
+# are extracted while the earlier ones are classified
+def extract_page_texts_parallel(pdf_path, backend, report, page_executor):
+    ranges = page_ranges(pdf_text.page_count(pdf_path))
+    source = pdf_text.portable_source(pdf_path)
+    report['page_ranges'] = len(ranges)
+    metrics.count("pdf_parallel_extractions_total", backend=backend)
+    futures = [page_executor.submit(pdf_text.extract_page_range, source, backend, start, stop) for start, stop in ranges]
+    try:
+        for future in futures:
+            start = time.perf_counter()
+            texts, page_seconds = future.result()
+            report['extract_seconds'] += time.perf_counter() - start
+            # the pages are observed here like the pages extracted in this process, the worker's metrics stay there
+            metrics.observe("pdf_page_range_extract_seconds", sum(page_seconds), backend=backend)
+            for seconds in page_seconds:
+                metrics.observe("pdf_page_extract_seconds", seconds, backend=backend)
+            yield from texts
+    finally:
+        for future in futures:
+            future.cancel()
 
-    # extract major and assign school
-    major_match = re.search(r":\s+(.*) Major", transcript_text)
-    if major_match:
-        transcript_data['major'] = major_match.group(1).strip()
-        transcript_data['school'] = school_mapping.get(transcript_data['major'], "Unknown")
+# function to extract and classify the whole transcript with a fast backend, returns the classified pages or None
+# when the text layer did not come out as a transcript (no semester or course line, or the backend failed) so the
+# caller falls back to pdfplumber
+def extract_validated_pages(pdf_path, backend, report, page_executor=None):
+    try:
+        pages = [classify_page(page_text, i)
+                 for i, page_text in enumerate(extract_page_texts(pdf_path, backend, report, page_executor))]
+    except Exception:
+        reason = "error"
+    else:
+        if any(kind == LINE_SEMESTER or kind == LINE_COURSE for page in pages for _, kind, _ in page):
+            return pages
+        reason = "no_course_lines"
+    metrics.count("pdf_backend_fallbacks_total", backend=backend, reason=reason)
+    report['fallback_from'] = backend
+    return None
 
-    # extract GPA
-    gpa_match = re.search(r"Cum GPA:\s+([\d\.]+)", transcript_text)
-    if gpa_match:
-        transcript_data['gpa'] = float(gpa_match.group(1))
+# function to yield (line, kind, payload) for every line of the transcript page by page, without the repeated headers/footers
+# backend is auto (default, see pdf_text.BACKEND_ENV), pypdfium2, pdfminer or pdfplumber. In auto mode the fast
+# backend reads the whole PDF before the first line is yielded, so it can be checked before pdfplumber is skipped.
+# When a report dict is given the backend used, the backend that fell back (or None), the extraction time and the
+# number of page ranges extracted in parallel (0 when the pages were extracted here) are set in it
+# page_executor is a ProcessPoolExecutor (or any executor) for the page-parallel extraction of large PDFs, the pages
+# are classified here in page order either way, so the page index of every line (i.e. for "Name:") is unchanged
+def iter_classified_lines(pdf_path, backend=None, report=None, page_executor=None):
+    backend = backend or pdf_text.default_backend()
+    report = {} if report is None else report
+    report.update(backend=None, fallback_from=None, extract_seconds=0.0, page_ranges=0)
 
-    # extract the program start date
-    start_date_match = re.search(r"(\d{4}-\d{2}-\d{2}): Active in Program", transcript_text)
-    if start_date_match:
-        transcript_data['program_start_date'] = start_date_match.group(1)
+    pages = None
+    if backend == pdf_text.AUTO:
+        fast_backend = pdf_text.fast_backend()
+        if fast_backend:
+            pages = extract_validated_pages(pdf_path, fast_backend, report, page_executor)
+            backend = fast_backend
+        if pages is None:
+            backend = pdf_text.PDFPLUMBER
+    if pages is None:
+        pages = (classify_page(page_text, i)
+                 for i, page_text in enumerate(extract_page_texts(pdf_path, backend, report, page_executor)))
+    report['backend'] = backend
+    metrics.count("pdf_backend_total", backend=backend)
+
+    for classified in pages:
+        for line, kind, payload in classified:
+            if kind != LINE_HEADER and kind != LINE_FOOTER:
+                yield line, kind, payload
+
+# function to yield the cleaned lines of the transcript page by page, without the repeated headers/footers
+def iter_transcript_lines(pdf_path, backend=None):
+    for line, _, _ in iter_classified_lines(pdf_path, backend):
+        yield line
+
+# function to match the header fields that are still missing against a single line
+def match_header_fields(line, header):
+    for field, pattern, convert in HEADER_FIELDS:
+        if field not in header:
+            match = pattern.search(line)
+            if match:
+                header[field] = convert(match)
+
+# function to build the transcript header dict in a fixed key order from the matched fields
+def build_transcript_header(header):
+    transcript_data = {}
+    for field, _, _ in HEADER_FIELDS:
+        if field in header:
+            transcript_data[field] = header[field]
+        # assign the school right after the major
+        if field == 'major' and 'major' in header:
+            transcript_data['school'] = school_mapping.get(header['major'], "Unknown")
+    return transcript_data
+
+# function to read only the header fields (name, ID, major, GPA, start date), stops reading pages once all are found
+# (with backend="pdfplumber", the fast backends of auto mode read the whole PDF up front)
+def extract_transcript_header(pdf_path, backend=None):
+    header = {}
+    lines = iter_transcript_lines(pdf_path, backend)
+    try:
+        for line in lines:
+            match_header_fields(line, header)
+            if len(header) == len(HEADER_FIELDS):
+                break
+    finally:
+        # closing the generator closes the PDF without extracting the remaining pages
+        lines.close()
+    return build_transcript_header(header)
+
+# with records=True the course rows are CourseRow records instead of dicts, see records.py
+# backend, report and page_executor are those of iter_classified_lines
+def extract_transcript_data(pdf_path, records=False, backend=None, report=None, page_executor=None):
+    with metrics.span("transcript_parse"):
+        return parse_classified_lines(iter_classified_lines(pdf_path, backend, report, page_executor), records)
+
+# function to parse plain transcript lines (e.g. from iter_transcript_lines) into the transcript dict
+def parse_transcript_lines(lines, records=False):
+    return parse_classified_lines(((line, *classify_line(line)) for line in lines), records)
+
+# function to pull the header fields and the course rows out of the classified lines in a single pass
+def parse_classified_lines(classified_lines, records=False):
+    header = {}
 
     # course storage structure
-    transcript_data['courses'] = {
+    courses = {
         'transfer_credits': [],
         'test_credits': [],
         'utd_classes': {}
     }
 
-    lines = transcript_text.split('\n')
     current_section = None
     current_semester = None
+    after_semester = False
 
     # parse line-by-line to extract course data
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        if line == "Transfer Credits":
-            current_section = "transfer_credits"
-        elif line == "Test Credits":
-            current_section = "test_credits"
-        elif line == "Beginning of Undergraduate Record":
-            current_section = "utd_classes"
-        elif re.match(r"^\d{4} (Fall|Spring|Summer)$", line):
-            current_semester = line
+    for line, kind, payload in classified_lines:
+        if len(header) < len(HEADER_FIELDS):
+            match_header_fields(line, header)
+
+        # the column header line right after a semester title is skipped
+        if after_semester:
+            after_semester = False
+            if "Course Description" in line:
+                continue
+
+        if kind == LINE_SECTION:
+            current_section = payload
+        elif kind == LINE_SEMESTER:
+            current_semester = payload
             if current_section == "utd_classes":
-                transcript_data['courses']['utd_classes'].setdefault(current_semester, [])
-            i += 1
-            if i < len(lines) and "Course Description" in lines[i]:
-                i += 1
-            continue
-
-        course_line_pattern = r"^([A-Z]+\s+[\w\-]+)\s+(.+?)\s+([\d\.]+)\s+([\d\.]+)(?:\s+([A-Z\+\-]+))?"
-        course_match = re.match(course_line_pattern, line)
-        if course_match:
-            course_code = course_match.group(1)
-            course_name = course_match.group(2).strip()
-            credits_attempted = float(course_match.group(3))
-            credits_earned = float(course_match.group(4))
-            grade = course_match.group(5) if course_match.group(5) else "In Progress"
-
-            course = {
-                'course_code': course_code,
-                'course_name': course_name,
-                'credits_attempted': credits_attempted,
-                'credits_earned': credits_earned,
-                'grade': grade
-            }
+                courses['utd_classes'].setdefault(current_semester, [])
+            after_semester = True
+        elif kind == LINE_COURSE:
+            grade = payload.group('grade')
+            if records:
+                course = CourseRow(payload.group('code'), payload.group('title').strip(), float(payload.group('attempted')),
+                                   float(payload.group('earned')), grade if grade else "In Progress")
+            else:
+                course = {
+                    'course_code': payload.group('code'),
+                    'course_name': payload.group('title').strip(),
+                    'credits_attempted': float(payload.group('attempted')),
+                    'credits_earned': float(payload.group('earned')),
+                    'grade': grade if grade else "In Progress"
+                }
 
             if current_section == "transfer_credits":
-                transcript_data['courses']['transfer_credits'].append(course)
+                courses['transfer_credits'].append(course)
             elif current_section == "test_credits":
-                transcript_data['courses']['test_credits'].append(course)
+                courses['test_credits'].append(course)
             elif current_section == "utd_classes":
-                transcript_data['courses']['utd_classes'][current_semester].append(course)
-
-        i += 1
+                courses['utd_classes'][current_semester].append(course)
 
+    transcript_data = build_transcript_header(header)
+    transcript_data['courses'] = courses
     return transcript_data
@@ -0,0 +1,194 @@
+import argparse
+import json
+import os
+import sys
+
+import metrics
+from degree_plan_evaluator import collect_completed_courses
+from plan_store import DEFAULT_PLAN_STORE, PlanStore
+
+# "what if I switch majors": completion of one transcript against every stored plan of a catalog year at once
+#
+# an inverted index over the compiled plans maps every course code to the (category, credit hours) entries it
+# counts towards, each category belonging to one plan. A transcript's completed courses are looked up once, the
+# credits they add to each category are capped at the category's required hours and summed per plan, so the cost
+# grows with the completed courses and not with the number of plans
+#
+# the credits are those of DegreePlanEvaluator.calculate_category_completion: a course listed twice in a category
+# counts twice, core courses add nothing to "beyond Core Curriculum" categories and of several categories with the
+# same name only the last one counts. For the categories and recommendations of one major use DegreePlanEvaluator
+
+
+class WhatIfIndex:
+    """Inverted course -> category index over the compiled plans of many majors."""
+
+    @metrics.span("what_if_index_build")
+    def __init__(self, plans):
+        """Build the index from (school, major, year) keys and their CompiledDegreePlan."""
+        self.plans = []             # plan id -> (school, major, year)
+        self.required_hours = []    # plan id -> required hours of all its categories
+        self.category_plans = []    # category id -> plan id
+        self.category_names = []    # category id -> category name
+        self.category_required = [] # category id -> required hours of the category
+        self.missing = []           # (school, major, year) of the majors without a stored plan, see from_store
+        self.store_root = None      # plan store directory, keys and artifact mtimes of a from_store index,
+        self.keys = ()              #   compared by is_current
+        self.signature = None
+        postings = {}               # course code -> [(category id, credit hours), ...]
+
+        for key, plan in plans:
+            plan_id = len(self.plans)
+            self.plans.append(key)
+            required_total = 0
+            # category_index holds the last category of every name, the one the evaluator's completion dict keeps
+            for category_name, index in plan.category_index.items():
+                section, _, codes = plan.categories[index]
+                required = plan.category_required_hours[category_name]
+                category_id = len(self.category_plans)
+                self.category_plans.append(plan_id)
+                self.category_names.append(category_name)
+                self.category_required.append(required)
+                required_total += required
+
+                beyond_core = section == 'major_requirements' and "beyond Core Curriculum" in category_name
+                hours = {}
+                for code in codes:
+                    if beyond_core and code in plan.core_courses:
+                        continue
+                    hours[code] = hours.get(code, 0) + plan.course_credit_hours[code]
+                for code, credit_hours in hours.items():
+                    if credit_hours and required:
+                        postings.setdefault(code, []).append((category_id, credit_hours))
+            self.required_hours.append(required_total)
+
+        self.postings = {code: tuple(entries) for code, entries in postings.items()}
+
+    @classmethod
+    def from_store(cls, store, year, majors=None):
+        """Index the stored plans of every major of school_mapping (or of majors) for the catalog year.
+
+        Majors without a stored plan are left out and listed in the index's missing attribute.
+        """
+        keys = store_keys(year, majors)
+        # taken before the plans are loaded, a plan rewritten meanwhile makes the next is_current check fail
+        signature = store_signature(store, keys)
+        plans = []
+        missing = []
+        for key in keys:
+            plan = store.load(*key)
+            if plan is None:
+                missing.append(key)
+            else:
+                plans.append((key, plan))
+        index = cls(plans)
+        index.missing.extend(missing)
+        index.store_root = store.root
+        index.keys = keys
+        index.signature = signature
+        return index
+
+    def is_current(self, store):
+        """Check that no plan of a from_store index was written, removed or added in the store since it was built."""
+        return (self.signature is not None and self.store_root == store.root
+                and store_signature(store, self.keys) == self.signature)
+
+    def credits_by_category(self, completed_courses):
+        """Return {category id: credit hours} of the categories the completed courses count towards."""
+        credits = {}
+        postings = self.postings
+        for code in completed_courses:
+            for category_id, credit_hours in postings.get(code, ()):
+                credits[category_id] = credits.get(category_id, 0) + credit_hours
+        return credits
+
+    @metrics.span("what_if_evaluate")
+    def evaluate(self, completed_courses):
+        """Return the completion of every indexed plan for the completed course codes, most complete first.
+
+        Each entry is {'school', 'major', 'year', 'completed_hours', 'required_hours', 'remaining_hours', 'percent'},
+        completed_hours only counts the credits of a category up to its required hours.
+        """
+        completed_hours = [0] * len(self.plans)
+        for category_id, credit_hours in self.credits_by_category(completed_courses).items():
+            completed_hours[self.category_plans[category_id]] += min(credit_hours, self.category_required[category_id])
+
+        results = []
+        for plan_id, (school, major, year) in enumerate(self.plans):
+            required = self.required_hours[plan_id]
+            completed = completed_hours[plan_id]
+            results.append({
+                'school': school,
+                'major': major,
+                'year': year,
+                'completed_hours': completed,
+                'required_hours': required,
+                'remaining_hours': required - completed,
+                'percent': round(100 * completed / required, 1) if required else 0.0,
+            })
+        results.sort(key=lambda result: -result['percent'])
+        return results
+
+    def evaluate_transcript(self, transcript):
+        """Same as evaluate, for a parsed transcript dict or one with CourseRow records."""
+        return self.evaluate(collect_completed_courses(transcript))
+
+
+# function to list the (school, major, year) keys of every major of school_mapping (or of majors) for the year
+def store_keys(year, majors=None):
+    from transcript_parser import school_mapping
+
+    return [(school, major, str(year)) for major, school in school_mapping.items() if not majors or major in majors]
+
+
+# function to return the modification time of the artifact of every key (None when there is none), like the mtimes
+# PlanStore keeps its loaded plans by
+def store_signature(store, keys):
+    signature = []
+    for school, major, year in keys:
+        try:
+            signature.append(os.stat(store.path(school, major, year)).st_mtime_ns)
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+
+# function to print the what-if results as a table, the transcript's own major marked with a *
+def print_what_if(results, current_major=None, top=None):
+    for result in results[:top]:
+        marker = "*" if result['major'] == current_major else " "
+        print(f"{marker} {result['major']:<28} {result['percent']:5.1f}%  "
+              f"{result['completed_hours']:>3}/{result['required_hours']:<3} hours")
+
+
+# run with a transcript parsed by an earlier main.py run: python what_if.py [transcript_data.json] [--year 2023]
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Completion of a parsed transcript against every stored major of a catalog year.")
+    parser.add_argument("transcript", nargs="?", default="transcript_data.json")
+    parser.add_argument("--year", help="catalog year (default: the year of the transcript's program start date)")
+    parser.add_argument("--plans", default=DEFAULT_PLAN_STORE, help="directory of the compiled degree plan store")
+    parser.add_argument("--top", type=int, help="only show the most complete majors")
+    parser.add_argument("--json", help="also save the results to this file")
+    args = parser.parse_args(argv)
+
+    with open(args.transcript) as transcript_file:
+        transcript_data = json.load(transcript_file)
+    year = args.year or transcript_data['program_start_date'].split("-")[0]
+
+    index = WhatIfIndex.from_store(PlanStore(args.plans), year)
+    if not index.plans:
+        print(f"Error: no stored plans for {year}, build them with catalog_crawler.py first.", file=sys.stderr)
+        return 1
+    if index.missing:
+        print(f"{len(index.missing)} majors have no stored {year} plan: {', '.join(key[1] for key in index.missing)}",
+              file=sys.stderr)
+
+    results = index.evaluate_transcript(transcript_data)
+    print_what_if(results, transcript_data.get('major'), args.top)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, separators=(",", ":"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())